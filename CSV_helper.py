@@ -1,9 +1,12 @@
 # Recovery Score Calculations: CSV_helper Script
 # Script created  8/10/2024
-# Last revision 12/23/2024
+# Last revision 10/18/2026
 
 import csv
-import pandas as pd
+import io
+import os
+import sqlite3
+
 from datetime import datetime
 
 class CSV:
@@ -14,20 +17,24 @@ class CSV:
     @classmethod
     def initialize_csv(cls) -> None:
         '''Initializes the CSV file. If the file does not exist, it creates a new CSV file
-        with the specified columns. If the file exists, it reads the file
-        
-        Raises:
-            FileNotFoundError: If the CSV file does not exist.
+        with the specified columns. The file is created exclusively (O_EXCL), so when several
+        processes start at once only the one that creates it writes the header.
         '''
-        
         try:
-            pd.read_csv(cls.CSV_FILE)
+            descriptor: int = os.open(cls.CSV_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+
+        except FileExistsError:
+            return
 
-        except FileNotFoundError:
+        try:
             # Creates a new CSV file with the specified columns
-            df = pd.DataFrame(columns = cls.COLUMNS)
-            # Saves the new CSV file
-            df.to_csv(cls.CSV_FILE, index = False)
+            os.write(descriptor, (','.join(cls.COLUMNS) + '\n').encode('utf-8'))
+
+        finally:
+            os.close(descriptor)
+
+    # common name of the results sinks
+    initialize = initialize_csv
 
     @classmethod
     def add_entry(cls, date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py) -> None:
@@ -49,30 +56,173 @@ class CSV:
         Returns:
             None
         '''
-        new_entry:dict = {
-            'Date': date,
-            'Case_Number': case_number,
-            'jerk_threshold': jerk_threshold,
-            'mean_jerk': mean_jerk,
-            'std_jerk': std_jerk,
-            'jerk_threshold_cal': jerk_threshold_cal,
-            'snap_threshold_cal': snap_threshold_cal,
-            'Number_failed_attempts': number_failed_attempts,
-            'sa_2axes_py': sa_2axes,
-            'sumua_py': sumua,
-            'rs_2axes_py': rs_2axes_py   
-        }
-
-        with open(cls.CSV_FILE, 'a', newline = '') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames = cls.COLUMNS)
+        cls.add_entries([dict(zip(cls.COLUMNS, [date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py]))])
+
+    @classmethod
+    def add_entries(cls, entries: list[dict]) -> None:
+        '''Appends entries to the CSV file with a single write, so rows written by
+        concurrent processes are never interleaved
+
+        Args:
+            entries (list[dict]): entries with the COLUMNS keys (see make_entry)
+        '''
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames = cls.COLUMNS, lineterminator = '\n')
+
+        for entry in entries:
             # Replaces with empty string if sumua does not exist
-            sumua = '' if sumua is None else sumua
-            # Writes the new entry to the CSV file
-            writer.writerow(new_entry)
-        print('Entry added successfully')      
+            writer.writerow({**entry, 'sumua_py': '' if entry['sumua_py'] is None else entry['sumua_py']})
+
+        _append(cls.CSV_FILE, buffer.getvalue())
+        print('Entry added successfully')
+
+class SQLite:
+    '''Results store in a local SQLite database. Uses WAL mode so several processes can write
+    concurrently (writers wait up to TIMEOUT seconds for the lock) while readers are never blocked.
+    The CSV file can still be produced with export_csv.
+    '''
+    DB_FILE: str = 'RS_output.db'
+    TABLE: str = 'results'
+    TIMEOUT: float = 30.0
+    COLUMN_TYPES: list[str] = ['TEXT', 'TEXT', 'REAL', 'REAL', 'REAL', 'REAL', 'REAL', 'INTEGER', 'REAL', 'REAL', 'REAL']
+
+    @classmethod
+    def connect(cls) -> sqlite3.Connection:
+        '''Opens the database, creating the table and the (Case_Number, Date) index if needed
+
+        Returns:
+            sqlite3.Connection: connection to the database
+        '''
+        connection = sqlite3.connect(cls.DB_FILE, timeout = cls.TIMEOUT)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+
+        columns: str = ', '.join(f'{column} {column_type}' for column, column_type in zip(CSV.COLUMNS, cls.COLUMN_TYPES))
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {cls.TABLE} ({columns})')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {cls.TABLE}_case_date ON {cls.TABLE} (Case_Number, Date)')
+
+        return connection
+
+    @classmethod
+    def initialize(cls) -> None:
+        '''Creates the database if it does not exist'''
+        cls.connect().close()
+
+    @classmethod
+    def add_entry(cls, date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py) -> None:
+        '''Adds a new entry to the database (same arguments as CSV.add_entry)'''
+        cls.add_entries([dict(zip(CSV.COLUMNS, [date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py]))])
+
+    @classmethod
+    def add_entries(cls, entries: list[dict]) -> None:
+        '''Inserts entries in a single transaction
+
+        Args:
+            entries (list[dict]): entries with the CSV.COLUMNS keys (see make_entry)
+        '''
+        placeholders: str = ', '.join('?' for _ in CSV.COLUMNS)
+        connection = cls.connect()
+
+        try:
+            with connection:
+                connection.executemany(f'INSERT INTO {cls.TABLE} VALUES ({placeholders})', [[entry[column] for column in CSV.COLUMNS] for entry in entries])
+
+        finally:
+            connection.close()
+
+        print('Entry added successfully')
+
+    @classmethod
+    def latest_scores(cls) -> list[dict]:
+        '''Returns the latest entry of each case
+
+        Returns:
+            list[dict]: one entry per case, sorted by case number
+        '''
+        connection = cls.connect()
+
+        try:
+            cursor = connection.execute(f'SELECT * FROM {cls.TABLE} WHERE rowid IN (SELECT MAX(rowid) FROM {cls.TABLE} GROUP BY Case_Number) ORDER BY Case_Number')
+            return [dict(zip(CSV.COLUMNS, row)) for row in cursor]
 
-def add_ua(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, snap_threshold_cal: float, number_failed_attempts: int, sa_2axes: float, sumua: float, rs_2axes_py: float) -> None:
-    '''Adds new UA entry to a CSV file
+        finally:
+            connection.close()
+
+    @classmethod
+    def case_history(cls, case_number: str) -> list[dict]:
+        '''Returns all the entries of a case, oldest first (uses the (Case_Number, Date) index)
+
+        Args:
+            case_number (str): case number
+
+        Returns:
+            list[dict]: entries of the case
+        '''
+        connection = cls.connect()
+
+        try:
+            cursor = connection.execute(f'SELECT * FROM {cls.TABLE} WHERE Case_Number = ? ORDER BY Date, rowid', (case_number,))
+            return [dict(zip(CSV.COLUMNS, row)) for row in cursor]
+
+        finally:
+            connection.close()
+
+    @classmethod
+    def export_csv(cls, csv_file: str = CSV.CSV_FILE) -> None:
+        '''Writes all the entries to a CSV file with the same layout as RS_output.csv
+
+        Args:
+            csv_file (str): path to the CSV file (overwritten)
+        '''
+        connection = cls.connect()
+
+        try:
+            with open(csv_file, 'w', newline = '') as csvfile:
+                writer = csv.writer(csvfile, lineterminator = '\n')
+                writer.writerow(CSV.COLUMNS)
+                writer.writerows(['' if value is None else value for value in row] for row in connection.execute(f'SELECT * FROM {cls.TABLE} ORDER BY rowid'))
+
+        finally:
+            connection.close()
+
+# Results sinks by name and the one used when none is given
+RESULTS_SINKS: dict = {'csv': CSV, 'sqlite': SQLite}
+RESULTS_SINK: str = 'csv'
+
+def get_results_sink(sink: str | None = None):
+    '''Returns the results sink class (CSV or SQLite)
+
+    Args:
+        sink (str, optional): 'csv' or 'sqlite'. Defaults to RESULTS_SINK
+
+    Returns:
+        the sink class
+    '''
+    return RESULTS_SINKS[sink or RESULTS_SINK]
+
+def make_entry(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, snap_threshold_cal: float, number_failed_attempts: int, sa_2axes: float, sumua: float | None, rs_2axes_py: float) -> dict:
+    '''Builds a results entry dated now. Case_Number is the file name only, so batch runs (case paths with their
+       directory) log the same Case_Number as interactive runs
+
+    Args:
+        file_path (str): name of the file (with or without its directory; the directory is only used to read it)
+        jerk_threshold (float): threshold for jerk
+        mean_jerk (float): mean jerk value
+        std_jerk (float): standard deviation of jerk
+        jerk_threshold_cal (float): jerk threshold value from the function used to calculate
+        snap_threshold_cal (float): snap threshold value
+        number_failed_attempts (int): number of failed attempts
+        sa_2axes (float): calculated score using data from 2 axes (X and Y)
+        sumua (float or None): calculated score using data from all axes (None for a single and successful attempt)
+        rs_2axes_py (float): calculated recovery score for 2 axes
+
+    Returns:
+        dict: entry with the CSV.COLUMNS keys
+    '''
+    return dict(zip(CSV.COLUMNS, [get_date(), os.path.basename(rename(file_path)), jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py]))
+
+def add_ua(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, snap_threshold_cal: float, number_failed_attempts: int, sa_2axes: float, sumua: float, rs_2axes_py: float, sink: str | None = None) -> None:
+    '''Adds new UA entry to the results (CSV file by default)
 
     Args:
         file_path (str): name of the file
@@ -85,14 +235,14 @@ def add_ua(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: fl
         sa_2axes (float): calculated score using data from 2 axes (X and Y)
         sumua (float): calculated score using data from all axes
         rs_2_axes_py: calculated recovery score for 2 axes
+        sink (str, optional): 'csv' or 'sqlite' (see get_results_sink)
     '''
-    CSV.initialize_csv()
-    date:str = get_date()
-    case_number: str = rename(file_path)
-    CSV.add_entry(date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
+    results_sink = get_results_sink(sink)
+    results_sink.initialize()
+    results_sink.add_entries([make_entry(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)])
 
-def add_sa(file_path :str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, snap_threshold_cal: float, number_failed_attempts: int, sa_2axes: float, rs_2axes_py: float) -> None:
-    '''Adds entry for a single and successful attempt to a CSV file
+def add_sa(file_path :str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, snap_threshold_cal: float, number_failed_attempts: int, sa_2axes: float, rs_2axes_py: float, sink: str | None = None) -> None:
+    '''Adds entry for a single and successful attempt to the results (CSV file by default)
 
     Args:
         file_path (str): name of the file
@@ -105,13 +255,21 @@ def add_sa(file_path :str, jerk_threshold: float, mean_jerk: float, std_jerk: fl
         sa_2axes (float): the score for when there is only one successful attempt
         sumua (None): in a single and successful attempt, there is no value for sumua
         rs_2axes_py (float): recovery score for 2 axes
+        sink (str, optional): 'csv' or 'sqlite' (see get_results_sink)
     '''
-    CSV.initialize_csv()
-    date:str = get_date()
-    case_number: str = rename(file_path)
-    sumua = None
-    #number_failed_attempts_jerk = number_failed_attempts_jerk
-    CSV.add_entry(date, case_number, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
+    results_sink = get_results_sink(sink)
+    results_sink.initialize()
+    results_sink.add_entries([make_entry(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, None, rs_2axes_py)])
+
+def _append(file_path: str, text: str) -> None:
+    '''Appends text to a file with a single O_APPEND write (atomic with respect to other appending processes)'''
+    descriptor: int = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    try:
+        os.write(descriptor, text.encode('utf-8'))
+
+    finally:
+        os.close(descriptor)
 
 def get_date() -> str:
     '''Generates a timestamp for the backup file
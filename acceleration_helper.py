@@ -1,6 +1,8 @@
 # Recovery Score Calculations: Acceleration helper
 # Script created 3/25/2024
-# Last revision 4/9/202
+# Last revision 10/18/2026
+
+import numpy as np
 
 from numpy import sqrt
 #import pandas as pd
@@ -10,18 +12,14 @@ def get_max_accelerations_x(roi_values_df) -> list[float]:
         for each attempt   
 
     Args:
-        selected_data_list: list with a list of dataframes. 
-        One per event with three columns (AccX, AccY and AccZ)
+        roi_values_df: DataFrame (or dict of arrays) with one row per attempt and columns including 'Acc_X', 'Acc_Y' and 'Acc_Z'
+        (see region_helper.extract_region_maxima)
 
     Returns:
         list [float]
     '''
    
-    amax_x_list:list[float] = []
-        
-    for _, row in roi_values_df.iterrows():
-        amax_x: float = row['Acc_X']
-        amax_x_list.append(abs(amax_x))
+    amax_x_list: list[float] = np.abs(np.asarray(roi_values_df['Acc_X'], dtype = np.float64)).tolist()
     
     return amax_x_list
 
@@ -30,18 +28,14 @@ def get_max_accelerations_y(roi_values_df) -> list[float]:
         for each attempt 
         
     Args:
-        selected_data_list: list with a list of dataframes. 
-        One per event with three columns (AccX, AccY and AccZ)
+        roi_values_df: DataFrame (or dict of arrays) with one row per attempt and columns including 'Acc_X', 'Acc_Y' and 'Acc_Z'
+        (see region_helper.extract_region_maxima)
 
     Returns:
         list [float]
     '''
    
-    amax_y_list:list[float] = []
-        
-    for _, row in roi_values_df.iterrows():
-        amax_y: float = row['Acc_Y']
-        amax_y_list.append(abs(amax_y))
+    amax_y_list: list[float] = np.abs(np.asarray(roi_values_df['Acc_Y'], dtype = np.float64)).tolist()
     
     return amax_y_list
         
@@ -50,18 +44,15 @@ def get_max_accelerations_z(roi_values_df) -> list[float]:
         for 'Acc_Z'
 
     Args:
-        roi_values_df: DataFrame with columns including 'Acc_Z'.
+        roi_values_df: DataFrame (or dict of arrays) with one row per attempt and columns including 'Acc_Z'
+        (see region_helper.extract_region_maxima)
 
     Returns:
         list [float]
 
     '''
    
-    amax_z_list: list[float] = []
-        
-    for _, row in roi_values_df.iterrows():
-        amax_z: float = abs(row['Acc_Z'])
-        amax_z_list.append(amax_z)
+    amax_z_list: list[float] = np.abs(np.asarray(roi_values_df['Acc_Z'], dtype = np.float64)).tolist()
     
     return amax_z_list
 
@@ -1,49 +1,51 @@
 # Recovery Score Calculations: Identification of Regions of Interest helper
 # Script created  3/25/2024
-# Last revision 12/24/2024
+# Last revision 10/18/2026
 
 import numpy as np
-import pandas as pd
 from numpy.typing import NDArray
+from rolling_helper import rolling
+from threshold_helper import get_threshold_stats
 
-def set_jerk_threshold(jerk: NDArray[np.float64], factor: float, percentile: float) -> tuple:
+# Window and step (in samples) of the standard deviation method (1 s windows every 0.25 s at 200 Hz)
+SD_WINDOW_SIZE: int = 200
+SD_STEP_SIZE: int = 50
+
+def set_jerk_threshold(jerk: NDArray[np.float64], factor: float, percentile: float, mode: str = 'exact') -> tuple:
     '''Sets the jerk threshold based on the mean and standard deviation of the jerk values
 
     Args:
     jerk (NDArray[np.float64]): Array of jerk values
     factor (float): Multiplication factor for the standard deviation
     percentile (int): Percentile value to use for setting the threshold
+    mode (str): 'exact' or 'streaming' (bounded memory, approximate percentile), see threshold_helper.get_threshold_stats
 
     Returns:
         tuple: The calculated jerk threshold
     '''
-    mean_jerk = np.mean(jerk)
-    std_jerk = np.std(jerk)
-    percentile_jerk = np.percentile(jerk, percentile)
-    jerk_threshold_cal = max(mean_jerk + factor * std_jerk, percentile_jerk)
+    mean_jerk, std_jerk, jerk_threshold_cal = get_threshold_stats(jerk, factor, percentile, mode)
    
     return mean_jerk, std_jerk, jerk_threshold_cal
 
-def set_snap_threshold(snap: NDArray[np.float64], factor: float, percentile: float) -> tuple:
+def set_snap_threshold(snap: NDArray[np.float64], factor: float, percentile: float, mode: str = 'exact') -> tuple:
     '''Sets the snap threshold based on the mean and standard deviation of the snap values
 
     Args:
     snap (NDArray[np.float64]): Array of snap values
     factor (float): Multiplication factor for the standard deviation
     percentile (int): Percentile value to use for setting the threshold
+    mode (str): 'exact' or 'streaming' (bounded memory, approximate percentile), see threshold_helper.get_threshold_stats
 
     Returns:
         tuple: The calculated snap threshold
     '''
-    mean_snap = np.mean(snap)
-    std_snap = np.std(snap)
-    percentile_snap = np.percentile(snap, percentile)
-    snap_threshold_cal = max(mean_snap + factor * std_snap, percentile_snap)
-    
+    mean_snap, std_snap, snap_threshold_cal = get_threshold_stats(snap, factor, percentile, mode)
+   
     return mean_snap, std_snap, snap_threshold_cal
 
 def detect_regions(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_threshold: float, snap_threshold: float, sampling_rate: int) -> list[int]:
     '''Detects spikes in jerk and snap signals and returns a list of indices 0.5 seconds before and after the max value of each spike.
+       Flat index version of detect_region_intervals.
 
     Args:
         jerk (NDArray[np.float64]): Array of jerk values
@@ -55,6 +57,26 @@ def detect_regions(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_th
     Returns:
         list[int]: List of indices 0.5 seconds before and after the max value of each spike
     '''
+    region_starts, region_ends = detect_region_intervals(jerk, snap, jerk_threshold, snap_threshold, sampling_rate)
+
+    return intervals_to_indices(region_starts, region_ends).tolist()
+
+def detect_region_intervals(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_threshold: float, snap_threshold: float, sampling_rate: int) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    '''Detects spikes in jerk and snap signals and returns the regions 0.5 seconds before and after the max value of each spike.
+       For each spike, the max of |jerk| + |snap| within 0.5 seconds of the spike is found with a sliding-window argmax
+       computed for the whole signal in linear time. Overlapping or touching regions are merged.
+       jerk and snap are only read (views are fine); the temporary arrays have the length of the signal.
+
+    Args:
+        jerk (NDArray[np.float64]): Array of jerk values
+        snap (NDArray[np.float64]): Array of snap values
+        jerk_threshold (float): Threshold for jerk values
+        snap_threshold (float): Threshold for snap values
+        sampling_rate (float): Sampling rate of the signals in Hz
+
+    Returns:
+        tuple[NDArray[np.int64], NDArray[np.int64]]: start (inclusive) and end (exclusive) index of each region, sorted
+    '''
     # Ensure both arrays have the same length
     min_length = min(len(jerk), len(snap))
     jerk = jerk[:min_length]
@@ -62,47 +84,106 @@ def detect_regions(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_th
 
     # Detect spikes where either jerk or snap exceed thresholds
     spike_mask = (np.abs(jerk) > jerk_threshold) | (np.abs(snap) > snap_threshold)
-    spike_indices = np.where(spike_mask)[0]  # Get indices of true values in the mask
+    spike_indices = np.flatnonzero(spike_mask)
 
-    # Initialize list to store indices of interest
-    roi_indices = []
+    if len(spike_indices) == 0:
+        return np.empty(0, dtype = np.int64), np.empty(0, dtype = np.int64)
 
     # Define the window size in terms of number of samples (0.5 seconds before and after)
     window_size = int(0.5 * sampling_rate)
 
-    # Iterate through detected spikes
-    for idx in spike_indices:
-        # Get the window around the spike
-        start_idx = max(0, idx - window_size)
-        end_idx = min(len(jerk), idx + window_size + 1)
+    # Max value within the window around each spike (several spikes usually share the same max)
+    max_indices = np.unique(sliding_window_argmax(np.abs(jerk) + np.abs(snap), window_size)[spike_indices]).astype(np.int64)
+
+    # Indices 0.5 seconds before and after the max value (end is exclusive)
+    roi_starts = np.maximum(max_indices - window_size, 0)
+    roi_ends = np.minimum(max_indices + window_size + 1, min_length)
+
+    # Merge regions that overlap or touch. Starts and ends are both sorted, so a new region
+    # begins wherever its start is past the end of the previous one
+    new_region = np.ones(len(roi_starts), dtype = bool)
+    new_region[1:] = roi_starts[1:] > roi_ends[:-1]
+    first = np.flatnonzero(new_region)
+    last = np.append(first[1:], len(roi_starts)) - 1
+
+    return roi_starts[first], roi_ends[last]
+
+def intervals_to_indices(region_starts: NDArray[np.int64], region_ends: NDArray[np.int64]) -> NDArray[np.int64]:
+    '''Expands regions into the flat, sorted list of the indices they contain
+
+    Args:
+        region_starts (NDArray[np.int64]): start index (inclusive) of each region
+        region_ends (NDArray[np.int64]): end index (exclusive) of each region
+
+    Returns:
+        NDArray[np.int64]: indices of all the regions
+    '''
+    lengths = np.asarray(region_ends, dtype = np.int64) - np.asarray(region_starts, dtype = np.int64)
+    offsets = np.cumsum(lengths) - lengths
+
+    return np.arange(lengths.sum(), dtype = np.int64) + np.repeat(region_starts - offsets, lengths)
+
+def sliding_window_argmax(values: NDArray[np.float64], half_window: int) -> NDArray[np.int64]:
+    '''Index of the max value within 'half_window' samples before and after each sample (first occurrence on ties).
+       Uses the van Herk/Gil-Werman method: the signal is split into blocks of the window length and every
+       window is covered by the suffix of one block and the prefix of the next one, so the cost is O(n).
+       The temporary arrays keep the dtype of values (float32 signals are not promoted) and use int32
+       indices when the padded signal is shorter than 2**31 samples.
+
+    Args:
+        values (NDArray[np.float64]): signal
+        half_window (int): number of samples before and after each sample
+
+    Returns:
+        NDArray[np.int64]: index of the window max for each sample (int32 when the signal is short enough)
+    '''
+    n = len(values)
+    window = 2 * half_window + 1
+    n_blocks = -(-(n + 2 * half_window) // window) + 1
+    index_dtype = np.int32 if n_blocks * window < np.iinfo(np.int32).max else np.int64
+
+    # Pads with -inf so windows near the edges are clipped to the signal
+    padded = np.full(n_blocks * window, -np.inf, dtype = np.result_type(values.dtype, np.float32))
+    padded[half_window:half_window + n] = values
+    blocks = padded.reshape(n_blocks, window)
+    positions = np.arange(window, dtype = index_dtype)
 
-        # Find the max value within the window
-        max_idx = np.argmax(np.abs(jerk[start_idx:end_idx]) + np.abs(snap[start_idx:end_idx])) + start_idx
+    # Prefix argmax: last position where the running max strictly increased
+    running_max = np.maximum.accumulate(blocks, axis = 1)
+    increased = np.ones(blocks.shape, dtype = bool)
+    increased[:, 1:] = blocks[:, 1:] > running_max[:, :-1]
+    prefix_arg = np.maximum.accumulate(np.where(increased, positions, 0), axis = 1)
 
-        # Get indices 0.5 seconds before and after the max value
-        roi_start_idx = max(0, max_idx - window_size)
-        roi_end_idx = min(len(jerk), max_idx + window_size + 1)
+    # Suffix argmax: first position at or after each sample not smaller than anything to its right
+    suffix_max = np.maximum.accumulate(blocks[:, ::-1], axis = 1)[:, ::-1]
+    leftmost = np.ones(blocks.shape, dtype = bool)
+    leftmost[:, :-1] = blocks[:, :-1] >= suffix_max[:, 1:]
+    suffix_arg = np.minimum.accumulate(np.where(leftmost, positions, window)[:, ::-1], axis = 1)[:, ::-1]
 
-        # Append the indices to the list
-        roi_indices.extend(range(roi_start_idx, roi_end_idx))
+    block_offsets = np.arange(n_blocks, dtype = index_dtype)[:, np.newaxis] * index_dtype(window)
+    prefix_arg = (prefix_arg + block_offsets).ravel()
+    suffix_arg = (suffix_arg + block_offsets).ravel()
 
-    # Remove duplicates and sort the indices
-    roi_indices = sorted(set(roi_indices))
+    # The window of sample i covers padded[i:i + window]
+    window_starts = np.arange(n, dtype = index_dtype)
+    from_suffix = suffix_arg[window_starts]
+    from_prefix = prefix_arg[window_starts + window - 1]
+    argmax = np.where(padded[from_suffix] >= padded[from_prefix], from_suffix, from_prefix)
 
-    return roi_indices
+    return argmax - half_window
 
-def get_attempts(regions_indexes) -> int:
+def get_attempts(regions) -> int:
     ''' Counts the number of identified regions of interest. Since the last region will always be
         the successful attempt, it substracts 1 to the final count
 
     Args:
-        roi_indices: list with the all the regions that have a jerk > set threshold
+        regions: one entry per region of interest (e.g. the region starts from detect_region_intervals)
 
     Returns:
         int with Number of failed Attempts
     '''
 
-    number_failed_attempts: int = len(regions_indexes) - 1
+    number_failed_attempts: int = len(regions) - 1
 
     return number_failed_attempts
 
@@ -150,3 +231,46 @@ def get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold) -> list:
     roi_derivative.append((index, big))
     
     return roi_derivative
+
+def get_sd(acc_z: NDArray[np.float64], window_size: int = SD_WINDOW_SIZE, step_size: int = SD_STEP_SIZE) -> NDArray[np.float64]:
+    '''Calculates the standard deviation of Acc_Z (AccZ_sd) over windows of 'window_size' samples advancing every
+       'step_size' samples. Only the windows that are used are computed (rolling_helper.rolling with step_size).
+
+    Args:
+        acc_z (NDArray[np.float64]): Acc_Z values
+        window_size (int): number of samples of each window
+        step_size (int): number of samples the window advances
+
+    Returns:
+        NDArray[np.float64]: standard deviation of each window (window k covers samples k * step_size to k * step_size + window_size - 1)
+    '''
+    return rolling(acc_z, window_size, 'std', step_size, partial = False)
+
+def get_roi_sd(acc_z: NDArray[np.float64], threshold: float, window_size: int = SD_WINDOW_SIZE, step_size: int = SD_STEP_SIZE) -> list:
+    ''' Identifies Regions of Interest in the data based on a threshold criterion
+        applied to the standard deviation of Acc_Z over sliding windows (see get_sd).
+        Consecutive windows with a standard deviation greater than or equal to the threshold form one region,
+        which is stored as the index and standard deviation of its window with the largest standard deviation.
+
+    Args:
+        acc_z (NDArray[np.float64]): Acc_Z values
+        threshold (float): threshold value for the standard deviation
+        window_size (int): number of samples of each window
+        step_size (int): number of samples the window advances
+
+    Returns:
+        list with one (window index, standard deviation) tuple per region of interest
+        (window k starts on sample k * step_size, see graph_helper.get_plot_sd_with_roi)
+    '''
+    sd: NDArray[np.float64] = get_sd(acc_z, window_size, step_size)
+    above: NDArray[np.int64] = np.flatnonzero(sd >= threshold)
+
+    if len(above) == 0:
+        return []
+
+    # Splits the windows above the threshold into runs of consecutive windows
+    regions: list[NDArray[np.int64]] = np.split(above, np.flatnonzero(np.diff(above) > 1) + 1)
+
+    roi_sd: list = [(int(region[np.argmax(sd[region])]), float(sd[region].max())) for region in regions]
+
+    return roi_sd
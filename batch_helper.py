@@ -0,0 +1,144 @@
+# Recovery Score Calculations: batch_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import glob
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from CSV_helper import get_results_sink, make_entry, rename
+from pipeline_helper import run_pipeline
+from profiling_helper import StageProfiler, aggregate_profiles, print_stages, write_json
+
+def find_case_files(pattern: str) -> list[str]:
+    '''Lists the case files of a cohort
+
+    Args:
+        pattern (str): directory containing the case csv files, or a glob pattern (e.g. 'cases/38*.csv')
+
+    Returns:
+        list[str]: sorted case paths without the .csv extension (as expected by read_csv_file)
+    '''
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+
+    return sorted(rename(path) for path in glob.glob(pattern) if path.endswith('.csv'))
+
+def run_case(file_path: str, parameters: dict | None = None, profile: bool = False, cprofile: bool = False, plot_file: str | None = None, export_dir: str | None = None) -> dict:
+    '''Runs the pipeline for one case inside a worker process (no interactive plots, no progress prints)
+
+    Args:
+        file_path (str): case path without the .csv extension
+        parameters (dict, optional): parameters that override the pipeline defaults
+        profile (bool): adds the stage profile of the run under the 'profile' key
+        cprofile (bool): includes the cProfile statistics in the profile
+        plot_file (str, optional): saves the jerk and snap plot of the case to this file
+        export_dir (str, optional): exports the signals and attempts of the case to Parquet files in this directory
+
+    Returns:
+        dict: results of pipeline_helper.run_pipeline
+    '''
+    profiler: StageProfiler | None = StageProfiler(file_path, cprofile = cprofile) if profile else None
+    results: dict = run_pipeline(file_path, parameters, plot = False, verbose = False, profiler = profiler, plot_file = plot_file, export_dir = export_dir)
+
+    if profiler is not None:
+        results['profile'] = profiler.to_dict()
+
+    return results
+
+def get_plot_file(plot_dir: str | None, file_path: str, plot_format: str = 'png') -> str | None:
+    '''Path of the plot of a case in plot_dir (None if plots are not saved)
+
+    Args:
+        plot_dir (str or None): directory of the plots
+        file_path (str): case path without the .csv extension
+        plot_format (str): 'png' or 'svg'
+
+    Returns:
+        str or None: plot_dir/<case>.<plot_format>
+    '''
+    if plot_dir is None:
+        return None
+
+    return os.path.join(plot_dir, f'{os.path.basename(file_path)}.{plot_format}')
+
+def run_batch(pattern: str, workers: int | None = None, parameters: dict | None = None, sink: str | None = None, flush_every: int = 1, profile_dir: str | None = None, cprofile: bool = False, plot_dir: str | None = None, plot_format: str = 'png', export_dir: str | None = None) -> tuple[list[dict], dict[str, str]]:
+    '''Scores every case of a cohort in parallel over a process pool.
+       Results are logged from this process only, each case's row as soon as it completes (one write or one
+       transaction per row; flush_every > 1 batches them instead). Rows of completed cases are still written if the
+       batch is interrupted. A case that fails is reported and the rest of the cohort continues.
+
+    Args:
+        pattern (str): directory or glob pattern of the case csv files
+        workers (int, optional): number of worker processes (defaults to the number of CPUs)
+        parameters (dict, optional): parameters that override the pipeline defaults
+        sink (str, optional): results sink, 'csv' or 'sqlite' (see CSV_helper.get_results_sink)
+        flush_every (int): number of results buffered before they are written (1: each result as it completes)
+        profile_dir (str, optional): directory where the stage profile of each case (<case>.json) and the
+                                     profile aggregated over the batch (summary.json) are written
+        cprofile (bool): includes the cProfile statistics in the profiles
+        plot_dir (str, optional): directory where the jerk and snap plot of each case (<case>.<plot_format>) is saved
+        plot_format (str): 'png' or 'svg'
+        export_dir (str, optional): directory where the signals, attempts and results of each case are exported
+                                    to Parquet files, partitioned by case (see export_helper.export_case)
+
+    Returns:
+        tuple[list[dict], dict[str, str]]: results of the cases that completed and error message per failed case
+    '''
+    case_files: list[str] = find_case_files(pattern)
+    print(f'{len(case_files)} cases found')
+
+    results: list[dict] = []
+    failures: dict[str, str] = {}
+
+    results_sink = get_results_sink(sink)
+    results_sink.initialize()
+    entries: list[dict] = []
+    profiles: list[dict] = []
+
+    if plot_dir is not None:
+        os.makedirs(plot_dir, exist_ok = True)
+
+    try:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures: dict = {executor.submit(run_case, file_path, parameters, profile_dir is not None, cprofile, get_plot_file(plot_dir, file_path, plot_format), export_dir): file_path for file_path in case_files}
+
+            for future in as_completed(futures):
+                file_path: str = futures[future]
+
+                try:
+                    r: dict = future.result()
+
+                except Exception as e:
+                    failures[file_path] = f'{type(e).__name__}: {e}'
+                    print(f'{file_path}: failed ({failures[file_path]})')
+                    continue
+
+                # sumua is not logged for a single and successful attempt (see output_results_helper.process_recovery)
+                sumua: float | None = r['sumua'] if r['number_failed_attempts'] >= 1 else None
+                entries.append(make_entry(r['file_path'], r['jerk_threshold'], r['mean_jerk'], r['std_jerk'], r['jerk_threshold_cal'], r['snap_threshold_cal'], r['number_failed_attempts'], r['sa_2axes'], sumua, r['rs_2axes_py']))
+                results.append(r)
+
+                if profile_dir is not None:
+                    profiles.append(r.pop('profile'))
+                    write_json(profiles[-1], os.path.join(profile_dir, os.path.basename(file_path) + '.json'))
+
+                print(f'{file_path}: rs_2axes_py = {r["rs_2axes_py"]} ({len(results) + len(failures)}/{len(case_files)})')
+
+                if len(entries) >= flush_every:
+                    results_sink.add_entries(entries)
+                    entries = []
+
+    finally:
+        # Rows of the completed cases are written even if the batch is interrupted
+        if entries:
+            results_sink.add_entries(entries)
+
+    print(f'Batch completed: {len(results)} cases scored, {len(failures)} failed')
+
+    if profiles:
+        summary: dict = aggregate_profiles(profiles)
+        write_json(summary, os.path.join(profile_dir, 'summary.json'))
+        print_stages(summary['stages'])
+
+    return results, failures
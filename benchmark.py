@@ -0,0 +1,392 @@
+# RS: Benchmark Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+# Notes: Times the helper functions and the end-to-end pipeline on synthetic recordings
+#        (synthetic_data_helper) and compares them against a stored baseline.
+#        Baselines depend on the machine: save one with --save-baseline before comparing.
+#        --validate-compact checks that compact mode scores like the float64 pipeline with half the memory.
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+
+from datetime import datetime
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from acceleration_helper import get_max_accelerations_x, get_max_accelerations_y, get_max_accelerations_z, get_sa_2axes, get_sumua
+from attempt_detection_helper import detect_region_intervals
+from cache_helper import get_case_dir, load_recording
+from derivative_helper import calculate_derivatives, calculate_derivatives_np
+from feature_helper import extract_features
+from file_helper import apply_kalman_filter, apply_moving_average, initial_filter, moving_average, read_csv_file
+from kalman_helper import get_steady_state_bound, kalman_filter
+from numpy.typing import NDArray
+from pipeline_helper import calculate_thresholds, get_parameters, preprocess_signals, run_pipeline
+from region_helper import extract_region_maxima, get_region_maxima
+from synthetic_data_helper import generate_recording, write_case_csv
+from threshold_helper import get_threshold_stats
+
+# Directory of the synthetic case files
+BENCHMARK_DIR: str = '.rs_bench'
+
+BASELINE_FILE: str = 'benchmark_baseline.json'
+RESULTS_FILE: str = 'benchmark_results.json'
+
+# A benchmark regresses when it is slower than the baseline by more than this fraction
+TOLERANCE: float = 0.25
+
+# Recording lengths by label
+DURATIONS: dict[str, float] = {'5m': 300, '1h': 3600, '24h': 86400}
+
+# Largest relative difference allowed between the compact and the float64 scores
+COMPACT_TOLERANCE: float = 1e-3
+
+# Scores compared by validate_compact
+COMPACT_KEYS: list[str] = ['sa_2axes', 'sumua', 'rs_2axes_py']
+
+# Rounding difference allowed by validate_kalman on top of get_steady_state_bound, relative to the range of the data
+KALMAN_ROUNDING: float = 1e-9
+
+def get_benchmarks(case_path: str, recording: dict[str, NDArray], parameters: dict) -> dict[str, Callable]:
+    '''Builds the benchmarked calls for one synthetic case. Inputs of each call are prepared here so only the call itself is timed.
+
+    Args:
+        case_path (str): synthetic case file without the .csv extension
+        recording (dict[str, NDArray]): the recording written to the case file
+        parameters (dict): pipeline parameters
+
+    Returns:
+        dict[str, Callable]: zero-argument callables by benchmark name (module.function)
+    '''
+    p: dict = parameters
+    df: pd.DataFrame = pd.DataFrame({**recording, 'timeStamp': recording['timeStamp'].view('datetime64[ns]')})
+
+    signals: dict[str, NDArray] = preprocess_signals(recording, p)
+    thresholds: dict = calculate_thresholds(signals, p)
+    starts, ends = detect_region_intervals(signals['jerk'], signals['snap'], thresholds['jerk_threshold_cal'], thresholds['snap_threshold_cal'], p['sampling_rate'])
+    roi_values_df: pd.DataFrame = pd.DataFrame({axis: get_region_maxima(signals[axis], starts, ends) for axis in ('Acc_Z', 'Acc_X', 'Acc_Y')})
+    df_kalman: pd.DataFrame = pd.DataFrame({'timeStamp': df['timeStamp'], 'Acc_Z': kalman_filter(recording['Acc_Z'], p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance'])})
+
+    def get_scores() -> float:
+        amax_x: list[float] = get_max_accelerations_x(roi_values_df)
+        amax_y: list[float] = get_max_accelerations_y(roi_values_df)
+        return get_sa_2axes(amax_x, amax_y) + get_sumua(amax_x, amax_y, get_max_accelerations_z(roi_values_df))
+
+    def run_cold() -> dict:
+        shutil.rmtree(get_case_dir(case_path), ignore_errors = True)
+        return run_pipeline(case_path, p, verbose = False)
+
+    return {
+        'file_helper.read_csv_file': lambda: read_csv_file(case_path),
+        'file_helper.initial_filter': lambda: initial_filter(df, p['target_value']),
+        'file_helper.moving_average': lambda: moving_average(recording['Acc_Z'], p['target_moving_avg']),
+        'file_helper.apply_moving_average': lambda: apply_moving_average(df, p['target_moving_avg']),
+        'file_helper.apply_moving_average[threads]': lambda: apply_moving_average(df, p['target_moving_avg'], workers = None),
+        'file_helper.apply_kalman_filter': lambda: apply_kalman_filter(df, p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance']),
+        'file_helper.apply_kalman_filter[threads]': lambda: apply_kalman_filter(df, p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance'], workers = None),
+        'kalman_helper.kalman_filter': lambda: kalman_filter(recording['Acc_Z'], p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance']),
+        'kalman_helper.kalman_filter[steady]': lambda: kalman_filter(recording['Acc_Z'], p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance'], mode = 'steady'),
+        'file_helper.apply_kalman_filter[steady]': lambda: apply_kalman_filter(df, p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance'], mode = 'steady'),
+        'derivative_helper.calculate_derivatives': lambda: calculate_derivatives(df_kalman),
+        'derivative_helper.calculate_derivatives_np': lambda: calculate_derivatives_np(signals['Acc_Z_kalman'], signals['timeStamp']),
+        'derivative_helper.calculate_derivatives_np[central]': lambda: calculate_derivatives_np(signals['Acc_Z_kalman'], signals['timeStamp'], method = 'central'),
+        'derivative_helper.calculate_derivatives_np[savgol]': lambda: calculate_derivatives_np(signals['Acc_Z_kalman'], signals['timeStamp'], method = 'savgol'),
+        'threshold_helper.get_threshold_stats[exact]': lambda: get_threshold_stats(signals['jerk'], p['factor'], p['percentile'], 'exact'),
+        'threshold_helper.get_threshold_stats[streaming]': lambda: get_threshold_stats(signals['jerk'], p['factor'], p['percentile'], 'streaming'),
+        'attempt_detection_helper.detect_region_intervals': lambda: detect_region_intervals(signals['jerk'], signals['snap'], thresholds['jerk_threshold_cal'], thresholds['snap_threshold_cal'], p['sampling_rate']),
+        'region_helper.get_region_maxima': lambda: [get_region_maxima(signals[axis], starts, ends) for axis in ('Acc_Z', 'Acc_X', 'Acc_Y')],
+        'region_helper.extract_region_maxima': lambda: extract_region_maxima(df, starts, ends),
+        'acceleration_helper.scores': get_scores,
+        'feature_helper.extract_features': lambda: extract_features(signals, starts, ends),
+        'cache_helper.load_recording': lambda: load_recording(case_path),
+        'pipeline.run_pipeline[cold]': run_cold,
+        'pipeline.run_pipeline[warm]': lambda: run_pipeline(case_path, p, verbose = False),
+    }
+
+def measure(func: Callable, repeat: int) -> dict:
+    '''Times a call (best of 'repeat' runs, so background noise does not count) and measures its peak
+       traced memory in one extra run (tracemalloc slows the call down, so it is not timed)
+
+    Args:
+        func (Callable): zero-argument callable
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: seconds (best run), mean_seconds and peak_memory_bytes
+    '''
+    times: list[float] = []
+
+    # The progress prints of the helpers are not part of the benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start: float = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        func()
+        peak: int = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'seconds': min(times), 'mean_seconds': float(np.mean(times)), 'peak_memory_bytes': peak}
+
+def get_case(label: str, failed_attempts: int, seed: int, parameters: dict) -> tuple[str, dict[str, NDArray]]:
+    '''Generates a synthetic recording and writes its case file (reused when it already exists)
+
+    Args:
+        label (str): recording length (key of DURATIONS)
+        failed_attempts (int): number of failed attempts
+        seed (int): seed of the generator
+        parameters (dict): pipeline parameters (sampling_rate)
+
+    Returns:
+        tuple[str, dict[str, NDArray]]: case file without the .csv extension and the recording
+    '''
+    recording: dict[str, NDArray] = generate_recording(DURATIONS[label], failed_attempts, parameters['sampling_rate'], seed = seed)
+    case_path: str = os.path.join(BENCHMARK_DIR, f'synthetic_{label}_{failed_attempts}_{seed}')
+
+    if not os.path.exists(case_path + '.csv'):
+        os.makedirs(BENCHMARK_DIR, exist_ok = True)
+        print(f'writing {case_path}.csv...')
+        write_case_csv(case_path, recording)
+
+    return case_path, recording
+
+def run_benchmarks(labels: list[str], repeat: int = 3, only: str | None = None, failed_attempts: int = 3, seed: int = 0) -> dict:
+    '''Runs the benchmarks on synthetic recordings of each length
+
+    Args:
+        labels (list[str]): recording lengths (keys of DURATIONS)
+        repeat (int): number of timed runs per benchmark
+        only (str, optional): runs only the benchmarks whose name contains this text
+        failed_attempts (int): number of failed attempts in the recordings
+        seed (int): seed of the generator
+
+    Returns:
+        dict: machine description and, per 'name@length', the timings, throughput (samples/s) and peak memory
+    '''
+    p: dict = get_parameters()
+    results: dict = {'created': datetime.now().isoformat(timespec = 'seconds'), 'machine': get_machine(), 'benchmarks': {}}
+
+    for label in labels:
+        case_path, recording = get_case(label, failed_attempts, seed, p)
+        samples: int = len(recording['timeStamp'])
+
+        # The pipeline must find every attempt, otherwise the timings are not representative
+        detected: int = run_pipeline(case_path, p, verbose = False)['number_failed_attempts']
+        if detected != failed_attempts:
+            print(f'warning: {detected} failed attempts detected in {case_path} instead of {failed_attempts}')
+
+        for name, func in get_benchmarks(case_path, recording, p).items():
+            if only and only not in name:
+                continue
+
+            result: dict = {'samples': samples, **measure(func, repeat)}
+            result['samples_per_s'] = samples / result['seconds']
+            results['benchmarks'][f'{name}@{label}'] = result
+
+            print(f'{name + "@" + label:<56}{result["seconds"]:>10.4f} s{result["samples_per_s"] / 1e6:>10.1f} M samples/s{result["peak_memory_bytes"] / 1e6:>10.1f} MB')
+
+    return results
+
+def get_pipeline_memory(case_path: str, parameters: dict) -> tuple[dict, int]:
+    '''Runs the pipeline on a cached case and measures its memory: the bytes of the memory-mapped columns
+       plus the peak of the memory allocated while the pipeline runs
+
+    Args:
+        case_path (str): case file without the .csv extension
+        parameters (dict): pipeline parameters
+
+    Returns:
+        tuple[dict, int]: results of run_pipeline and memory in bytes
+    '''
+    # Builds the cache first so parsing the csv file is not measured
+    mapped: int = sum(column.nbytes for column in load_recording(case_path, compact = parameters['compact']).values())
+
+    tracemalloc.start()
+    results: dict = run_pipeline(case_path, parameters, verbose = False)
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return results, mapped + peak
+
+def validate_compact(case_paths: list[str], tolerance: float = COMPACT_TOLERANCE) -> list[str]:
+    '''Scores each case with the float64 pipeline and in compact mode, and compares the scores and the memory used
+
+    Args:
+        case_paths (list[str]): case files without the .csv extension
+        tolerance (float): largest relative difference allowed for each of COMPACT_KEYS
+
+    Returns:
+        list[str]: cases whose compact scores are out of tolerance or whose number of failed attempts differs
+    '''
+    failures: list[str] = []
+
+    for case_path in case_paths:
+        reference, reference_memory = get_pipeline_memory(case_path, get_parameters())
+        compact, compact_memory = get_pipeline_memory(case_path, get_parameters({'compact': True}))
+
+        errors: dict[str, float] = {key: abs(compact[key] - reference[key]) / max(abs(reference[key]), 1e-12) for key in COMPACT_KEYS}
+        passed: bool = compact['number_failed_attempts'] == reference['number_failed_attempts'] and max(errors.values()) <= tolerance
+
+        if not passed:
+            failures.append(case_path)
+
+        print(f'{os.path.basename(case_path):<28}rs {reference["rs_2axes_py"]:>10.6f} -> {compact["rs_2axes_py"]:<10.6f}'
+              f'max error {max(errors.values()):>9.2e}{reference_memory / 1e6:>10.1f} MB -> {compact_memory / 1e6:.1f} MB'
+              f' ({compact_memory / reference_memory:.2f}x){"" if passed else "  FAILED"}')
+
+    return failures
+
+def validate_kalman(case_paths: list[str], repeat: int = 3) -> list[str]:
+    '''Filters the three axes of each case with the exact and the steady Kalman filter modes, and compares
+       their timings and the largest difference between them with kalman_helper.get_steady_state_bound
+
+    Args:
+        case_paths (list[str]): case files without the .csv extension
+        repeat (int): timed runs per mode (the best one is kept)
+
+    Returns:
+        list[str]: cases where the difference exceeds the bound (plus KALMAN_ROUNDING)
+    '''
+    p: dict = get_parameters()
+    variances: tuple[float, float, float] = (p['process_variance'], p['measurement_variance'], p['estimated_measurement_variance'])
+    failures: list[str] = []
+
+    for case_path in case_paths:
+        recording: dict[str, NDArray] = load_recording(case_path)
+        data: NDArray[np.float64] = np.column_stack([recording[axis] for axis in ('Acc_X', 'Acc_Y', 'Acc_Z')])
+
+        exact: dict = measure(lambda: kalman_filter(data, *variances), repeat)
+        steady: dict = measure(lambda: kalman_filter(data, *variances, mode = 'steady'), repeat)
+
+        deviation: float = float(np.max(np.abs(kalman_filter(data, *variances, mode = 'steady') - kalman_filter(data, *variances))))
+        bound: float = get_steady_state_bound(data, *variances)
+        passed: bool = deviation <= bound + KALMAN_ROUNDING * float(np.ptp(data))
+
+        if not passed:
+            failures.append(case_path)
+
+        print(f'{os.path.basename(case_path):<28}{len(data):>10} samples  exact {exact["seconds"]:>8.4f} s  steady {steady["seconds"]:>8.4f} s'
+              f' ({exact["seconds"] / steady["seconds"]:.1f}x)  max deviation {deviation:.2e} (bound {bound:.2e}){"" if passed else "  FAILED"}')
+
+    return failures
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    '''Prints the speed-up of each benchmark over the baseline
+
+    Args:
+        results (dict): output of run_benchmarks
+        baseline (dict): output of run_benchmarks saved as baseline
+        tolerance (float): allowed slowdown (0.25 = 25% slower)
+
+    Returns:
+        list[str]: benchmarks slower than the baseline by more than the tolerance
+    '''
+    if baseline['machine'] != results['machine']:
+        print('warning: the baseline was recorded on a different machine or environment')
+
+    regressions: list[str] = []
+
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+
+        ratio: float = result['seconds'] / baseline['benchmarks'][name]['seconds']
+        memory_ratio: float = result['peak_memory_bytes'] / max(baseline['benchmarks'][name]['peak_memory_bytes'], 1)
+        flag: str = ''
+
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+
+        print(f'{name:<56}{1 / ratio:>8.2f}x speed{memory_ratio:>8.2f}x memory{flag}')
+
+    return regressions
+
+def get_machine() -> dict:
+    '''Describes the machine and the library versions the benchmarks ran with'''
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+def parse_args() -> argparse.Namespace:
+    '''Parses the command line'''
+    parser = argparse.ArgumentParser(description = 'Recovery Score benchmarks on synthetic recordings')
+    parser.add_argument('--sizes', nargs = '+', choices = list(DURATIONS), default = ['5m', '1h'], help = 'recording lengths to benchmark (default: 5m 1h)')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'timed runs per benchmark (the best one is kept)')
+    parser.add_argument('--only', default = None, help = 'runs only the benchmarks whose name contains this text')
+    parser.add_argument('--failed-attempts', type = int, default = 3, help = 'failed attempts in the synthetic recordings')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the synthetic recordings')
+    parser.add_argument('--output', default = RESULTS_FILE, help = f'JSON file for the results (default: {RESULTS_FILE})')
+    parser.add_argument('--baseline', default = BASELINE_FILE, help = f'baseline JSON file (default: {BASELINE_FILE})')
+    parser.add_argument('--save-baseline', action = 'store_true', help = 'stores the results as the new baseline')
+    parser.add_argument('--tolerance', type = float, default = TOLERANCE, help = f'allowed slowdown before a benchmark is flagged (default: {TOLERANCE})')
+    parser.add_argument('--validate-compact', action = 'store_true', help = 'compares the compact mode scores and memory with the float64 pipeline instead of timing')
+    parser.add_argument('--validate-kalman', action = 'store_true', help = 'compares the speed and the estimates of the steady and exact Kalman filter modes instead of timing every benchmark')
+    parser.add_argument('--cases', default = None, help = 'directory or glob pattern of case files for --validate-compact and --validate-kalman (default: the synthetic recordings of --sizes)')
+
+    return parser.parse_args()
+
+if __name__ == '__main__':
+
+    args: argparse.Namespace = parse_args()
+
+    if args.validate_compact or args.validate_kalman:
+        if args.cases:
+            pattern: str = os.path.join(args.cases, '*.csv') if os.path.isdir(args.cases) else args.cases
+            case_paths: list[str] = [path[:-len('.csv')] for path in sorted(glob.glob(pattern))]
+        else:
+            case_paths = [get_case(label, args.failed_attempts, args.seed, get_parameters())[0] for label in args.sizes]
+
+        if args.validate_kalman:
+            failures: list[str] = validate_kalman(case_paths, args.repeat)
+
+            if failures:
+                print(f'{len(failures)} cases where the steady Kalman filter exceeds its bound')
+                sys.exit(1)
+
+        if args.validate_compact:
+            failures = validate_compact(case_paths)
+
+            if failures:
+                print(f'{len(failures)} cases out of tolerance in compact mode')
+                sys.exit(1)
+
+        sys.exit(0)
+
+    results: dict = run_benchmarks(args.sizes, args.repeat, args.only, args.failed_attempts, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent = 2)
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f'baseline saved to {args.baseline}')
+
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions: list[str] = compare_to_baseline(results, json.load(f), args.tolerance)
+
+        if regressions:
+            print(f'{len(regressions)} benchmarks regressed')
+            sys.exit(1)
+
+    else:
+        print(f'no baseline found ({args.baseline}): run with --save-baseline to create one')
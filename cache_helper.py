@@ -0,0 +1,252 @@
+# Recovery Score Calculations: cache_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+from file_helper import add_csv_extension, read_csv_chunks
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Directory where the parsed recordings are stored
+CACHE_DIR: str = '.rs_cache'
+META_FILE: str = 'meta.json'
+DTYPES: dict[str, str] = {'timeStamp': 'int64', 'Acc_X': 'float64', 'Acc_Y': 'float64', 'Acc_Z': 'float64'}
+
+# Compact variant for long recordings: float32 accelerations and int64 millisecond offsets from the first sample
+COMPACT_SUFFIX: str = '_compact'
+COMPACT_DTYPES: dict[str, str] = {'timeStamp': 'int64', 'Acc_X': 'float32', 'Acc_Y': 'float32', 'Acc_Z': 'float32'}
+COMPACT_TIME_UNIT_NS: int = 1_000_000
+
+def load_recording(file_path: str, cache_dir: str = CACHE_DIR, compact: bool = False) -> dict[str, NDArray]:
+    '''Returns the parsed columns of a case as read-only memory-mapped arrays.
+       The csv file is parsed only the first time (or when it changed since the cache was built):
+       later calls memory-map the cached binary columns instead of re-parsing the csv file.
+       Nothing is copied into memory: slices are views of the files, and writing to them raises an error.
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        cache_dir (str): directory where the cache is stored
+        compact (bool): use the compact cache (half the size of the float64 cache, see COMPACT_DTYPES)
+
+    Returns:
+        dict[str, NDArray]: timeStamp (int64 epoch nanoseconds), Acc_X, Acc_Y and Acc_Z (float64).
+        In compact mode timeStamp holds int64 milliseconds from the first sample (see get_time_origin) and the accelerations are float32
+    '''
+    meta: dict = load_meta(file_path, cache_dir, compact)
+    case_dir: str = get_case_dir(file_path, cache_dir, compact)
+
+    rows: int = meta['rows']
+    recording: dict[str, NDArray] = {}
+
+    for column, dtype in meta['dtypes'].items():
+        if rows == 0:
+            recording[column] = np.empty(0, dtype = dtype)
+        else:
+            recording[column] = np.memmap(os.path.join(case_dir, column + '.bin'), dtype = dtype, mode = 'r', shape = (rows,))
+
+    return recording
+
+def load_meta(file_path: str, cache_dir: str = CACHE_DIR, compact: bool = False) -> dict:
+    '''Returns the metadata of the cache of a case, building the cache first if needed
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        cache_dir (str): directory where the cache is stored
+        compact (bool): use the compact cache
+
+    Returns:
+        dict: source key, number of rows, column dtypes and (compact cache only) time origin and unit in nanoseconds
+    '''
+    case_dir: str = get_case_dir(file_path, cache_dir, compact)
+
+    if not is_cache_valid(file_path, case_dir):
+        print('building cache...')
+        build_cache(file_path, case_dir, compact)
+
+    with open(os.path.join(case_dir, META_FILE), encoding = 'utf-8') as meta_file:
+        meta: dict = json.load(meta_file)
+
+    return meta
+
+def get_time_origin(file_path: str, cache_dir: str = CACHE_DIR) -> int:
+    '''Returns the timestamp of the first sample of a case (the origin of the compact timeStamp offsets)
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        cache_dir (str): directory where the cache is stored
+
+    Returns:
+        int: epoch nanoseconds of the first sample
+    '''
+    return load_meta(file_path, cache_dir, compact = True)['time_origin_ns']
+
+def read_cached_csv_file(file_path: str, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    '''Same contract as file_helper.read_csv_file, but backed by the binary cache (the columns are not copied)
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        cache_dir (str): directory where the cache is stored
+
+    Returns:
+        Pandas DataFrame
+    '''
+    import pandas as pd
+
+    try:
+        recording: dict[str, NDArray] = load_recording(file_path, cache_dir)
+
+        df: pd.DataFrame = pd.DataFrame({
+            'timeStamp': recording['timeStamp'].view('datetime64[ns]'),
+            'Acc_X': recording['Acc_X'],
+            'Acc_Y': recording['Acc_Y'],
+            'Acc_Z': recording['Acc_Z'],
+        }, copy = False) # columns stay memory-mapped (read-only)
+
+        return df
+
+    except Exception as e:
+
+        print('An error occurred:', str(e))
+
+        return pd.DataFrame()
+
+def get_case_dir(file_path: str, cache_dir: str = CACHE_DIR, compact: bool = False) -> str:
+    '''Returns the cache directory of a case (one directory per case file and format). The name is the case number
+       followed by a short hash of the absolute path, so cases with the same number in different directories
+       never share a directory
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        cache_dir (str): directory where the cache is stored
+        compact (bool): directory of the compact cache
+
+    Returns:
+        str: path to the case directory (<case number>_<hash>, plus COMPACT_SUFFIX)
+    '''
+    case_path: str = file_path.replace('.csv', '')
+    path_hash: str = hashlib.sha256(os.path.abspath(case_path).encode('utf-8')).hexdigest()[:12]
+    case_number: str = f'{os.path.basename(case_path)}_{path_hash}'
+
+    if compact:
+        case_number += COMPACT_SUFFIX
+
+    return os.path.join(cache_dir, case_number)
+
+def get_source_key(file_path: str) -> dict:
+    '''Identifies the source csv file by its path, size and modification time
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+
+    Returns:
+        dict: source path, size in bytes and mtime in nanoseconds
+    '''
+    file_path_csv: str = add_csv_extension(file_path)
+    stat: os.stat_result = os.stat(file_path_csv)
+
+    return {'source': os.path.abspath(file_path_csv), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def is_cache_valid(file_path: str, case_dir: str) -> bool:
+    '''Checks whether the cache of a case exists and was built from the current version of the csv file
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        case_dir (str): cache directory of the case
+
+    Returns:
+        bool: True if the cache can be used
+    '''
+    try:
+        with open(os.path.join(case_dir, META_FILE), encoding = 'utf-8') as meta_file:
+            meta: dict = json.load(meta_file)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+    return meta.get('key') == get_source_key(file_path)
+
+def build_cache(file_path: str, case_dir: str, compact: bool = False) -> None:
+    '''Parses the csv file chunk by chunk and writes each column as a contiguous binary file.
+       The cache is written to a temporary directory first and moved into place when complete,
+       so an interrupted run never leaves a partial cache behind.
+
+    Args:
+        file_path (str): case number (file_name) entered by user
+        case_dir (str): cache directory of the case
+        compact (bool): write float32 accelerations and millisecond offsets (COMPACT_DTYPES)
+    '''
+    key: dict = get_source_key(file_path)
+    dtypes: dict[str, str] = COMPACT_DTYPES if compact else DTYPES
+    time_origin: int | None = None
+    parent_dir: str = os.path.dirname(case_dir) or '.'
+    os.makedirs(parent_dir, exist_ok = True)
+    tmp_dir: str = tempfile.mkdtemp(dir = parent_dir, prefix = '.tmp_')
+
+    try:
+        rows: int = 0
+        column_files: dict = {column: open(os.path.join(tmp_dir, column + '.bin'), 'wb') for column in dtypes}
+
+        try:
+            for chunk in read_csv_chunks(file_path):
+                for column, dtype in dtypes.items():
+                    values: NDArray = chunk[column].to_numpy(dtype = dtype)
+
+                    if compact and column == 'timeStamp' and len(values) > 0:
+                        if time_origin is None:
+                            time_origin = int(values[0])
+                        values = (values - time_origin) // COMPACT_TIME_UNIT_NS
+
+                    np.ascontiguousarray(values).tofile(column_files[column])
+                rows += len(chunk)
+
+        finally:
+            for column_file in column_files.values():
+                column_file.close()
+
+        with open(os.path.join(tmp_dir, META_FILE), 'w', encoding = 'utf-8') as meta_file:
+            meta: dict = {'key': key, 'rows': rows, 'dtypes': dtypes}
+
+            if compact:
+                meta['time_origin_ns'] = time_origin or 0
+                meta['time_unit_ns'] = COMPACT_TIME_UNIT_NS
+
+            json.dump(meta, meta_file)
+
+        for attempt in range(2):
+            try:
+                os.replace(tmp_dir, case_dir)
+                break
+
+            except OSError:
+                # Another process stored the same case first (its entry is identical)
+                if is_cache_valid(file_path, case_dir):
+                    shutil.rmtree(tmp_dir, ignore_errors = True)
+                    break
+
+                if attempt == 1:
+                    raise
+
+                # Stale cache of the same case: renamed before it is deleted, so it disappears at once for the other processes
+                stale_dir: str = os.path.join(parent_dir, f'.del_{uuid.uuid4().hex}')
+                try:
+                    os.rename(case_dir, stale_dir)
+                except FileNotFoundError:
+                    pass # removed by another process
+                shutil.rmtree(stale_dir, ignore_errors = True)
+
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors = True)
+        raise
@@ -1,12 +1,27 @@
 # Recovery Score Calculations: Derivativet helper
 # Script created  11/7/2024
-# Last revision 12/13/2024
+# Last revision 10/18/2026
 
 import numpy as np
 
 from numpy.typing import NDArray
 from typing import Tuple
 
+# Largest deviation of a sampling interval from the nominal one, as a fraction of it, still treated as uniform sampling (jitter)
+JITTER_TOLERANCE: float = 0.01
+
+# Above this fraction of irregular intervals the elementwise path is used for the whole signal
+MAX_IRREGULAR_FRACTION: float = 0.01
+
+# Number of intervals checked at once by get_sampling_intervals
+CHUNK_SIZE: int = 65_536
+
+DERIVATIVE_METHODS: tuple[str, ...] = ('forward', 'central', 'savgol')
+
+# Savitzky-Golay window (samples) and polynomial order (11 samples is 55 ms at 200 Hz)
+SAVGOL_WINDOW: int = 11
+SAVGOL_POLYORDER: int = 3
+
 def calculate_derivatives(df) -> Tuple:
     '''Converts pandas DataFrame to a NumPy array and then calculates the first (jerk) and second derivatives (snap) of the acceleration data
 
@@ -19,43 +34,242 @@ def calculate_derivatives(df) -> Tuple:
     # Converts to a numpy array for derivative calculations
     acc_z_np, time_stamp_np = convert_to_np(df)
     print('Data converted to numpy array successfully')
-    
-    # Calculates time differences
-    dt: NDArray[np.float64] = np.diff(time_stamp_np)  
-    
-    # Handles potential division by zero in dt
-    if np.any(dt <= 0):
-        raise ValueError('Timestamps must be strictly increasing')
-    
+
+    return calculate_derivatives_np(acc_z_np, time_stamp_np)
+
+def calculate_derivatives_np(acc_z: NDArray[np.float64], time_stamp: NDArray, time_unit: float = 1.0, dtype = np.float64, method: str = 'forward', tolerance: float = JITTER_TOLERANCE, window: int = SAVGOL_WINDOW, polyorder: int = SAVGOL_POLYORDER) -> Tuple:
+    '''Calculates the first (jerk) and second derivatives (snap) of the acceleration data from NumPy arrays.
+       The inputs are only read (views and np.memmap arrays are fine); jerk and snap are new arrays.
+       When the sampling is uniform (every interval within 'tolerance' of the nominal one, see get_sampling_intervals)
+       the derivatives are computed with a scalar dt in place, and only the samples next to irregular intervals (gaps)
+       are fixed up with their actual intervals. Otherwise every interval is used (elementwise path).
+
+    Args:
+    acc_z (NDArray[np.float64]): Acc_Z values
+    time_stamp (NDArray): timeStamp values (int64 epoch nanoseconds or float64)
+    time_unit (float): duration of one timeStamp unit in the unit used for the derivatives. With the default (1.0)
+                       jerk and snap are per nanosecond; with ms offsets and time_unit = 1e-3 they are per second (m/s^3 and m/s^4)
+    dtype: dtype of jerk and snap (np.float32 in compact mode)
+    method (str): 'forward' (differences of consecutive samples: jerk has one value less than acc_z and snap two),
+                  'central' (central differences: jerk and snap both start at sample 1 and have two values less than acc_z) or
+                  'savgol' (Savitzky-Golay smoothed derivatives: jerk and snap both start at sample window // 2 and have
+                  window - 1 values less than acc_z). See get_derivative_offset
+    tolerance (float): largest deviation of an interval from the nominal one, as a fraction of it, treated as jitter
+    window (int): window length of the Savitzky-Golay filter (odd number of samples)
+    polyorder (int): order of the polynomial fitted by the Savitzky-Golay filter (2 or more and less than window)
+
+    Returns:
+        Tuple[NDArray[np.float64], NDArray[np.float64]]: A tuple containing the jerk and snap arrays
+    '''
+    offset: int = get_derivative_offset(method, window)
+    n: int = len(acc_z)
+
+    if n < max(2, 2 * offset + 1):
+        return np.array([], dtype=dtype), np.array([], dtype=dtype)  # Return empty arrays if input is too short
+
+    nominal, irregular = get_sampling_intervals(time_stamp, tolerance)
+
+    if nominal is None:
+        # Too many irregular intervals for the fast path: every interval is used
+        if method == 'forward':
+            return _forward_derivatives(acc_z, time_stamp, time_unit, dtype)
+
+        return _central_derivatives(acc_z, time_stamp, np.arange(offset, n - offset), time_unit, dtype)
+
+    dt: float = nominal * time_unit
+
+    if method == 'forward':
+        # Calculates first derivative (jerk) and second derivative (snap) with a scalar dt, in place
+        jerk: NDArray[np.float64] = np.subtract(acc_z[1:], acc_z[:-1], dtype=dtype)
+        np.divide(jerk, dtype(dt), out=jerk)
+        snap: NDArray[np.float64] = np.diff(jerk)
+        np.divide(snap, dtype(dt), out=snap)
+
+        if len(irregular) > 0:
+            # jerk[k] spans the irregular interval k; snap[k - 1] divides by it and snap[k] uses jerk[k]
+            jerk[irregular] = (acc_z[irregular + 1] - acc_z[irregular]).astype(dtype) / _get_intervals(time_stamp, irregular, time_unit, dtype)
+            fixed: NDArray[np.int64] = np.unique(np.concatenate([irregular - 1, irregular]))
+            fixed = fixed[(fixed >= 0) & (fixed < len(snap))]
+            snap[fixed] = (jerk[fixed + 1] - jerk[fixed]) / _get_intervals(time_stamp, fixed + 1, time_unit, dtype)
+
+        return jerk, snap
+
+    if method == 'central':
+        jerk = np.subtract(acc_z[2:], acc_z[:-2], dtype=dtype)
+        np.divide(jerk, dtype(2 * dt), out=jerk)
+
+        # a[i + 1] - 2 * a[i] + a[i - 1], accumulated in place
+        snap = np.subtract(acc_z[2:], acc_z[1:-1], dtype=dtype)
+        np.subtract(snap, acc_z[1:-1], out=snap, casting='unsafe')
+        np.add(snap, acc_z[:-2], out=snap, casting='unsafe')
+        np.divide(snap, dtype(dt * dt), out=snap)
+
+    else:
+        jerk_coefficients, snap_coefficients = get_savgol_coefficients(window, polyorder)
+        acc_z_np: NDArray[np.float64] = np.asarray(acc_z, dtype=dtype)
+
+        jerk = np.correlate(acc_z_np, jerk_coefficients.astype(dtype), 'valid')
+        np.divide(jerk, dtype(dt), out=jerk)
+        snap = np.correlate(acc_z_np, snap_coefficients.astype(dtype), 'valid')
+        np.divide(snap, dtype(dt * dt), out=snap)
+
+    if len(irregular) > 0:
+        # Outputs whose stencil spans an irregular interval k use the non-uniform central difference at their sample
+        # (the output at index i is centered on sample i + offset and spans the intervals i to i + 2 * offset - 1)
+        spans: NDArray[np.int64] = np.arange(-2 * offset + 1, 1)
+        fixed = np.unique((irregular[:, np.newaxis] + spans).ravel())
+        fixed = fixed[(fixed >= 0) & (fixed < len(jerk))]
+        jerk[fixed], snap[fixed] = _central_derivatives(acc_z, time_stamp, fixed + offset, time_unit, dtype)
+
+    return jerk, snap
+
+def get_derivative_offset(method: str, window: int = SAVGOL_WINDOW) -> int:
+    '''Returns the sample on which the first jerk and snap values of a method are centered.
+       Slicing the signals from this sample on aligns them with jerk and snap.
+
+    Args:
+        method (str): one of DERIVATIVE_METHODS
+        window (int): window length of the Savitzky-Golay filter
+
+    Returns:
+        int: 0 for 'forward', 1 for 'central' and window // 2 for 'savgol'
+    '''
+    if method == 'forward':
+        return 0
+
+    if method == 'central':
+        return 1
+
+    if method == 'savgol':
+        if window < 3 or window % 2 == 0:
+            raise ValueError(f'The Savitzky-Golay window must be an odd number of samples (3 or more), not {window}')
+
+        return window // 2
+
+    raise ValueError(f'Unknown derivative method: {method} (expected one of {DERIVATIVE_METHODS})')
+
+def get_sampling_intervals(time_stamp: NDArray, tolerance: float = JITTER_TOLERANCE, chunk_size: int = CHUNK_SIZE) -> Tuple:
+    '''Checks whether the timestamps are uniformly sampled. The nominal interval is the median interval of the first chunk;
+       an interval deviating from it by more than 'tolerance' (fraction of the nominal interval) is irregular (a gap or a
+       dropout). The intervals are checked chunk by chunk, so no full-length temporary array is allocated.
+
+    Args:
+        time_stamp (NDArray): timeStamp values (int64 epoch nanoseconds or float64)
+        tolerance (float): largest deviation from the nominal interval treated as jitter
+        chunk_size (int): number of intervals checked at once
+
+    Returns:
+        Tuple[float | None, NDArray[np.int64]]: nominal interval (in timeStamp units) and index k of each irregular interval
+        (between samples k and k + 1). The nominal interval is None when more than MAX_IRREGULAR_FRACTION of the
+        intervals are irregular
+    '''
+    n_intervals: int = len(time_stamp) - 1
+    nominal: float = float(np.median(np.diff(time_stamp[:chunk_size + 1])))
+    irregular: list[NDArray[np.int64]] = []
+    count: int = 0
+
+    for start in range(0, n_intervals, chunk_size):
+        intervals: NDArray = np.diff(time_stamp[start:start + chunk_size + 1])
+
+        # Handles potential division by zero in dt
+        if np.any(intervals <= 0):
+            raise ValueError('Timestamps must be strictly increasing')
+
+        chunk_irregular: NDArray[np.int64] = np.flatnonzero(np.abs(intervals - nominal) > tolerance * nominal) + start
+        irregular.append(chunk_irregular)
+        count += len(chunk_irregular)
+
+        if count > MAX_IRREGULAR_FRACTION * n_intervals:
+            return None, np.empty(0, dtype=np.int64)
+
+    return nominal, np.concatenate(irregular) if irregular else np.empty(0, dtype=np.int64)
+
+def get_savgol_coefficients(window: int = SAVGOL_WINDOW, polyorder: int = SAVGOL_POLYORDER) -> Tuple:
+    '''Calculates the Savitzky-Golay coefficients of the first and second derivatives at the center of the window
+       (least-squares fit of a polynomial to the window, solved with the pseudo-inverse of its Vandermonde matrix)
+
+    Args:
+        window (int): odd number of samples of the window
+        polyorder (int): order of the fitted polynomial (2 or more and less than window)
+
+    Returns:
+        Tuple[NDArray[np.float64], NDArray[np.float64]]: coefficients of the first and second derivatives for a unit sampling
+        interval, in window order (for np.correlate)
+    '''
+    half: int = get_derivative_offset('savgol', window)
+
+    if not 2 <= polyorder < window:
+        raise ValueError(f'The Savitzky-Golay polyorder must be 2 or more and less than the window ({window}), not {polyorder}')
+
+    positions: NDArray[np.float64] = np.arange(-half, half + 1, dtype=np.float64)
+    fit: NDArray[np.float64] = np.linalg.pinv(np.vander(positions, polyorder + 1, increasing=True))
+
+    # The fitted polynomial is sum(c[k] * x ** k): its derivatives at x = 0 are c[1] and 2 * c[2]
+    return fit[1], 2 * fit[2]
+
+def _get_intervals(time_stamp: NDArray, indices: NDArray[np.int64], time_unit: float, dtype) -> NDArray[np.float64]:
+    '''Intervals between samples k and k + 1 for each index k, in the unit of the derivatives'''
+    return (time_stamp[indices + 1] - time_stamp[indices]).astype(dtype) * dtype(time_unit)
+
+def _forward_derivatives(acc_z: NDArray[np.float64], time_stamp: NDArray, time_unit: float, dtype) -> Tuple:
+    '''Forward differences with the actual interval of every sample (elementwise path)'''
+    # Calculates time differences (in the input dtype first so int64 timestamps keep full precision)
+    dt: NDArray[np.float64] = np.diff(time_stamp).astype(dtype)
+    if time_unit != 1.0:
+        dt *= dtype(time_unit)
+
     # Calculates first derivative (jerk)
-    jerk: NDArray[np.float64] = np.diff(acc_z_np) / dt
-    
+    jerk: NDArray[np.float64] = np.diff(acc_z).astype(dtype, copy=False) / dt
+
     # Calculates second derivative (snap)
     snap: NDArray[np.float64] = np.diff(jerk) / dt[1:]  # Corrected to use dt[1:] to match the length
-    
-    #print(f'jerk length is {len(jerk)}')
-    #print(f'snap length is {len(snap)}')
-    
+
     # Checks lengths of arrays
     if len(jerk) != (len(snap) + 1):
         raise ValueError('The "jerk" and "snap" arrays must have the correct lengths')
-    
-    if len(jerk) == 0:
-        return np.array([], dtype=np.float64), np.array([], dtype=np.float64)  # Return empty arrays if input is empty
+
+    return jerk, snap
+
+def _central_derivatives(acc_z: NDArray[np.float64], time_stamp: NDArray, samples: NDArray[np.int64], time_unit: float, dtype) -> Tuple:
+    '''Central differences on a non-uniform grid (the second order Lagrange derivatives) at the given samples
+
+    Args:
+        acc_z (NDArray[np.float64]): Acc_Z values
+        time_stamp (NDArray): timeStamp values
+        samples (NDArray[np.int64]): samples to differentiate (1 to len(acc_z) - 2)
+        time_unit (float): duration of one timeStamp unit
+        dtype: dtype of the result
+
+    Returns:
+        Tuple[NDArray[np.float64], NDArray[np.float64]]: jerk and snap at each sample
+    '''
+    h1: NDArray[np.float64] = _get_intervals(time_stamp, samples - 1, time_unit, dtype)
+    h2: NDArray[np.float64] = _get_intervals(time_stamp, samples, time_unit, dtype)
+    slope1: NDArray[np.float64] = (acc_z[samples] - acc_z[samples - 1]).astype(dtype) / h1
+    slope2: NDArray[np.float64] = (acc_z[samples + 1] - acc_z[samples]).astype(dtype) / h2
+
+    jerk: NDArray[np.float64] = (slope1 * h2 + slope2 * h1) / (h1 + h2)
+    snap: NDArray[np.float64] = 2 * (slope2 - slope1) / (h1 + h2)
 
     return jerk, snap
 
 def convert_to_np(df_avg) -> Tuple:
-    '''Converts pandas DataFrame to a tuple of NumPy arrays
+    '''Converts pandas DataFrame to a tuple of NumPy arrays without copying the columns when possible:
+       a float64 Acc_Z column is returned as a view, and a datetime64[ns] timeStamp as an int64 view
+       (other datetime units are converted to nanoseconds, which copies)
     
     Args:
         df_avg (pd.DataFrame): DataFrame with acceleration (Acc_Z)) and TimeStamp values
     Returns:
-        Tuple[NDArray[np.float64], NDArray[np.float64]]: Tuple of numpy arrays with acceleration and timestamp values
+        Tuple[NDArray[np.float64], NDArray]: acceleration (float64) and timestamp (int64 epoch nanoseconds, or the numeric timeStamp values) arrays
     '''
     # Converts Acc_Z and time_stamp to numpy arrays
-    acc_z_np: NDArray = np.array(df_avg['Acc_Z'], dtype=np.float64)
-    time_stamp_np: NDArray = np.array(df_avg['timeStamp'], dtype=np.float64)
+    acc_z_np: NDArray[np.float64] = df_avg['Acc_Z'].to_numpy(dtype = np.float64)
+    time_stamp_np: NDArray = df_avg['timeStamp'].to_numpy()
+
+    # int64 nanoseconds keep the full precision of the timestamps (float64 rounds them to ~256 ns)
+    if np.issubdtype(time_stamp_np.dtype, np.datetime64):
+        time_stamp_np = time_stamp_np.astype('datetime64[ns]', copy = False).view(np.int64)
           
     return acc_z_np, time_stamp_np
 
@@ -0,0 +1,186 @@
+# Recovery Score Calculations: export_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+from __future__ import annotations
+
+import os
+import urllib.parse
+
+import numpy as np
+
+from cache_helper import COMPACT_TIME_UNIT_NS
+from feature_helper import get_time_units
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+# Tables of an export directory: <export_dir>/<table>/case=<case>/part-0.parquet (hive partitioning by case)
+EXPORT_TABLES: tuple[str, ...] = ('signals', 'attempts', 'results')
+
+# Signals written by export_case, in this order (jerk in m/s^3 and snap in m/s^4 in both modes)
+SIGNAL_COLUMNS: list[str] = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z', 'Acc_Z_kalman', 'jerk', 'snap', 'segment', 'attempt']
+
+COMPRESSION: str = 'zstd'
+
+# Rows per row group: each row group keeps min/max statistics, so filters on timeStamp skip the others
+ROW_GROUP_SIZE: int = 1_000_000
+
+def import_pyarrow():
+    '''Imports pyarrow and pyarrow.parquet, which are only needed by the export (pip install pyarrow)'''
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('The Parquet export requires pyarrow (pip install pyarrow)') from e
+
+    return pyarrow
+
+def get_partition_dir(export_dir: str, table: str, case: str) -> str:
+    '''Directory of the partition of a case in one of the EXPORT_TABLES
+
+    Args:
+        export_dir (str): export directory
+        table (str): one of EXPORT_TABLES
+        case (str): case number (file_name, with or without its directory)
+
+    Returns:
+        str: <export_dir>/<table>/case=<case> (the case name URI-encoded, as expected by hive partitioning)
+    '''
+    return os.path.join(export_dir, table, 'case=' + urllib.parse.quote(os.path.basename(case), safe = ''))
+
+def export_case(export_dir: str, case: str, signals: dict[str, NDArray], results: dict, compact: bool = False, time_origin: int = 0) -> dict[str, str]:
+    '''Writes the signals, the per-attempt features and the results of one case to compressed Parquet files,
+       one partition per case in each table (a new export of the case replaces its partitions).
+       The signals are written in row groups of ROW_GROUP_SIZE rows, so only one row group is converted at a time.
+
+       signals: SIGNAL_COLUMNS, timeStamp as timestamp[ns], floats as float64, segment (index of the segment of a
+                split recording, 0 otherwise) and attempt (index of the attempt of each region sample, -1 outside the regions)
+       attempts: the feature_helper.FEATURE_COLUMNS (region_start and region_end index the signals table of the case)
+       results: one row with the results (see pipeline_helper.RESULT_KEYS) and compact
+
+    Args:
+        export_dir (str): export directory
+        case (str): case number (file_name)
+        signals (dict[str, NDArray]): output of pipeline_helper.preprocess_signals
+        results (dict): output of pipeline_helper.score_signals with features
+        compact (bool): the signals come from the compact mode (timeStamp in milliseconds from time_origin, jerk and snap per second)
+        time_origin (int): timestamp in nanoseconds the compact timeStamp offsets refer to (see cache_helper.get_time_origin)
+
+    Returns:
+        dict[str, str]: path of the file written in each table
+    '''
+    pa = import_pyarrow()
+
+    paths: dict[str, str] = {}
+
+    schema: pa.Schema = pa.schema([('timeStamp', pa.timestamp('ns'))] + [(column, pa.float64()) for column in SIGNAL_COLUMNS[1:7]] + [('segment', pa.int32()), ('attempt', pa.int32())])
+    paths['signals'] = write_parquet(_signal_batches(signals, results, compact, time_origin, pa), schema, get_partition_dir(export_dir, 'signals', case))
+
+    attempts: pa.Table = pa.table({column: np.asarray(values) for column, values in results['features'].items()})
+    paths['attempts'] = write_parquet([attempts], attempts.schema, get_partition_dir(export_dir, 'attempts', case))
+
+    summary: dict = {key: [value] for key, value in results.items() if np.isscalar(value)}
+    summary['compact'] = [compact]
+    table: pa.Table = pa.table(summary)
+    paths['results'] = write_parquet([table], table.schema, get_partition_dir(export_dir, 'results', case))
+
+    return paths
+
+def write_parquet(tables, schema: pa.Schema, partition_dir: str) -> str:
+    '''Writes tables (an iterable of pyarrow Tables with the same schema) to <partition_dir>/part-0.parquet.
+       The file is written under a temporary name and renamed when complete, so readers never see a partial file
+       (dataset discovery ignores names starting with '.').
+
+    Args:
+        tables: pyarrow Tables written one after the other (one row group per ROW_GROUP_SIZE rows)
+        schema (pa.Schema): schema of the file
+        partition_dir (str): partition directory
+
+    Returns:
+        str: path of the file
+    '''
+    pa = import_pyarrow()
+
+    os.makedirs(partition_dir, exist_ok = True)
+    path: str = os.path.join(partition_dir, 'part-0.parquet')
+    temporary_path: str = os.path.join(partition_dir, f'.part-0.parquet.{os.getpid()}')
+
+    try:
+        with pa.parquet.ParquetWriter(temporary_path, schema, compression = COMPRESSION) as writer:
+            for table in tables:
+                writer.write_table(table, row_group_size = ROW_GROUP_SIZE)
+        os.replace(temporary_path, path)
+
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return path
+
+def _signal_batches(signals: dict[str, NDArray], results: dict, compact: bool, time_origin: int, pa) -> Iterator[pa.Table]:
+    '''Yields the signals table of export_case, ROW_GROUP_SIZE rows at a time'''
+    _, derivative_unit = get_time_units(compact)
+
+    # The arrays are aligned on their first sample; the last jerk and snap values may be missing
+    n: int = min(len(signals[column]) for column in SIGNAL_COLUMNS[:7])
+
+    segment_starts: NDArray[np.int64] = signals.get('segment_starts', np.zeros(1, dtype = np.int64))
+    region_starts: NDArray[np.int64] = np.asarray(results['region_starts'], dtype = np.int64)
+    region_ends: NDArray[np.int64] = np.asarray(results['region_ends'], dtype = np.int64)
+
+    for start in range(0, max(n, 1), ROW_GROUP_SIZE):
+        end: int = min(start + ROW_GROUP_SIZE, n)
+        rows: NDArray[np.int64] = np.arange(start, end, dtype = np.int64)
+
+        time_stamp: NDArray[np.int64] = np.asarray(signals['timeStamp'][start:end], dtype = np.int64)
+        if compact:
+            time_stamp = time_origin + time_stamp * COMPACT_TIME_UNIT_NS
+
+        # Attempt of each row: the last region starting at or before it, if the row is before its end
+        region: NDArray[np.int64] = np.searchsorted(region_starts, rows, side = 'right') - 1
+        inside: NDArray[np.bool_] = (region >= 0) & (rows < region_ends[np.maximum(region, 0)]) if len(region_starts) else np.zeros(len(rows), dtype = bool)
+
+        yield pa.table({
+            'timeStamp': pa.array(time_stamp.view('datetime64[ns]')),
+            **{column: np.asarray(signals[column][start:end], dtype = np.float64) for column in ('Acc_X', 'Acc_Y', 'Acc_Z', 'Acc_Z_kalman')},
+            'jerk': np.asarray(signals['jerk'][start:end], dtype = np.float64) / derivative_unit,
+            'snap': np.asarray(signals['snap'][start:end], dtype = np.float64) / derivative_unit ** 2,
+            'segment': (np.searchsorted(segment_starts, rows, side = 'right') - 1).astype(np.int32),
+            'attempt': np.where(inside, region, -1).astype(np.int32),
+        })
+
+def load_export(export_dir: str, table: str, cases: list[str] | None = None, columns: list[str] | None = None, filter = None) -> pd.DataFrame:
+    '''Loads one table of an export directory. Only the requested columns are read, and only from the partitions of the
+       requested cases and the row groups that can match the filter (predicate pushdown on the Parquet statistics).
+
+    Args:
+        export_dir (str): export directory
+        table (str): one of EXPORT_TABLES
+        cases (list[str], optional): cases to load (all by default)
+        columns (list[str], optional): columns to load (all by default, plus 'case')
+        filter (pyarrow.compute.Expression, optional): row filter, e.g. pyarrow.dataset.field('attempt') >= 0
+
+    Returns:
+        pd.DataFrame: rows of the requested cases, with a 'case' column
+    '''
+    pa = import_pyarrow()
+    import pyarrow.dataset as ds
+
+    if table not in EXPORT_TABLES:
+        raise ValueError(f'Unknown table {table!r} (expected one of {EXPORT_TABLES})')
+
+    partitioning = ds.partitioning(pa.schema([('case', pa.string())]), flavor = 'hive')
+    dataset = ds.dataset(os.path.join(export_dir, table), format = 'parquet', partitioning = partitioning)
+
+    if cases is not None:
+        case_filter = ds.field('case').isin([os.path.basename(case) for case in cases])
+        filter = case_filter if filter is None else case_filter & filter
+
+    if columns is not None and 'case' not in columns:
+        columns = ['case'] + list(columns)
+
+    return dataset.to_table(columns = columns, filter = filter).to_pandas()
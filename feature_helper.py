@@ -0,0 +1,155 @@
+# Recovery Score Calculations: feature_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+
+from attempt_detection_helper import intervals_to_indices
+from cache_helper import COMPACT_TIME_UNIT_NS
+from numpy.typing import NDArray
+from region_helper import get_region_maxima
+
+# Columns of the feature table, one row per attempt (the last attempt of a case is the successful one)
+FEATURE_COLUMNS: list[str] = [
+    'attempt', 'successful', 'region_start', 'region_end', 'start_time', 'duration',
+    'peak_resultant', 'peak_x', 'peak_y', 'peak_z', 'auc_x', 'auc_y', 'auc_z', 'peak_jerk', 'time_to_peak',
+]
+
+# Seconds per timeStamp unit (nanoseconds)
+NS_TIME_UNIT: float = 1e-9
+
+def get_time_units(compact: bool = False) -> tuple[float, float]:
+    '''Returns the units of the pipeline signals: timeStamp is in nanoseconds (milliseconds in compact mode)
+       and jerk and snap are per nanosecond (per second in compact mode)
+
+    Args:
+        compact (bool): compact mode (see pipeline_helper.DEFAULT_PARAMETERS)
+
+    Returns:
+        tuple[float, float]: seconds per timeStamp unit and seconds per time unit of jerk and snap
+    '''
+    if compact:
+        return COMPACT_TIME_UNIT_NS * NS_TIME_UNIT, 1.0
+
+    return NS_TIME_UNIT, NS_TIME_UNIT
+
+def extract_features(signals: dict[str, NDArray], region_starts: NDArray[np.int64], region_ends: NDArray[np.int64], time_unit: float = NS_TIME_UNIT, derivative_unit: float = NS_TIME_UNIT) -> dict[str, NDArray]:
+    '''Per-attempt features of the detected regions. The samples of all the regions are gathered once
+       and every feature is a single vectorized reduction over them (np.ufunc.reduceat), so the cost
+       depends on the number of region samples only, not on the length of the recording.
+
+       start_time, duration, time_to_peak: seconds (from the first sample of the signals, and of the region)
+       peak_resultant: max sqrt(Acc_X ** 2 + Acc_Y ** 2 + Acc_Z ** 2) within the region
+       peak_x, peak_y, peak_z: max absolute acceleration on each axis (the values used by the recovery score)
+       auc_x, auc_y, auc_z: trapezoidal integral of the acceleration over the region (impulse per unit mass, m/s)
+       peak_jerk: max absolute jerk in m/s^3
+       time_to_peak: time from the start of the region to the first sample of peak_resultant
+
+    Args:
+        signals (dict[str, NDArray]): output of pipeline_helper.preprocess_signals (timeStamp, Acc_X, Acc_Y, Acc_Z and jerk)
+        region_starts (NDArray[np.int64]): start index (inclusive) of each region, sorted and non-overlapping
+        region_ends (NDArray[np.int64]): end index (exclusive) of each region
+        time_unit (float): seconds per timeStamp unit (see get_time_units)
+        derivative_unit (float): seconds per time unit of the jerk (see get_time_units)
+
+    Returns:
+        dict[str, NDArray]: one array per FEATURE_COLUMNS column, one value per region
+    '''
+    region_starts = np.asarray(region_starts, dtype = np.int64)
+    region_ends = np.asarray(region_ends, dtype = np.int64)
+    lengths: NDArray[np.int64] = region_ends - region_starts
+
+    features: dict[str, NDArray] = {
+        'attempt': np.arange(len(region_starts), dtype = np.int64),
+        'successful': np.arange(len(region_starts)) == len(region_starts) - 1,
+        'region_start': region_starts,
+        'region_end': region_ends,
+    }
+
+    if len(region_starts) == 0:
+        features.update({column: np.empty(0, dtype = np.float64) for column in FEATURE_COLUMNS[4:]})
+        return features
+
+    # Position of the first sample of each region among the gathered samples
+    offsets: NDArray[np.int64] = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    last: NDArray[np.int64] = offsets + lengths - 1
+    samples: NDArray[np.int64] = intervals_to_indices(region_starts, region_ends)
+
+    # Seconds from the start of each region
+    time_stamp: NDArray = signals['timeStamp']
+    time: NDArray[np.float64] = (time_stamp[samples] - np.repeat(time_stamp[region_starts], lengths)) * time_unit
+    features['start_time'] = (time_stamp[region_starts] - time_stamp[0]) * time_unit
+    features['duration'] = time[last]
+
+    acc: dict[str, NDArray[np.float64]] = {axis: np.asarray(signals[axis][samples], dtype = np.float64) for axis in ('Acc_X', 'Acc_Y', 'Acc_Z')}
+
+    resultant: NDArray[np.float64] = np.sqrt(acc['Acc_X'] ** 2 + acc['Acc_Y'] ** 2 + acc['Acc_Z'] ** 2)
+    features['peak_resultant'] = np.maximum.reduceat(resultant, offsets)
+
+    for axis, name in (('Acc_X', 'x'), ('Acc_Y', 'y'), ('Acc_Z', 'z')):
+        features[f'peak_{name}'] = get_region_maxima(signals[axis], region_starts, region_ends)
+
+    # Trapezoids between consecutive samples of the same region (none after the last sample of a region)
+    widths: NDArray[np.float64] = np.diff(time, append = time[-1])
+    widths[last] = 0
+
+    for axis, name in (('Acc_X', 'x'), ('Acc_Y', 'y'), ('Acc_Z', 'z')):
+        values: NDArray[np.float64] = acc[axis]
+        heights: NDArray[np.float64] = values + np.append(values[1:], values[-1])
+        features[f'auc_{name}'] = np.add.reduceat(0.5 * heights * widths, offsets)
+
+    jerk: NDArray[np.float64] = np.abs(np.asarray(signals['jerk'][samples], dtype = np.float64))
+    features['peak_jerk'] = np.maximum.reduceat(jerk, offsets) / derivative_unit
+
+    # First sample of each region where the resultant reaches its peak
+    positions: NDArray[np.int64] = np.arange(len(samples), dtype = np.int64)
+    at_peak: NDArray[np.int64] = np.where(resultant == np.repeat(features['peak_resultant'], lengths), positions, len(samples))
+    features['time_to_peak'] = time[np.minimum.reduceat(at_peak, offsets)]
+
+    return features
+
+def concatenate_features(tables: dict[str, dict[str, NDArray]]) -> dict[str, NDArray]:
+    '''Stacks the feature tables of several cases into one cohort table with a 'case' column
+
+    Args:
+        tables (dict[str, dict[str, NDArray]]): feature table of each case (see extract_features), by case
+
+    Returns:
+        dict[str, NDArray]: 'case' plus the FEATURE_COLUMNS columns, the rows of each case together and in order
+    '''
+    cohort: dict[str, NDArray] = {'case': np.repeat(np.array(list(tables), dtype = object), [len(table['attempt']) for table in tables.values()])}
+
+    for column in FEATURE_COLUMNS:
+        cohort[column] = np.concatenate([table[column] for table in tables.values()]) if tables else np.empty(0)
+
+    return cohort
+
+def get_score_inputs(cohort: dict[str, NDArray]) -> dict[str, NDArray]:
+    '''Recovery score inputs of every case of a cohort table, from the peak columns only
+       (as acceleration_helper.get_sa_2axes and get_sumua, up to the rounding of the sum), e.g. to fit new regressions
+       without running the signal pipeline again
+
+    Args:
+        cohort (dict[str, NDArray]): output of concatenate_features
+
+    Returns:
+        dict[str, NDArray]: case, number_failed_attempts, sa_2axes and sumua, one value per case
+    '''
+    case: NDArray = cohort['case']
+
+    if len(case) == 0:
+        return {'case': case, 'number_failed_attempts': np.empty(0, dtype = np.int64), 'sa_2axes': np.empty(0), 'sumua': np.empty(0)}
+
+    firsts: NDArray[np.int64] = np.flatnonzero(np.concatenate([[True], case[1:] != case[:-1]]))
+    lasts: NDArray[np.int64] = np.append(firsts[1:], len(case)) - 1
+
+    # Unsuccessful attempts only: the successful one is left out of sumua
+    ua: NDArray[np.float64] = np.sqrt(cohort['peak_x'] ** 2 + cohort['peak_y'] ** 2 + cohort['peak_z'] ** 2)
+    ua[lasts] = 0
+
+    return {
+        'case': case[firsts],
+        'number_failed_attempts': lasts - firsts,
+        'sa_2axes': np.sqrt(cohort['peak_x'][lasts] ** 2 + cohort['peak_y'][lasts] ** 2),
+        'sumua': np.add.reduceat(ua, firsts),
+    }
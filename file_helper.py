@@ -1,52 +1,181 @@
 # Recovery Score Calculations: file_helper Script
 # Script created  3/25/2024
-# Last revision 12/13/2024
+# Last revision 10/18/2026
+
+from __future__ import annotations
 
-import pandas as pd
 import numpy as np
 
-def read_csv_file(file_path) -> pd.DataFrame:
+from kalman_helper import STEADY_STATE_TOLERANCE, kalman_filter
+from numpy.typing import NDArray
+from rolling_helper import rolling
+from typing import Iterator, TYPE_CHECKING
+
+# pandas is only imported by the functions that need it (the NumPy pipeline runs without it)
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns read from the sensor export and number of rows to skip (separator, headers, units)
+COLUMNS: list[str] = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z']
+HEADER_ROWS: int = 3
+
+# Number of rows per chunk when streaming the csv file
+CHUNK_SIZE: int = 1_000_000
+
+def read_csv_file(file_path, time_format: str | None = None) -> pd.DataFrame:
     '''Adds .csv extension and the reads the first four columns (timeStamp, Acc_X, Acc_Y, Acc_Z) from the csv file
-        using the read_csv function.
-        skips the first row (Sep = ,)
-        Uses the second row as header
+        using the streaming reader (read_csv_chunks).
+        skips the first 3 rows (separator, headers, units)
         only reads the first 4 columns to speed up file reading time
 
     Args:
         file_path: case number (file_name) entered by user
+        time_format (str, optional): strftime format of the timeStamp column. Detected from the first row if None
 
     Returns:
         Pandas DataFrame
     '''
-
-    file_path_csv: str  = add_csv_extension(file_path)
+    import pandas as pd
 
     try:
         print('reading csv file...')
 
-        df: pd.DataFrame = pd.read_csv(
-            file_path_csv,
-            skiprows = 3, # skip the first 3 rows (separator, headers, units)
-            sep = ',',
-            header = None, # No header in the remaining rows
-            names = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z'],
-            usecols = [0, 1, 2, 3],
-            dtype = {'timeStamp': str, 'Acc_X': float, 'Acc_Y': float, 'Acc_Z': float},
-            encoding ='utf-8',
-            low_memory = False,
-        )
-        
-        # Convert 'TimeStamp' column to datetime format
-        df['timeStamp'] = pd.to_datetime(df['timeStamp'])
-    
+        chunks: list[pd.DataFrame] = list(read_csv_chunks(file_path, time_format = time_format))
+
+        if not chunks:
+            return pd.DataFrame(columns = COLUMNS)
+
+        df: pd.DataFrame = pd.concat(chunks, ignore_index = True)
+
+        # Convert 'TimeStamp' column from epoch nanoseconds to datetime format
+        df['timeStamp'] = df['timeStamp'].to_numpy().view('datetime64[ns]')
+
         return df
 
     except Exception as e:
 
         print('An error occurred:', str(e))
-        
+
         return pd.DataFrame()
-    
+
+def read_csv_chunks(file_path, chunk_size: int = CHUNK_SIZE, time_format: str | None = None) -> Iterator[pd.DataFrame]:
+    '''Streams the first four columns (timeStamp, Acc_X, Acc_Y, Acc_Z) of the csv file in chunks of 'chunk_size' rows.
+       The timeStamp format is detected once (or taken from 'time_format') and applied to every chunk.
+       Uses the pyarrow csv reader when pyarrow is installed and the pandas C engine otherwise.
+       Peak memory is bounded by the chunk size, not by the length of the file.
+
+    Args:
+        file_path: case number (file_name) entered by user
+        chunk_size (int): number of rows per chunk. The last chunk may be shorter
+        time_format (str, optional): strftime format of the timeStamp column. Detected from the first row if None
+
+    Yields:
+        pd.DataFrame: chunk with timeStamp as int64 epoch nanoseconds and float64 Acc_X, Acc_Y, Acc_Z
+    '''
+    file_path_csv: str = add_csv_extension(file_path)
+
+    if time_format is None:
+        time_format = detect_time_format(file_path_csv)
+
+    try:
+        import pyarrow  # noqa: F401
+        chunks: Iterator[pd.DataFrame] = _read_chunks_pyarrow(file_path_csv, chunk_size)
+
+    except ImportError:
+        chunks = _read_chunks_pandas(file_path_csv, chunk_size)
+
+    for chunk in chunks:
+        chunk['timeStamp'] = parse_time_stamps(chunk['timeStamp'], time_format)
+        yield chunk
+
+def detect_time_format(file_path_csv: str) -> str | None:
+    '''Guesses the strftime format of the timeStamp column from the first data row
+
+    Args:
+        file_path_csv (str): path to the csv file (with extension)
+
+    Returns:
+        str | None: the detected format, or None if the file is empty or the format could not be guessed
+    '''
+    from pandas.tseries.api import guess_datetime_format
+
+    with open(file_path_csv, encoding = 'utf-8') as csv_file:
+        for _ in range(HEADER_ROWS):
+            if not csv_file.readline():
+                return None
+
+        first_row: str = csv_file.readline()
+
+    if not first_row:
+        return None
+
+    return guess_datetime_format(first_row.split(',')[0].strip())
+
+def parse_time_stamps(time_stamp: pd.Series, time_format: str | None) -> NDArray[np.int64]:
+    '''Parses timeStamp strings with a fixed format into int64 epoch nanoseconds
+
+    Args:
+        time_stamp (pd.Series): timeStamp strings
+        time_format (str | None): strftime format. If None, pandas infers it from the first value
+
+    Returns:
+        NDArray[np.int64]: epoch nanoseconds
+    '''
+    import pandas as pd
+
+    parsed: pd.Series = pd.to_datetime(time_stamp, format = time_format)
+
+    return parsed.to_numpy(dtype = 'datetime64[ns]').view(np.int64)
+
+def _read_chunks_pandas(file_path_csv: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    '''Reads the csv file in chunks with the pandas C engine (timeStamp kept as str)'''
+    import pandas as pd
+
+    reader = pd.read_csv(
+        file_path_csv,
+        skiprows = HEADER_ROWS, # skip the first 3 rows (separator, headers, units)
+        sep = ',',
+        header = None, # No header in the remaining rows
+        names = COLUMNS,
+        usecols = [0, 1, 2, 3],
+        dtype = {'timeStamp': str, 'Acc_X': float, 'Acc_Y': float, 'Acc_Z': float},
+        encoding = 'utf-8',
+        engine = 'c',
+        chunksize = chunk_size,
+    )
+
+    with reader:
+        yield from reader
+
+def _read_chunks_pyarrow(file_path_csv: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    '''Reads the csv file with the multithreaded pyarrow reader and re-batches it into chunks of 'chunk_size' rows'''
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    read_options = pa_csv.ReadOptions(skip_rows = HEADER_ROWS, autogenerate_column_names = True)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns = ['f0', 'f1', 'f2', 'f3'],
+        column_types = {'f0': pa.string(), 'f1': pa.float64(), 'f2': pa.float64(), 'f3': pa.float64()},
+    )
+
+    pending: list = []
+    pending_rows: int = 0
+
+    for batch in pa_csv.open_csv(file_path_csv, read_options = read_options, convert_options = convert_options):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size).rename_columns(COLUMNS).to_pandas()
+
+            rest = table.slice(chunk_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+
+    if pending_rows > 0:
+        yield pa.Table.from_batches(pending).rename_columns(COLUMNS).to_pandas()
+
 def add_csv_extension(file_path: str) -> str:
     '''adds '.csv' to the file number
 
@@ -66,30 +195,77 @@ def initial_filter(df, target_value) -> pd.DataFrame:
        Looks into AccZ column (Z axis). Filters out initial values until it finds
        the first acceleration value on the Z axis that is greater than the 'target value'
        Signals when horse gains sternal recumbency for the first time.
+       DataFrame wrapper of get_start_index: the rows are not copied (the columns of the result are views).
         
     Args:
         df (pd.DataFrame): first four columns of the initial csv file with formated timeStamp in column 0
 
     Returns:
         Pandas DataFrame: A new filtered DataFrame starting from when 'AccZ' exceeds the target value
+        (the original DataFrame if no value exceeds it)
     '''
-    
-    try:
-   
-        # Finds the index of the first occurrence of the target value in column 'Acc_Z'
-        start_index: int = df[df['Acc_Z'] > target_value].index[0]
-        
-        # Create the new DataFrame starting from that index
-        filtered_df = df.iloc[start_index:].reset_index(drop = True)
-        
-        return filtered_df
-    
-    except IndexError:
-        # If the target value is not found, return the same dataFrame
-        print(f'No values in "Acc_Z" greater than {target_value} could be found. Returning the original DataFrame')
+    start_index: int = get_start_index(df['Acc_Z'].to_numpy(), target_value)
 
+    if start_index == 0:
         return df
+
+    # Create the new DataFrame starting from that index
+    filtered_df = df.iloc[start_index:].reset_index(drop = True)
+
+    return filtered_df
+
+def initial_filter_np(recording: dict[str, NDArray], target_value: float) -> dict[str, NDArray]:
+    '''NumPy version of initial_filter: drops the samples recorded before Acc_Z first exceeds 'target_value'.
+       Returns views of the input arrays (no copy: memory-mapped columns stay on disk).
+
+    Args:
+        recording (dict[str, NDArray]): arrays of the same length, including Acc_Z (e.g. cache_helper.load_recording)
+        target_value (float): acceleration threshold
+
+    Returns:
+        dict[str, NDArray]: the same keys, sliced from the start index on (views)
+    '''
+    start_index: int = get_start_index(recording['Acc_Z'], target_value)
+
+    return {column: values[start_index:] for column, values in recording.items()}
     
+def get_start_index(acc_z: NDArray[np.float64], target_value: float) -> int:
+    '''Index of the first acceleration value on the Z axis that is greater than the 'target value'
+       (horse gains sternal recumbency for the first time). NumPy version of initial_filter.
+       Reads the array only (one temporary boolean array, no copy of the signal).
+
+    Args:
+        acc_z (NDArray[np.float64]): Acc_Z values
+        target_value (float): acceleration threshold
+
+    Returns:
+        int: index of the first value greater than 'target_value', or 0 if there is none
+    '''
+    above: NDArray[np.bool_] = acc_z > target_value
+
+    if len(above) == 0 or not above.any():
+        print(f'No values in "Acc_Z" greater than {target_value} could be found. Returning the original data')
+        return 0
+
+    return int(np.argmax(above))
+
+def moving_average(values: NDArray[np.float64], window: int, workers: int | None = 1) -> NDArray[np.float64]:
+    '''Trailing moving average with partial windows at the start (same as rolling(window, min_periods=1).mean()).
+       Built on rolling_helper.rolling: running sums restarted every chunk so rounding errors do not grow with the
+       recording length. Accepts any float array or view (including np.memmap) with one or several columns;
+       temporary memory is bounded by the chunk size per thread, and the chunks run in 'workers' threads with a
+       bitwise identical result.
+
+    Args:
+        values (NDArray[np.float64]): signal, shape (n,) or (n, m) with one column per axis
+        window (int): window size
+        workers (int, optional): number of threads (None for one per CPU)
+
+    Returns:
+        NDArray[np.float64]: the averaged signal (new array)
+    '''
+    return rolling(values, window, 'mean', workers = workers)
+
 def clean_data(df, target_value) -> pd.DataFrame:
     '''Cleans the Acc_Z column in a DataFrame by setting values lower than the threshold to NaN.
     
@@ -109,63 +285,54 @@ def clean_data(df, target_value) -> pd.DataFrame:
     
     return df   
  
-def apply_moving_average(df_filtered, target_moving_avg) -> pd.DataFrame:
+def apply_moving_average(df_filtered, target_moving_avg, workers: int | None = 1) -> pd.DataFrame:
     '''Applies a moving average filter to the acceleration data (Acc_X, Acc_Y, Acc_Z) in the DataFrame.
+       DataFrame wrapper of moving_average: only the three averaged columns are new arrays,
+       the other columns are shared with df_filtered (which is not modified).
+       The three axes are averaged as one 2-D array, in chunks run by 'workers' threads (same result as one thread).
 
     Args:
         df_filtered (pd.DataFrame): DataFrame containing the raw acceleration data.
         target_moving_avg (int): The window size for the moving average filter.
+        workers (int, optional): number of threads (None for one per CPU)
 
     Returns:
         pd.DataFrame: DataFrame with the filtered acceleration data.
     '''
-    df_moving_avg = df_filtered.copy()
+    axes: list[str] = ['Acc_X', 'Acc_Y', 'Acc_Z']
+    averaged: NDArray[np.float64] = moving_average(df_filtered[axes].to_numpy(dtype = np.float64), target_moving_avg, workers)
+
+    df_moving_avg = df_filtered.copy(deep = False)
     
-    df_moving_avg['Acc_X'] = df_filtered['Acc_X'].rolling(window = target_moving_avg, min_periods=1).mean()
-    df_moving_avg['Acc_Y'] = df_filtered['Acc_Y'].rolling(window = target_moving_avg, min_periods=1).mean()
-    df_moving_avg['Acc_Z'] = df_filtered['Acc_Z'].rolling(window = target_moving_avg, min_periods=1).mean()
+    for position, axis in enumerate(axes):
+        df_moving_avg[axis] = averaged[:, position]
     
     return df_moving_avg
 
-def apply_kalman_filter(df: pd.DataFrame, process_variance: float, measurement_variance: float, estimated_measurement_variance: float) -> pd.DataFrame:
+def apply_kalman_filter(df: pd.DataFrame, process_variance: float, measurement_variance: float, estimated_measurement_variance: float, workers: int | None = 1, mode: str = 'exact', tolerance: float = STEADY_STATE_TOLERANCE) -> pd.DataFrame:
     '''Applies a Kalman filter to the Acc_X, Acc_Y, and Acc_Z columns of the input DataFrame.
+       The three axes are filtered together, split over 'workers' threads (same result as one thread).
 
     Args:
         df (pd.DataFrame): The input DataFrame containing Acc_X, Acc_Y, and Acc_Z columns.
         process_variance (float): The process variance (Q).
         measurement_variance (float): The measurement variance (R).
         estimated_measurement_variance (float): The estimated measurement variance (P).
+        workers (int, optional): number of threads (None for one per CPU)
+        mode (str): 'exact', or 'steady' for the steady-state gain once the gains are within tolerance of it (see kalman_helper.kalman_filter)
+        tolerance (float): tolerance of the 'steady' mode
 
     Returns:
-        pd.DataFrame: The DataFrame with Kalman filtered Acc_X, Acc_Y, and Acc_Z columns.
+        pd.DataFrame: The DataFrame with Kalman filtered Acc_X, Acc_Y, and Acc_Z columns
+        (new arrays; the other columns are shared with df, which is not modified).
     '''
-    def kalman_filter(data):
-        n = len(data)
-        xhat = np.zeros(n)       # a posteri estimate of x
-        P = np.zeros(n)          # a posteri error estimate
-        xhatminus = np.zeros(n)  # a priori estimate of x
-        Pminus = np.zeros(n)     # a priori error estimate
-        K = np.zeros(n)          # gain or blending factor
-
-        # initial guesses
-        xhat[0] = data[0]
-        P[0] = estimated_measurement_variance
-
-        for k in range(1, n):
-            # time update
-            xhatminus[k] = xhat[k-1]
-            Pminus[k] = P[k-1] + process_variance
-
-            # measurement update
-            K[k] = Pminus[k] / (Pminus[k] + measurement_variance)
-            xhat[k] = xhatminus[k] + K[k] * (data[k] - xhatminus[k])
-            P[k] = (1 - K[k]) * Pminus[k]
-
-        return xhat
-
-    df_filtered = df.copy()
-    df_filtered['Acc_X'] = kalman_filter(df['Acc_X'].values)
-    df_filtered['Acc_Y'] = kalman_filter(df['Acc_Y'].values)
-    df_filtered['Acc_Z'] = kalman_filter(df['Acc_Z'].values)
+    axes: list[str] = ['Acc_X', 'Acc_Y', 'Acc_Z']
+
+    # Filters the three axes together: the gain sequence is computed once and shared
+    xhat: NDArray[np.float64] = kalman_filter(df[axes].to_numpy(dtype=np.float64), process_variance, measurement_variance, estimated_measurement_variance, workers = workers, mode = mode, tolerance = tolerance)
+
+    df_filtered = df.copy(deep = False)
+    for position, axis in enumerate(axes):
+        df_filtered[axis] = xhat[:, position]
 
     return df_filtered
\ No newline at end of file
@@ -1,162 +1,146 @@
 # Recovery Score Calculations: Graph_Helper Script
 # Script created  3/25/2024
-# Last revision 12/13/2024
+# Last revision 10/18/2026
+
+from __future__ import annotations
 
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import numpy as np
-import pandas as pd
 
+from matplotlib.figure import Figure
 from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+# pyplot (and its GUI backend) is only imported for interactive figures, see create_figure
+if TYPE_CHECKING:
+    import pandas as pd
 
-def plot_acceleration_data(df_filtered: pd.DataFrame, df_moving_avg: pd.DataFrame, df_kalman: pd.DataFrame) -> None:
+# Resolution of the figures. Plotted signals are decimated to one min/max pair per horizontal pixel
+DPI: int = 100
+
+def plot_acceleration_data(df_filtered: pd.DataFrame, df_moving_avg: pd.DataFrame, df_kalman: pd.DataFrame, output_file: str | None = None) -> None:
     '''Plots three graphs for df_filtered, df_moving_avg, and df_kalman.
 
     Args:
         df_filtered (pd.DataFrame): DataFrame with filtered acceleration data.
         df_moving_avg (pd.DataFrame): DataFrame with moving average filtered acceleration data.
         df_kalman (pd.DataFrame): DataFrame with Kalman filtered acceleration data.
+        output_file (str, optional): saves the figure to this file (.png or .svg) instead of showing it. Needs no display
     '''
-    plt.figure(figsize=(15, 10))
-
-    # Plot df_filtered
-    plt.subplot(3, 1, 1)
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    # Plot df_moving_avg
-    plt.subplot(3, 1, 2)
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Moving Average Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    # Plot df_kalman
-    plt.subplot(3, 1, 3)
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Kalman Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_jerk_snap(jerk: np.ndarray, snap: np.ndarray, regions_indexes: list, df_avg: pd.DataFrame) -> None:
-    '''Plots jerk and snap
+    fig: Figure = create_figure((15, 10), output_file)
+    buckets: int = get_pixel_width(fig)
+
+    for position, (df, title) in enumerate([(df_filtered, 'Filtered Acceleration Data'), (df_moving_avg, 'Moving Average Filtered Acceleration Data'), (df_kalman, 'Kalman Filtered Acceleration Data')], start = 1):
+        ax = fig.add_subplot(3, 1, position)
+        time_stamp: NDArray = df['timeStamp'].to_numpy()
+
+        for axis, color in (('Acc_X', 'blue'), ('Acc_Y', 'green'), ('Acc_Z', 'red')):
+            ax.plot(*decimate_minmax(time_stamp, df[axis].to_numpy(), buckets), label = axis, color = color)
+
+        ax.set_title(title)
+        ax.set_xlabel('Time')
+        ax.set_ylabel('Acceleration (m/s^2)')
+        ax.legend()
+        ax.grid(True)
+
+    show_figure(fig, output_file)
+
+def get_plot_jerk_snap(jerk: np.ndarray, snap: np.ndarray, regions_indexes: list, df_avg: pd.DataFrame, output_file: str | None = None) -> None:
+    '''Plots jerk and snap with the regions of interest as shaded spans
 
     Args:
         jerk (np.ndarray): The first derivative of acceleration (jerk)
         snap (np.ndarray): The second derivative of acceleration (snap)
         regions_indexes: list: Indices of regions of interest
         df_avg: provides TimeStamp list for the X axis
+        output_file (str, optional): saves the figure to this file (.png or .svg) instead of showing it. Needs no display
     '''
-    time_stamp = df_avg['timeStamp']
+    time_stamp: NDArray = df_avg['timeStamp'].to_numpy()
     
-    # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp[:-1]
-    timeStamp_snap = time_stamp[:-2]
+    # jerk and snap start on the first timeStamp and may be shorter (forward differences), so slice by their length
+    timeStamp_jerk: NDArray = time_stamp[:len(jerk)]
+    timeStamp_snap: NDArray = time_stamp[:len(snap)]
     
     # Plot size
-    plt.figure(figsize=(12, 6))
+    fig: Figure = create_figure((12, 6), output_file)
+    buckets: int = get_pixel_width(fig)
     
     # Jerk plot
-    plt.subplot(2, 1, 1)
-    plt.plot(timeStamp_jerk, jerk, label='Jerk', color='blue')
-    
-    # Convert timestamps to numerical values
-    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
+    ax = fig.add_subplot(2, 1, 1)
+    ax.plot(*decimate_minmax(timeStamp_jerk, jerk, buckets), label = 'Jerk', color = 'blue')
     
     # Highlight ROIs
-    #for i in regions_indexes:
-    #   plt.axvspan(regions_indexes[i] - 0.5, regions_indexes[i] + 0.5, color='grey', alpha=0.3, label='ROI' if i == regions_indexes[0] else '')
+    shade_regions(ax, timeStamp_jerk, regions_indexes)
         
-    plt.axhline(0, color='gray', linestyle='--', linewidth=0.8)
-    plt.title('Jerk')
-    plt.xlabel('TimeStamp')
-    plt.ylabel('Jerk')
-    plt.legend()
-    plt.grid(True)
+    ax.axhline(0, color = 'gray', linestyle = '--', linewidth = 0.8)
+    ax.set_title('Jerk')
+    ax.set_xlabel('TimeStamp')
+    ax.set_ylabel('Jerk')
+    ax.legend()
+    ax.grid(True)
 
     # Snap plot
-    plt.subplot(2, 1, 2)
-    plt.plot(timeStamp_snap, snap, label='Snap', color='blue')
-    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
-    plt.axhline(0, color='gray', linestyle='--', linewidth=0.8)
-    plt.title('Snap')
-    plt.xlabel('Time')
-    plt.ylabel('Snap')
-    plt.legend()
-    plt.grid(True)
-
-    # Show plot
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_jerk_snap_with_roi(jerk: np.ndarray, snap: np.ndarray, regions_indexes: list, df: pd.DataFrame) -> None:
-    '''Plots jerk and snap, highlighting regions of interest (ROIs).
+    ax = fig.add_subplot(2, 1, 2)
+    ax.plot(*decimate_minmax(timeStamp_snap, snap, buckets), label = 'Snap', color = 'blue')
+    shade_regions(ax, timeStamp_snap, regions_indexes)
+    ax.axhline(0, color = 'gray', linestyle = '--', linewidth = 0.8)
+    ax.set_title('Snap')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Snap')
+    ax.legend()
+    ax.grid(True)
+
+    # Show or save plot
+    show_figure(fig, output_file)
+
+def get_plot_jerk_snap_with_roi(jerk: np.ndarray, snap: np.ndarray, regions_indexes: list, df: pd.DataFrame, output_file: str | None = None) -> None:
+    '''Plots jerk and snap, highlighting regions of interest (ROIs) as shaded spans and their samples as points.
 
     Args:
         jerk (np.ndarray): The first derivative of acceleration (jerk).
         snap (np.ndarray): The second derivative of acceleration (snap).
         regions_indexes: list: Indices of regions of interest.
         df_avd: pd.DataFrame: Time array corresponding to jerk and snap.
+        output_file (str, optional): saves the figure to this file (.png or .svg) instead of showing it. Needs no display
     '''
-    time_stamp_np: NDArray = np.array(df['timeStamp'], dtype=np.float64)
-     # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp_np[:-1]
-    timeStamp_snap = time_stamp_np[:-2]
+    time_stamp_np: NDArray = df['timeStamp'].to_numpy()
+     # jerk and snap start on the first timeStamp and may be shorter (forward differences), so slice by their length
+    timeStamp_jerk: NDArray = time_stamp_np[:len(jerk)]
+    timeStamp_snap: NDArray = time_stamp_np[:len(snap)]
+    roi_indices: NDArray[np.int64] = np.asarray(regions_indexes, dtype = np.int64)
+    roi_indices = roi_indices[roi_indices < len(jerk)]
     
     # Plot jerk
-    plt.figure(figsize=(12, 6))
+    fig: Figure = create_figure((12, 6), output_file)
+    buckets: int = get_pixel_width(fig)
     
     # Jerk plot
-    plt.subplot(2, 1, 1)
-    plt.plot(timeStamp_jerk, jerk, label="Jerk", color="blue")
-    plt.scatter(timeStamp_jerk[regions_indexes], jerk, color="red", label="ROI", zorder=5)
-    
-    # Convert timestamps to numerical values
-    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
-    # Highlight ROIs
-    #for i in roi_indices['ROI_Indices']:
-    #   plt.axvspan(float(timeStamp_jerk_num[i] - 0.5), float(timeStamp_jerk_num[i] + 0.5), color='grey', alpha=0.3, label="ROI" if i == roi_indices[0] else "")
+    ax = fig.add_subplot(2, 1, 1)
+    ax.plot(*decimate_minmax(timeStamp_jerk, jerk, buckets), label = 'Jerk', color = 'blue')
+    ax.scatter(*decimate_minmax(timeStamp_jerk[roi_indices], jerk[roi_indices], buckets), color = 'red', label = 'ROI', zorder = 5)
+    shade_regions(ax, timeStamp_jerk, regions_indexes)
         
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Jerk with Highlighted ROIs")
-    plt.xlabel("Time")
-    plt.ylabel("Jerk")
-    plt.legend()
-    plt.grid(True)
+    ax.axhline(0, color = 'gray', linestyle = '--', linewidth = 0.8)
+    ax.set_title('Jerk with Highlighted ROIs')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Jerk')
+    ax.legend()
+    ax.grid(True)
 
     # Snap plot
-    plt.subplot(2, 1, 2)
-    plt.plot(timeStamp_snap, snap, label="Snap", color="blue")
-    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Snap with Highlighted ROIs")
-    plt.xlabel("Time")
-    plt.ylabel("Snap")
-    plt.legend()
-    plt.grid(True)
-
-    # Show plot
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_sd_with_roi(jerk:np.ndarray, df_avg:pd.DataFrame, roi_sd:list, window_size:int, step_size:int, file_path:str) -> None:
+    ax = fig.add_subplot(2, 1, 2)
+    ax.plot(*decimate_minmax(timeStamp_snap, snap, buckets), label = 'Snap', color = 'blue')
+    shade_regions(ax, timeStamp_snap, regions_indexes)
+    ax.axhline(0, color = 'gray', linestyle = '--', linewidth = 0.8)
+    ax.set_title('Snap with Highlighted ROIs')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Snap')
+    ax.legend()
+    ax.grid(True)
+
+    # Show or save plot
+    show_figure(fig, output_file)
+
+def get_plot_sd_with_roi(jerk:np.ndarray, df_avg:pd.DataFrame, roi_sd:list, window_size:int, step_size:int, file_path:str, output_file: str | None = None) -> None:
     '''Creates a plot of the Z axis only with the detected Regions of Interest
     
     Args:
@@ -166,40 +150,136 @@ def get_plot_sd_with_roi(jerk:np.ndarray, df_avg:pd.DataFrame, roi_sd:list, wind
         window_size: int with the size of the window
         step_size: int with the step size
         file_path: string with the name of the file
+        output_file (str, optional): saves the figure to this file (.png or .svg) instead of showing it. Needs no display
 
     Returns:
         None
     '''
-    time_stamp_np: NDArray = np.array(df_avg['timeStamp'])
-    # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp_np[:-1]
-    #timeStamp_snap = time_stamp_np[:-2]
+    time_stamp_np: NDArray = df_avg['timeStamp'].to_numpy()
+    # jerk starts on the first timeStamp and may be shorter (forward differences), so slice by its length
+    timeStamp_jerk: NDArray = time_stamp_np[:len(jerk)]
 
-    plt.figure(figsize=(10, 6))
+    fig: Figure = create_figure((10, 6), output_file)
+    ax = fig.add_subplot(1, 1, 1)
     
-    plt.plot(timeStamp_jerk, jerk, label="Jerk", color="blue")
+    ax.plot(*decimate_minmax(timeStamp_jerk, jerk, get_pixel_width(fig)), label = 'Jerk', color = 'blue')
     
     for k in range(len(roi_sd)):
-        plt.vlines(
+        ax.vlines(
             timeStamp_jerk[roi_sd[k][0] * step_size],
             -1e-06,
             1e-06,
             colors= 'r',
             linestyles= 'dashed',
-            label= 'ROI',
+            label= 'ROI' if k == 0 else None,
         )
 
-        plt.vlines(
-            df_avg['timeStamp'][roi_sd[k][0] * step_size + window_size],
+        ax.vlines(
+            time_stamp_np[min(roi_sd[k][0] * step_size + window_size, len(time_stamp_np) - 1)],
             -1e-06,
             1e-06,
             colors=  'r',
             linestyles= 'dashed',
         )
-    plt.xlabel('timeStamp')
-    plt.ylabel('jerk')
-    plt.title(file_path)
-    plt.grid(which='both')
-    plt.legend()
-    plt.show()
+    ax.set_xlabel('timeStamp')
+    ax.set_ylabel('jerk')
+    ax.set_title(file_path)
+    ax.grid(which='both')
+    ax.legend()
+    show_figure(fig, output_file)
+
+def decimate_minmax(x: NDArray, y: NDArray, buckets: int) -> tuple[NDArray, NDArray]:
+    '''Min/max envelope decimation: keeps the minimum and the maximum of each of 'buckets' consecutive
+       groups of samples, in time order. With one bucket per horizontal pixel the line drawn is the same as
+       with every sample (every spike is kept), while the plotting cost depends on the width of the figure
+       instead of the length of the recording.
+
+    Args:
+        x (NDArray): x values (e.g. timeStamps)
+        y (NDArray): y values, same length as x
+        buckets (int): number of groups (2 points are kept per group)
+
+    Returns:
+        tuple[NDArray, NDArray]: decimated x and y (the inputs if they have at most 2 * buckets points)
+    '''
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n: int = len(y)
+
+    if n <= 2 * buckets:
+        return x, y
+
+    size: int = -(-n // buckets) # samples per bucket (rounded up)
+    full: int = n // size * size
+    offsets: NDArray[np.int64] = np.arange(0, full, size)
+
+    groups: NDArray = y[:full].reshape(-1, size)
+    keep: list[NDArray] = [groups.argmin(axis = 1) + offsets, groups.argmax(axis = 1) + offsets]
+
+    # last (shorter) bucket
+    if full < n:
+        keep.append(np.array([full + np.argmin(y[full:]), full + np.argmax(y[full:])]))
+
+    indices: NDArray[np.int64] = np.unique(np.concatenate(keep))
+
+    return x[indices], y[indices]
+
+def shade_regions(ax, time_stamp: NDArray, regions_indexes: list) -> None:
+    '''Draws each run of consecutive ROI indices as one shaded span
+
+    Args:
+        ax: matplotlib Axes
+        time_stamp (NDArray): x values of the plotted signal
+        regions_indexes (list): indices of the regions of interest
+    '''
+    indices: NDArray[np.int64] = np.unique(np.asarray(regions_indexes, dtype = np.int64))
+    indices = indices[(indices >= 0) & (indices < len(time_stamp))]
+
+    if len(indices) == 0:
+        return
+
+    breaks: NDArray[np.int64] = np.flatnonzero(np.diff(indices) != 1)
+    starts: NDArray[np.int64] = indices[np.r_[0, breaks + 1]]
+    ends: NDArray[np.int64] = indices[np.r_[breaks, len(indices) - 1]]
+
+    for k, (start, end) in enumerate(zip(starts, ends)):
+        ax.axvspan(time_stamp[start], time_stamp[end], color = 'grey', alpha = 0.3, label = 'ROI' if k == 0 else None)
+
+def create_figure(figsize: tuple, output_file: str | None = None) -> Figure:
+    '''Creates an interactive pyplot figure, or a figure that is only rendered to a file (Agg canvas, no display
+       needed, not registered in pyplot, so batch and server runs never block or leak figures)
+
+    Args:
+        figsize (tuple): size of the figure in inches
+        output_file (str, optional): file the figure will be saved to
+
+    Returns:
+        Figure: the new figure
+    '''
+    if output_file is None:
+        import matplotlib.pyplot as plt
+
+        return plt.figure(figsize = figsize, dpi = DPI)
+
+    return Figure(figsize = figsize, dpi = DPI)
+
+def show_figure(fig: Figure, output_file: str | None = None) -> None:
+    '''Shows the figure (blocks until its window is closed) or saves it to output_file (format from the extension: .png, .svg, ...)
+
+    Args:
+        fig (Figure): figure from create_figure
+        output_file (str, optional): file to save the figure to
+    '''
+    fig.tight_layout()
+
+    if output_file is None:
+        import matplotlib.pyplot as plt
+
+        plt.show()
+
+    else:
+        fig.savefig(output_file)
 
+def get_pixel_width(fig: Figure) -> int:
+    '''Width of the figure in pixels (number of decimation buckets)'''
+    return int(fig.get_figwidth() * fig.dpi)
@@ -0,0 +1,287 @@
+# Recovery Score Calculations: Kalman helper
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+
+from numpy.typing import NDArray
+from parallel_helper import get_workers, run_threads, split_range
+
+# Number of samples solved together inside one block of the linear scan
+BLOCK_SIZE: int = 64
+
+# Kalman filter modes: 'exact' applies the gain of every sample, 'steady' switches to the steady-state gain
+# once the gains are within the tolerance of it (a constant coefficient filter, see constant_recursive_filter)
+KALMAN_MODES: tuple[str, ...] = ('exact', 'steady')
+STEADY_STATE_TOLERANCE: float = 1e-12
+
+# Constant coefficient filter: samples per block (one small matrix product) and blocks per chunk (4 MB, kept in cache)
+STEADY_BLOCK_SIZE: int = 32
+STEADY_CHUNK_BLOCKS: int = 16384
+
+def get_kalman_gains(n: int, process_variance: float, measurement_variance: float, estimated_measurement_variance: float) -> NDArray[np.float64]:
+    '''Calculates the Kalman gain for every sample of a scalar random-walk Kalman filter.
+       Q and R are constant, so the gain sequence does not depend on the data and can be
+       shared by every axis. The recursion stops as soon as the error estimate stops changing
+       (within floating-point precision) and the converged gain is repeated for the remaining samples.
+
+    Args:
+        n (int): Number of samples to filter
+        process_variance (float): The process variance (Q)
+        measurement_variance (float): The measurement variance (R)
+        estimated_measurement_variance (float): The initial estimated measurement variance (P)
+
+    Returns:
+        NDArray[np.float64]: Array of length n with the gain for each sample (K[0] is unused and set to 0)
+    '''
+    transient: NDArray[np.float64] = get_transient_gains(n, process_variance, measurement_variance, estimated_measurement_variance)
+
+    gains: NDArray[np.float64] = np.empty(n, dtype=np.float64)
+    gains[:len(transient)] = transient
+    if len(transient):
+        gains[len(transient):] = transient[-1]
+
+    return gains
+
+def get_transient_gains(n: int, process_variance: float, measurement_variance: float, estimated_measurement_variance: float) -> NDArray[np.float64]:
+    '''Calculates the Kalman gains until the error estimate stops changing (within floating-point precision),
+       at most n. The last gain is the steady-state gain, used by get_kalman_gains for the remaining samples.
+
+    Args:
+        n (int): Number of samples to filter
+        process_variance (float): The process variance (Q)
+        measurement_variance (float): The measurement variance (R)
+        estimated_measurement_variance (float): The initial estimated measurement variance (P)
+
+    Returns:
+        NDArray[np.float64]: gains of the first samples (K[0] is unused and set to 0), at most n
+    '''
+    gains: list[float] = [0.0] if n > 0 else []
+    P: float = estimated_measurement_variance
+    eps: float = float(np.finfo(np.float64).eps)
+
+    for k in range(1, n):
+        # time update
+        Pminus: float = P + process_variance
+
+        # measurement update
+        K: float = Pminus / (Pminus + measurement_variance)
+        gains.append(K)
+        P_new: float = (1 - K) * Pminus
+
+        # error estimate converged: the gain is constant from here on
+        if abs(P_new - P) <= eps * P:
+            break
+
+        P = P_new
+
+    return np.array(gains, dtype=np.float64)
+
+def get_settled_index(transient: NDArray[np.float64], tolerance: float = STEADY_STATE_TOLERANCE) -> int:
+    '''Returns the first sample from which every gain is within tolerance of the steady-state gain (the gains converge monotonically)
+
+    Args:
+        transient (NDArray[np.float64]): output of get_transient_gains
+        tolerance (float): largest difference allowed between a gain and the steady-state gain
+
+    Returns:
+        int: index of the first settled sample (at least 1, len(transient) when there is no gain)
+    '''
+    if len(transient) < 2:
+        return len(transient)
+
+    return 1 + int(np.argmax(np.abs(transient[1:] - transient[-1]) <= tolerance))
+
+def get_steady_state_bound(data: NDArray[np.float64], process_variance: float, measurement_variance: float, estimated_measurement_variance: float, tolerance: float = STEADY_STATE_TOLERANCE) -> float:
+    '''Bound on the difference between the 'steady' and the 'exact' Kalman filter modes (rounding errors aside).
+       Both follow xhat[k] = xhat[k-1] + K[k] * (data[k] - xhat[k-1]), so the difference e[k] between them satisfies
+       |e[k]| <= (1 - K) * |e[k-1]| + |K[k] - K_ss| * |data[k] - xhat[k-1]|, and xhat stays within the range of the data:
+       |e| <= sum(|K[k] - K_ss|) * (max(data) - min(data)) over the samples filtered with the steady-state gain.
+
+    Args:
+        data (NDArray[np.float64]): Measurements, shape (n,) or (n, m)
+        process_variance (float): The process variance (Q)
+        measurement_variance (float): The measurement variance (R)
+        estimated_measurement_variance (float): The estimated measurement variance (P)
+        tolerance (float): tolerance of the steady mode (see get_settled_index)
+
+    Returns:
+        float: largest possible difference between the estimates of the two modes
+    '''
+    if len(data) == 0:
+        return 0.0
+
+    transient: NDArray[np.float64] = get_transient_gains(len(data), process_variance, measurement_variance, estimated_measurement_variance)
+    settled: int = get_settled_index(transient, tolerance)
+    data_range: float = float(np.max(np.max(data, axis = 0) - np.min(data, axis = 0)))
+
+    return float(np.sum(np.abs(transient[settled:] - transient[-1]))) * data_range
+
+def linear_recursive_filter(a: NDArray[np.float64], b: NDArray[np.float64], x0: NDArray[np.float64], workers: int | None = 1) -> NDArray[np.float64]:
+    '''Solves the first order linear recursion x[k] = a[k] * x[k-1] + b[k] without a per-sample loop.
+       The samples are split into blocks of BLOCK_SIZE. Each block is solved with a log-step prefix scan
+       and the values carried from one block to the next are solved recursively with the same method.
+       The blocks are independent until their carried values are known, so the scan inside the blocks and the
+       final combination run in 'workers' threads over ranges of blocks (every column at once): the arithmetic of
+       each block does not change, so the result is bitwise identical for any number of workers.
+
+    Args:
+        a (NDArray[np.float64]): Coefficients, shape (n,). Shared by every column of b
+        b (NDArray[np.float64]): Inputs, shape (n, m)
+        x0 (NDArray[np.float64]): Value of x before the first sample, shape (m,)
+        workers (int, optional): number of threads (None for one per CPU)
+
+    Returns:
+        NDArray[np.float64]: The solution x, shape (n, m)
+    '''
+    n: int = b.shape[0]
+    m: int = b.shape[1]
+
+    if n == 0:
+        return np.empty((0, m), dtype=b.dtype)
+
+    n_blocks: int = -(-n // BLOCK_SIZE)
+    padding: int = n_blocks * BLOCK_SIZE - n
+
+    # Padding with a = 1 and b = 0 leaves the carried value unchanged (the dtype of b is kept)
+    A: NDArray[np.float64] = np.concatenate([a, np.ones(padding, dtype=a.dtype)]).reshape(n_blocks, BLOCK_SIZE, 1)
+    B: NDArray[np.float64] = np.concatenate([b, np.zeros((padding, m), dtype=b.dtype)]).reshape(n_blocks, BLOCK_SIZE, m)
+
+    # A few ranges of blocks per thread keep every thread busy until the end
+    threads: int = get_workers(workers)
+    block_ranges: list[tuple[int, int]] = split_range(n_blocks, 4 * threads if threads > 1 else 1)
+
+    # Prefix scan inside each block: afterwards x = A * carry_in + B
+    run_threads(lambda block_range: _scan_blocks(A[block_range[0]:block_range[1]], B[block_range[0]:block_range[1]]), block_ranges, workers)
+
+    if n_blocks == 1:
+        carry_in: NDArray[np.float64] = x0.reshape(1, m)
+    else:
+        # value at the end of each block follows the same kind of recursion
+        block_ends: NDArray[np.float64] = linear_recursive_filter(A[:-1, -1, 0], B[:-1, -1], x0)
+        carry_in = np.concatenate([x0.reshape(1, m), block_ends])
+
+    x: NDArray[np.float64] = np.empty_like(B)
+    run_threads(lambda block_range: _combine_blocks(A, B, carry_in, x, *block_range), block_ranges, workers)
+
+    return x.reshape(n_blocks * BLOCK_SIZE, m)[:n]
+
+def _scan_blocks(A: NDArray[np.float64], B: NDArray[np.float64]) -> None:
+    '''Log-step prefix scan inside each block (in place): afterwards x = A * carry_in + B
+
+    Args:
+        A (NDArray[np.float64]): coefficients, shape (blocks, BLOCK_SIZE, 1)
+        B (NDArray[np.float64]): inputs, shape (blocks, BLOCK_SIZE, m)
+    '''
+    shift: int = 1
+    while shift < BLOCK_SIZE:
+        B[:, shift:] = A[:, shift:] * B[:, :-shift] + B[:, shift:]
+        A[:, shift:] = A[:, shift:] * A[:, :-shift]
+        shift *= 2
+
+def _combine_blocks(A: NDArray[np.float64], B: NDArray[np.float64], carry_in: NDArray[np.float64], x: NDArray[np.float64], start: int, end: int) -> None:
+    '''Writes x = A * carry_in + B for the blocks start to end - 1'''
+    np.multiply(A[start:end], carry_in[start:end, np.newaxis, :], out = x[start:end])
+    np.add(x[start:end], B[start:end], out = x[start:end])
+
+def constant_recursive_filter(a: float, b: float, data: NDArray[np.float64], x0: float, out: NDArray[np.float64] | None = None) -> NDArray[np.float64]:
+    '''Solves x[k] = a * x[k-1] + b * data[k] (a first order IIR filter) with matrix products.
+       Inside a block of STEADY_BLOCK_SIZE samples, x is the product of the block and the matrix of the impulse
+       responses b * a ** (j - i), plus the value carried into the block times a ** (j + 1). The carried values
+       follow the same recursion from block to block (coefficient a ** STEADY_BLOCK_SIZE) and are solved by this
+       function on the last sample of each block. The blocks are processed in chunks that stay in cache,
+       so the data is read and x written once.
+
+    Args:
+        a (float): coefficient of the previous value
+        b (float): coefficient of the input
+        data (NDArray[np.float64]): input, shape (n,)
+        x0 (float): value of x before the first sample
+        out (NDArray[np.float64], optional): contiguous array of shape (n,) where x is written
+
+    Returns:
+        NDArray[np.float64]: the solution x, same dtype as data (out if given)
+    '''
+    n: int = len(data)
+    block: int = STEADY_BLOCK_SIZE
+    n_blocks: int = n // block
+    x: NDArray[np.float64] = np.empty(n, dtype = data.dtype) if out is None else out
+
+    # impulse[i, j] = b * a ** (j - i) for j >= i: response of sample j of a block to sample i
+    lags: NDArray[np.int64] = np.arange(block)[np.newaxis, :] - np.arange(block)[:, np.newaxis]
+    impulse: NDArray[np.float64] = np.where(lags >= 0, b * np.power(a, np.maximum(lags, 0)), 0).astype(data.dtype)
+    powers: NDArray[np.float64] = np.power(a, np.arange(1, block + 1)).astype(data.dtype)
+
+    carry: float = x0
+    for first in range(0, n_blocks, STEADY_CHUNK_BLOCKS):
+        last: int = min(first + STEADY_CHUNK_BLOCKS, n_blocks)
+        blocks: NDArray[np.float64] = x[first * block:last * block].reshape(last - first, block)
+        np.matmul(data[first * block:last * block].reshape(last - first, block), impulse, out = blocks)
+
+        # Value carried into each block of the chunk
+        carries: NDArray[np.float64] = np.empty(last - first, dtype = data.dtype)
+        carries[0] = carry
+        carries[1:] = constant_recursive_filter(a ** block, 1.0, np.ascontiguousarray(blocks[:-1, -1]), carry)
+
+        blocks += carries[:, np.newaxis] * powers
+        carry = blocks[-1, -1]
+
+    # Samples after the last full block
+    for k in range(n_blocks * block, n):
+        carry = a * carry + b * data[k]
+        x[k] = carry
+
+    return x
+
+def kalman_filter(data: NDArray[np.float64], process_variance: float, measurement_variance: float, estimated_measurement_variance: float, dtype = np.float64, workers: int | None = 1, mode: str = 'exact', tolerance: float = STEADY_STATE_TOLERANCE) -> NDArray[np.float64]:
+    '''Applies a scalar Kalman filter to every column of data in a single batched pass.
+       In the 'steady' mode the gains of the first samples are applied exactly, until they are within 'tolerance'
+       of the steady-state gain; from there on the filter is the first order IIR filter of the steady-state gain,
+       solved with constant_recursive_filter (several times faster than the linear scan). The estimates differ
+       from the 'exact' mode by at most get_steady_state_bound (plus rounding errors).
+
+    Args:
+        data (NDArray[np.float64]): Measurements, shape (n,) or (n, m) with one column per axis
+        process_variance (float): The process variance (Q)
+        measurement_variance (float): The measurement variance (R)
+        estimated_measurement_variance (float): The estimated measurement variance (P)
+        dtype: dtype of the computation and of the result (np.float32 in compact mode). The gains are always computed in float64
+        workers (int, optional): number of threads of the linear scan (None for one per CPU). The result does not depend on it
+        mode (str): 'exact' or 'steady' (see KALMAN_MODES)
+        tolerance (float): largest difference between the gains and the steady-state gain in the 'steady' mode
+
+    Returns:
+        NDArray[np.float64]: The a posteriori estimates (xhat) with the same shape as data
+        (a new array; data is only read, so views and np.memmap arrays are filtered without a copy)
+    '''
+    data_np: NDArray[np.float64] = np.asarray(data, dtype=dtype)
+    data_2d: NDArray[np.float64] = data_np.reshape(len(data_np), -1)
+    n: int = data_2d.shape[0]
+
+    if n == 0:
+        return np.empty_like(data_np)
+
+    if mode not in KALMAN_MODES:
+        raise ValueError(f'Unknown Kalman filter mode {mode!r} (expected one of {KALMAN_MODES})')
+
+    if mode == 'exact':
+        gains: NDArray[np.float64] = get_kalman_gains(n, process_variance, measurement_variance, estimated_measurement_variance).astype(dtype, copy=False)
+        settled: int = n
+    else:
+        transient: NDArray[np.float64] = get_transient_gains(n, process_variance, measurement_variance, estimated_measurement_variance)
+        settled = get_settled_index(transient, tolerance)
+        gains = transient[:settled].astype(dtype, copy=False)
+
+    # xhat[k] = xhat[k-1] + K[k] * (data[k] - xhat[k-1]) = (1 - K[k]) * xhat[k-1] + K[k] * data[k]
+    # (column-major in the steady mode, so each column is written in place by constant_recursive_filter)
+    xhat: NDArray[np.float64] = np.empty_like(data_2d) if settled == n else np.empty(data_2d.shape, dtype = data_2d.dtype, order = 'F')
+    xhat[0] = data_2d[0]
+    xhat[1:settled] = linear_recursive_filter(1 - gains[1:], gains[1:, np.newaxis] * data_2d[1:settled], data_2d[0], workers)
+
+    # Steady state: constant gain from the settled sample on, one column at a time
+    if settled < n:
+        steady_gain: float = float(transient[-1])
+        for column in range(data_2d.shape[1]):
+            constant_recursive_filter(1 - steady_gain, steady_gain, np.ascontiguousarray(data_2d[settled:, column]), float(xhat[settled - 1, column]), xhat[settled:, column])
+
+    return xhat.reshape(data_np.shape)
@@ -1,146 +1,89 @@
 # RS: Main Script
 # Script created 3/25/2024
-# Last revision 4/9/2025
+# Last revision 10/18/2026
 # Notes: Use derivative method to detect the peaks in either jerk or snap 
 #        and then go 0.5sec before and after to characterize regions of interest. 
 #        Use those indexes on the original Acc_Z, Acc_X, Acc_Y dataset
 
-import pandas as pd
-import numpy as np
-
-from acceleration_helper import get_max_accelerations_x, get_max_accelerations_y, get_max_accelerations_z, get_sa_2axes, get_sumua
-from attempt_detection_helper import get_roi_derivative,  get_attempts, set_jerk_threshold, set_snap_threshold, detect_regions
-from derivative_helper import calculate_derivatives
-from file_helper import read_csv_file, initial_filter, apply_moving_average, clean_data, apply_kalman_filter
-from graph_helper import plot_acceleration_data, get_plot_jerk_snap
-from numpy.typing import NDArray
-from region_helper import extract_roi_values
-from output_results_helper import process_recovery
-#from velocity_helper import get_auc_x, get_auc_y, get_auc_z
-
-def main() -> None:
-
-    # acceleration threshold value to signal sternal recumbency for initial filter
-    target_value: float = 9.0 
-    
-    # variables for moving average filter
-    target_moving_avg: int = 10 # moving average window_size (4)
-    
-    # variables for Kalman filter
-    process_variance = 1e-4  # Q
-    measurement_variance = 1e-2  # R
-    estimated_measurement_variance = 0.5  # P   
-    
-    # variables for ROI_Derivative method
-    factor: float = 30.0  # Factor to set jerk threshold (56.55)
-    percentile: float = 99.0    # Percentile to set jerk threshold  
-    jerk_threshold: float = 1.0-5 #1.578626493498403e-08 #5.7209199129367875e-12  Threshold for significant jerk
-    snap_threshold: float = 1  # Threshold for significant snap
-    sampling_rate: int = 200  # Sampling rate of the accelerometer200
-       
+import argparse
+import os
+
+# The helpers (NumPy, pandas, matplotlib) are imported by the mode that needs them, so --help and
+# the start of each mode only pay for what they use
+
+def main(sink: str | None = None, profile_dir: str | None = None, cprofile: bool = False, plot_dir: str | None = None, plot_format: str = 'png', compact: bool = False, export_dir: str | None = None, stage_cache_dir: str | None = None) -> None:
+    from output_results_helper import process_recovery
+    from batch_helper import get_plot_file
+    from pipeline_helper import run_pipeline
+    from profiling_helper import StageProfiler
+
     file_path: str = input('Enter case number: ')
-        
-    df: pd.DataFrame = read_csv_file(file_path)
+    profiler: StageProfiler | None = StageProfiler(file_path, cprofile = cprofile) if profile_dir else None
 
-    if df is not None:
-        print('File read successfully...')
-        print('Columns in DataFrame: ', df.columns)
-        
-    else:
-        print('Failed to load DataFrame')
+    try:
+        # Reads, filters and scores the case (plots jerk and snap with flagged spikes, or saves the plot to plot_dir)
+        if plot_dir is not None:
+            os.makedirs(plot_dir, exist_ok = True)
+
+        r: dict = run_pipeline(file_path, {'compact': compact, 'stage_cache_dir': stage_cache_dir}, plot = True, profiler = profiler, plot_file = get_plot_file(plot_dir, file_path, plot_format), export_dir = export_dir)
+
+    except ValueError as e:
+        print(e)
         return # exit if the file cannot be loaded
-    
-    # Creates new df in which Z_axis values are ignored until values reach 'target_value' 
-    # signaling horse getting onto sternal recumbency
-    df_filtered: pd.DataFrame = initial_filter(df, target_value)
-    print('Initial filter applied successfully')
-       
-    # Apply moving average filter with a specified 'target_moving_avg' value
-    df_moving_avg: pd.DataFrame = apply_moving_average(df_filtered, target_moving_avg)
-    print('Moving average applied successfully')
-    
-    df_kalman: pd.DataFrame = apply_kalman_filter(df_filtered, process_variance, measurement_variance, estimated_measurement_variance)
-    print('Kalman filter applied successfully')
-    
-    # Plot data to review application of filters
-    #plot_acceleration_data(df_filtered, df_moving_avg, df_kalman)
-          
-    # Creates new DataFrame after applying avg filter with Acc_Z and timeStamp values only 
-    df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
-        
-    # Creates new DataFrame with Acc_Z and timeStamp values only (Kalman filter applied)
-    kalman_df = pd.DataFrame({'Acc_Z': df_kalman['Acc_Z'], 'timeStamp': df_kalman['timeStamp']})   
-        
-    # Calculates first and second derivatives (jerk and snap) from the avg filtered dataset
-    jerk, snap = calculate_derivatives(kalman_df)
-    print('Jerk and Snap calculated successfully')
-
-    # Plot jerk and snap
-    #get_plot_jerk_snap(jerk, snap, regions_indexes, df_avg)
-       
-    # Set Jerk threshold and calculate mean Jerk to be able to re calibrate the threshold
-    mean_jerk, std_jerk, jerk_threshold_cal = set_jerk_threshold(jerk, factor, percentile)
-    print('Jerk threshold calculated successfully')
-    
-    # Set Snap threshold and calculate mean Snap to be able to re calibrate the threshold
-    mean_snap, std_snap, snap_threshold_cal = set_snap_threshold(snap, factor, percentile)
-    print('Snap threshold calculated successfully')
-    
-    # Detect regions in the jerk and snap signals
-    regions_indexes: list[float] = detect_regions(jerk, snap, jerk_threshold_cal, snap_threshold_cal, sampling_rate)
-    print('Regions calculated successfully')
-         
-    # Get regions of interest for Jerk and Snap
-    #roi_indices_df: list[float] = get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold)
-    
-    # Get indices of regions of interest for Jerk and Snap  
-    #roi_indices_df: pd.DataFrame = get_roi_indices(jerk, snap, jerk_threshold_cal, snap_threshold)
-    #print('ROI indices obtained successfully')
-    #print(f'ROI indices {roi_indices_df}')
-        
-    # Plot jerk and snap with flagged spikes
-    get_plot_jerk_snap(jerk, snap, regions_indexes, df_avg)
-
-    # Plot jerk and snap with regions of interest using sd method
-    #get_plot_sd_with_roi(jerk, df_avg, roi_sd, window_size, step_size, file_path)
-            
-    number_failed_attempts: int = get_attempts(regions_indexes)
-    print('Number of Failed Attempts calculated successfully')
-    
-    # Extract ROI values for each axis
-    
-    roi_values_df: pd.DataFrame = extract_roi_values(df_filtered, regions_indexes)
-    print('ROI values extracted successfully')
-    #print(roi_values_df)
-    #print(f'ROI_Values_length = {len(roi_values_df)}')
-    
-    # Ensure consistent use of roi_values_df as a DataFrame
-    amax_x_list: list[float] = get_max_accelerations_x(roi_values_df)
-    amax_y_list: list[float] = get_max_accelerations_y(roi_values_df)
-    amax_z_list: list[float] = get_max_accelerations_z(roi_values_df)
-                
-    sa_2axes: float = get_sa_2axes(amax_x_list, amax_y_list)
-    #print(f'sa_2axes = {sa_2axes}')
-                
-    sumua:float = get_sumua(amax_x_list, amax_y_list, amax_z_list)
-    #print(f'ua_list = {ua_list}')
-    #print(f'sumua = {sumua}')
-            
-    rs_2axes_py: float = process_recovery(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, snap_threshold_cal, number_failed_attempts, sa_2axes, sumua)
+
+    rs_2axes_py: float = process_recovery(file_path, r['jerk_threshold'], r['mean_jerk'], r['std_jerk'], r['jerk_threshold_cal'], r['snap_threshold_cal'], r['number_failed_attempts'], r['sa_2axes'], r['sumua'], sink)
 
     # display output_results in terminal
     print(f'results are:')
     print(f'file name: {file_path}')
-    print(f'jerk_threshold: {jerk_threshold}')
-    print(f'mean_jerk: {mean_jerk}')
-    print(f'std_jerk:{std_jerk}')
-    print(f'jerk_threshold_cal: {jerk_threshold_cal}')
-    print(f'snap_threshold_cal: {snap_threshold_cal}')
-    print(f'Number of failed attempts: {number_failed_attempts}')
-    print(f'sa_2axes= {sa_2axes}')
-    print(f'sumua= {sumua}')
+    print(f'jerk_threshold: {r["jerk_threshold"]}')
+    print(f'mean_jerk: {r["mean_jerk"]}')
+    print(f'std_jerk:{r["std_jerk"]}')
+    print(f'jerk_threshold_cal: {r["jerk_threshold_cal"]}')
+    print(f'snap_threshold_cal: {r["snap_threshold_cal"]}')
+    print(f'Number of failed attempts: {r["number_failed_attempts"]}')
+    print(f'sa_2axes= {r["sa_2axes"]}')
+    print(f'sumua= {r["sumua"]}')
     print(f'rs_2axes_py= {rs_2axes_py}')
+
+    if profiler is not None:
+        profiler.print_report()
+        profiler.write_json(os.path.join(profile_dir, os.path.basename(file_path) + '.json'))
+
+def parse_args() -> argparse.Namespace:
+    '''Parses the command line. Without arguments the script asks for a single case number'''
+    parser = argparse.ArgumentParser(description = 'Recovery Score calculations')
+    parser.add_argument('--batch', metavar = 'PATH', help = 'directory or glob pattern of case csv files to score in parallel')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes for --batch (default: number of CPUs)')
+    parser.add_argument('--monitor', metavar = 'SOURCE', help = "live feed to monitor: a csv file being appended to, '-' for stdin or tcp://host:port")
+    parser.add_argument('--sink', choices = ['csv', 'sqlite'], default = None, help = 'where results are logged: RS_output.csv (default) or the RS_output.db SQLite database')
+    parser.add_argument('--export-csv', metavar = 'FILE', help = 'writes the results logged in RS_output.db to a csv file and exits')
+    parser.add_argument('--profile', metavar = 'DIR', help = 'writes the per-stage timings and memory of each case to DIR (JSON, plus summary.json for --batch)')
+    parser.add_argument('--cprofile', action = 'store_true', help = 'adds the cProfile statistics of each stage to --profile')
+    parser.add_argument('--plot', metavar = 'DIR', help = 'saves the jerk and snap plot of each case to DIR instead of showing it (no display needed)')
+    parser.add_argument('--plot-format', choices = ['png', 'svg'], default = 'png', help = 'file format for --plot (default: png)')
+    parser.add_argument('--compact', action = 'store_true', help = 'float32 processing for long recordings: half the memory, jerk and snap thresholds logged per second instead of per nanosecond')
+    parser.add_argument('--export', metavar = 'DIR', help = 'writes the signals, jerk and snap, regions and per-attempt features of each case to Parquet files in DIR, partitioned by case (requires pyarrow)')
+    parser.add_argument('--stage-cache', metavar = 'DIR', help = 'reuses the Kalman filter and derivatives of earlier runs stored in DIR (shared by the --batch workers, least recently used entries removed beyond 2 GB)')
+    parser.add_argument('--time-format', default = None, help = 'strftime format of the timeStamp for --monitor (default: ISO 8601)')
+
+    return parser.parse_args()
  
 if __name__ == "__main__":
-    
-    main()
\ No newline at end of file
+
+    args: argparse.Namespace = parse_args()
+
+    if args.export_csv:
+        from CSV_helper import SQLite
+        SQLite.export_csv(args.export_csv)
+
+    elif args.batch:
+        from batch_helper import run_batch
+        run_batch(args.batch, args.workers, {'compact': args.compact, 'stage_cache_dir': args.stage_cache}, sink = args.sink, profile_dir = args.profile, cprofile = args.cprofile, plot_dir = args.plot, plot_format = args.plot_format, export_dir = args.export)
+
+    elif args.monitor:
+        from streaming_helper import run_monitor
+        run_monitor(args.monitor, time_format = args.time_format)
+
+    else:
+        main(args.sink, args.profile, args.cprofile, args.plot, args.plot_format, args.compact, args.export, args.stage_cache)
\ No newline at end of file
@@ -1,13 +1,13 @@
 # Recovery Score Calculations: output_results_helper Script
 # Script created  5/30/2024
-# Last revision 12/13/2024
+# Last revision 10/18/2026
 
 from recovery_score_helper import get_rs_ua, get_rs_sa
 from CSV_helper import add_sa, add_ua
 
-def process_recovery(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, threshold: float, number_failed_attempts: int, sa_2axes: float, sumua: float) -> float:
+def process_recovery(file_path: str, jerk_threshold: float, mean_jerk: float, std_jerk: float, jerk_threshold_cal: float, threshold: float, number_failed_attempts: int, sa_2axes: float, sumua: float, sink: str | None = None) -> float:
     '''Processes recovery scores depending whether it is one or more attempts and
-    Logs them to a CSV file.
+    Logs them to the results sink (CSV file by default).
 
     Args:
     file_path (str): The file path to the CSV file.
@@ -19,18 +19,36 @@ def process_recovery(file_path: str, jerk_threshold: float, mean_jerk: float, st
     number_failed_attempts (int): The number of failed attempts.
     sa_2axes (float): The value for sa_2axes.
     sumua (float): The value for sumua.
+    sink (str, optional): results sink, 'csv' or 'sqlite' (see CSV_helper.get_results_sink).
         
     Returns: 
     rs_2axes_py (float): Recovery Score (whether there was one or more than one attempts)
     '''
 
+    recovery_score: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
     if number_failed_attempts >= 1: 
-        recovery_score_ua: float = get_rs_ua(sumua)
-        add_ua(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, sumua, recovery_score_ua)        
-        return recovery_score_ua
+        add_ua(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, sumua, recovery_score, sink)        
             
     else:
-        recovery_score_sa: float = get_rs_sa(sa_2axes)
-        add_sa(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, recovery_score_sa)
-        return recovery_score_sa
-            
+        add_sa(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, recovery_score, sink)
+
+    return recovery_score
+
+def get_recovery_score(number_failed_attempts: int, sa_2axes: float, sumua: float) -> float:
+    '''Calculates the recovery score depending whether it is one or more attempts (without logging it)
+
+    Args:
+    number_failed_attempts (int): The number of failed attempts.
+    sa_2axes (float): The value for sa_2axes.
+    sumua (float): The value for sumua.
+
+    Returns:
+    float: Recovery Score (whether there was one or more than one attempts)
+    '''
+
+    if number_failed_attempts >= 1:
+        return get_rs_ua(sumua)
+
+    else:
+        return get_rs_sa(sa_2axes)
@@ -0,0 +1,59 @@
+# Recovery Score Calculations: parallel_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+def get_workers(workers: int | None = None) -> int:
+    '''Returns the number of threads to use
+
+    Args:
+        workers (int, optional): requested number of threads (None for one per CPU)
+
+    Returns:
+        int: number of threads (at least 1)
+    '''
+    if workers is None:
+        return os.cpu_count() or 1
+
+    return max(workers, 1)
+
+def split_range(n: int, parts: int) -> list[tuple[int, int]]:
+    '''Splits range(n) into at most 'parts' contiguous ranges of nearly equal length
+
+    Args:
+        n (int): length of the range
+        parts (int): number of ranges
+
+    Returns:
+        list[tuple[int, int]]: start (inclusive) and end (exclusive) of each non-empty range
+    '''
+    parts = max(min(parts, n), 1)
+    bounds: list[int] = [n * part // parts for part in range(parts + 1)]
+
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def run_threads(func: Callable, items: Iterable, workers: int | None = 1) -> list:
+    '''Calls func on each item, in threads when workers > 1. NumPy releases the GIL in its array loops,
+       so functions that spend their time in NumPy run concurrently. Each item must write to its own
+       part of any shared output, so the result does not depend on the number of threads.
+
+    Args:
+        func (Callable): function of one item
+        items (Iterable): arguments of each call
+        workers (int, optional): number of threads (1 runs in the calling thread, None uses one per CPU)
+
+    Returns:
+        list: result of each call, in order
+    '''
+    items = list(items)
+    workers = get_workers(workers)
+
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers = min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
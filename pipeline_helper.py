@@ -0,0 +1,373 @@
+# Recovery Score Calculations: pipeline_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import functools
+
+import numpy as np
+
+from acceleration_helper import get_max_accelerations_x, get_max_accelerations_y, get_max_accelerations_z, get_sa_2axes, get_sumua
+from attempt_detection_helper import get_attempts, set_jerk_threshold, set_snap_threshold, detect_region_intervals, intervals_to_indices
+from cache_helper import COMPACT_TIME_UNIT_NS, get_time_origin, load_recording
+from derivative_helper import calculate_derivatives_np, get_derivative_offset
+from feature_helper import extract_features, get_time_units
+from file_helper import initial_filter_np, moving_average
+from kalman_helper import kalman_filter
+from numpy.typing import NDArray
+from output_results_helper import get_recovery_score
+from profiling_helper import StageProfiler, profile_stage
+from region_helper import get_region_maxima
+from segment_helper import detect_segment_intervals, find_segments, merge_segments, process_segments
+from stage_cache_helper import MAX_CACHE_BYTES, StageCache, get_fingerprint, get_key, run_stage
+
+DEFAULT_PARAMETERS: dict = {
+    # acceleration threshold value to signal sternal recumbency for initial filter
+    'target_value': 9.0,
+
+    # variables for moving average filter
+    'target_moving_avg': 10, # moving average window_size (4)
+
+    # variables for Kalman filter
+    'process_variance': 1e-4, # Q
+    'measurement_variance': 1e-2, # R
+    'estimated_measurement_variance': 0.5, # P
+    'kalman_mode': 'exact', # 'exact' or 'steady' (steady-state gain once the gains are within kalman_tolerance of it, several times faster)
+    'kalman_tolerance': 1e-12,
+
+    # segmentation of damaged recordings: gaps longer than max_gap_factor sampling intervals, duplicated and backward
+    # timestamps split the recording into segments that are filtered and differentiated independently
+    'max_gap_factor': 5.0,
+    'min_segment_seconds': 1.0, # shorter segments are skipped
+    'segment_workers': 1, # threads for the segments
+    'filter_workers': 1, # threads for the filters of each recording or segment (None: one per CPU; same results for any value)
+
+    # derivative estimator: 'forward' differences, 'central' differences or 'savgol' (Savitzky-Golay smoothed)
+    'derivative_method': 'forward',
+
+    # variables for ROI_Derivative method
+    'factor': 30.0, # Factor to set jerk threshold (56.55)
+    'percentile': 99.0, # Percentile to set jerk threshold
+    'jerk_threshold': 1.0-5, #1.578626493498403e-08 #5.7209199129367875e-12  Threshold for significant jerk
+    'snap_threshold': 1, # Threshold for significant snap
+    'threshold_mode': 'exact', # 'exact' or 'streaming' (bounded memory, approximate percentile)
+    'sampling_rate': 200, # Sampling rate of the accelerometer200
+
+    # compact mode for long recordings: float32 accelerations, millisecond timestamps and jerk/snap in m/s^3 and m/s^4
+    # (half the memory; the thresholds scale with the units, so the regions and scores match the default mode within float32 precision)
+    'compact': False,
+
+    # stage cache: the Kalman filter and derivatives of each recording (or segment) are stored in this directory and
+    # reused by later runs with the same preprocessing parameters, e.g. when only the thresholds change (None: disabled)
+    'stage_cache_dir': None,
+    'stage_cache_bytes': MAX_CACHE_BYTES, # size cap, least recently used entries are removed beyond it
+}
+
+# Values returned by run_pipeline (besides file_path), as logged by output_results_helper.process_recovery
+RESULT_KEYS: list[str] = ['jerk_threshold', 'mean_jerk', 'std_jerk', 'jerk_threshold_cal', 'snap_threshold_cal', 'number_failed_attempts', 'sa_2axes', 'sumua', 'rs_2axes_py']
+
+def get_parameters(parameters: dict | None = None) -> dict:
+    '''Returns the default parameters updated with the given values
+
+    Args:
+        parameters (dict, optional): parameters that override DEFAULT_PARAMETERS
+
+    Returns:
+        dict: complete set of parameters
+    '''
+    unknown: set = set(parameters or {}) - set(DEFAULT_PARAMETERS)
+
+    if unknown:
+        raise KeyError(f'Unknown parameters: {sorted(unknown)}')
+
+    return {**DEFAULT_PARAMETERS, **(parameters or {})}
+
+def run_pipeline(file_path: str, parameters: dict | None = None, plot: bool = False, verbose: bool = True, profiler: StageProfiler | None = None, plot_file: str | None = None, features: bool = False, export_dir: str | None = None) -> dict:
+    '''Runs the full pipeline for one case: reading, filters, derivatives, detection of the
+       regions of interest and recovery score. Results are returned, not logged to the CSV file.
+
+    Args:
+        file_path (str): case number (file_name)
+        parameters (dict, optional): parameters that override DEFAULT_PARAMETERS
+        plot (bool): plots jerk and snap (blocks until the plot window is closed, unless plot_file is given)
+        verbose (bool): prints the progress of each stage
+        profiler (StageProfiler, optional): records the timings and memory of each stage
+        plot_file (str, optional): saves the jerk and snap plot to this file (.png or .svg) without a display
+        features (bool): adds the per-attempt feature table (see feature_helper.extract_features) under the 'features' key
+        export_dir (str, optional): writes the signals, the feature table and the results to Parquet files in this directory
+                                    (see export_helper.export_case)
+
+    Returns:
+        dict: file_path and the values logged by output_results_helper.process_recovery
+    '''
+    p: dict = get_parameters(parameters)
+    report = print if verbose else _silent
+
+    with profile_stage(profiler, 'load_signals') as stage:
+        recording: dict[str, NDArray] = load_signals(file_path, p['compact'])
+        stage.output(recording)
+    report('File read successfully...')
+
+    # Initial filter, Kalman filter and derivatives on NumPy arrays (no intermediate DataFrames)
+    with profile_stage(profiler, 'preprocess_signals', recording) as stage:
+        signals: dict[str, NDArray] = preprocess_signals(recording, p, profiler, get_stage_fingerprint(file_path, p))
+        stage.output(signals)
+    if 'segment_starts' in signals:
+        report(f'Recording split into {len(signals["segment_starts"])} segments at gaps, duplicated or backward timestamps')
+    report('Filters, Jerk and Snap calculated successfully')
+
+    with profile_stage(profiler, 'score_signals', signals):
+        results: dict = score_signals(signals, p, profiler = profiler, features = features or export_dir is not None)
+    report('Regions and recovery score calculated successfully')
+
+    if export_dir is not None:
+        # pyarrow is only needed for the export
+        from export_helper import export_case
+
+        with profile_stage(profiler, 'export'):
+            export_case(export_dir, file_path, signals, results, p['compact'], get_time_origin(file_path) if p['compact'] else 0)
+        report(f'Signals and attempts exported to {export_dir}')
+
+    if plot or plot_file:
+        # matplotlib and pandas are only needed for the plots
+        import pandas as pd
+
+        from graph_helper import get_plot_jerk_snap
+
+        # Aligned on the first jerk and snap sample (see filter_and_differentiate); the plots slice it by their length
+        time_stamp: NDArray[np.int64] = signals['timeStamp']
+
+        if p['compact']:
+            time_stamp = get_time_origin(file_path) + time_stamp * COMPACT_TIME_UNIT_NS
+
+        # Creates new DataFrame after applying avg filter with Acc_Z and timeStamp values only
+        df_avg = pd.DataFrame({
+            'timeStamp': time_stamp.view('datetime64[ns]'),
+            'Acc_Z': moving_average(signals['Acc_Z'], p['target_moving_avg'], p['filter_workers']),
+        })
+
+        # Plot jerk and snap with flagged spikes
+        get_plot_jerk_snap(signals['jerk'], signals['snap'], intervals_to_indices(results['region_starts'], results['region_ends']), df_avg, plot_file)
+
+    if features:
+        return {'file_path': file_path, **{key: results[key] for key in RESULT_KEYS}, 'features': results['features']}
+
+    return {'file_path': file_path, **{key: results[key] for key in RESULT_KEYS}}
+
+def load_signals(file_path: str, compact: bool = False) -> dict[str, NDArray]:
+    '''Loads the timeStamp (int64 epoch nanoseconds) and Acc_X, Acc_Y, Acc_Z columns of a case (memory-mapped from the cache)
+
+    Args:
+        file_path (str): case number (file_name)
+        compact (bool): loads the compact cache (float32 accelerations, timeStamp in milliseconds from the first sample)
+
+    Returns:
+        dict[str, NDArray]: one array per column
+    '''
+    try:
+        recording: dict[str, NDArray] = load_recording(file_path, compact = compact)
+
+    except Exception as e:
+        raise ValueError(f'Failed to load recording for case {file_path}: {e}') from e
+
+    if len(recording['timeStamp']) == 0:
+        raise ValueError(f'Recording for case {file_path} is empty')
+
+    return recording
+
+def get_stage_fingerprint(file_path: str, parameters: dict) -> str | None:
+    '''Fingerprint of the recording of a case for the stage cache (see stage_cache_helper.get_fingerprint)
+
+    Args:
+        file_path (str): case number (file_name)
+        parameters (dict): pipeline parameters (see DEFAULT_PARAMETERS)
+
+    Returns:
+        str | None: fingerprint, or None when the stage cache is disabled
+    '''
+    if parameters['stage_cache_dir'] is None:
+        return None
+
+    return get_fingerprint(file_path, parameters['compact'])
+
+def preprocess_signals(recording: dict[str, NDArray], parameters: dict, profiler: StageProfiler | None = None, fingerprint: str | None = None) -> dict[str, NDArray]:
+    '''Fused preprocessing stage: initial filter, Kalman filter and derivatives computed directly on NumPy arrays.
+       The initial filter only slices (views of the raw columns, no copy). Only the signals used downstream are
+       materialised: the Kalman filtered Acc_Z, jerk and snap. The moving average does not feed the score and
+       is only computed for plots.
+
+       Recordings with gaps, duplicated or backward timestamps are split into segments (segment_helper.find_segments)
+       that are filtered and differentiated independently, possibly in threads, and then concatenated (a copy).
+
+    Args:
+        recording (dict[str, NDArray]): timeStamp, Acc_X, Acc_Y and Acc_Z arrays
+        parameters (dict): pipeline parameters (see DEFAULT_PARAMETERS)
+        profiler (StageProfiler, optional): records the timings and memory of each stage
+        fingerprint (str, optional): fingerprint of the recording (see get_stage_fingerprint): the Kalman filter and
+                                     derivatives are read from and written to the stage cache
+
+    Returns:
+        dict[str, NDArray]: timeStamp, Acc_X, Acc_Y, Acc_Z (from the start index on), Acc_Z_kalman, jerk and snap,
+        plus segment_starts when the recording was split (see segment_helper.merge_segments)
+    '''
+    # Values are ignored until Acc_Z reaches 'target_value' signaling horse getting onto sternal recumbency
+    with profile_stage(profiler, 'initial_filter', recording['Acc_Z']):
+        signals: dict[str, NDArray] = initial_filter_np({column: recording[column] for column in ('timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z')}, parameters['target_value'])
+
+    # A segment must hold a few samples more than the derivative stencil
+    min_samples: int = max(int(parameters['min_segment_seconds'] * parameters['sampling_rate']), 2 * get_derivative_offset(parameters['derivative_method']) + 3)
+
+    with profile_stage(profiler, 'find_segments', signals['timeStamp']) as stage:
+        segment_starts, segment_ends = find_segments(signals['timeStamp'], parameters['max_gap_factor'], min_samples)
+        stage.output(segment_starts, segment_ends)
+
+    if len(segment_starts) == 0:
+        raise ValueError('No part of the recording is long enough to be scored')
+
+    if len(segment_starts) == 1:
+        # Intact recording: processed in place
+        start, end = int(segment_starts[0]), int(segment_ends[0])
+
+        return filter_and_differentiate({column: values[start:end] for column, values in signals.items()}, parameters, profiler, fingerprint)
+
+    with profile_stage(profiler, 'process_segments', signals['Acc_Z']) as stage:
+        segments: list[dict[str, NDArray]] = process_segments(functools.partial(filter_and_differentiate, parameters = parameters, fingerprint = fingerprint), signals, segment_starts, segment_ends, parameters['segment_workers'])
+        signals = merge_segments(segments)
+        stage.output(signals)
+
+    return signals
+
+def filter_and_differentiate(signals: dict[str, NDArray], parameters: dict, profiler: StageProfiler | None = None, fingerprint: str | None = None) -> dict[str, NDArray]:
+    '''Kalman filter and derivatives of a contiguous recording (or segment).
+       In compact mode (parameters['compact']) the signals are float32 and jerk and snap are per second
+       instead of per nanosecond. The central and Savitzky-Golay derivatives start a few samples into the
+       signal, so the other signals are sliced (views) to stay aligned with jerk and snap.
+
+       With a fingerprint and parameters['stage_cache_dir'], both stages go through the stage cache: the Kalman
+       filter is keyed by the segment (first and last timestamps and length within the recording) and its
+       variances, the derivatives by the Kalman key and the method. Cached outputs are read-only memory maps.
+
+    Args:
+        signals (dict[str, NDArray]): timeStamp, Acc_X, Acc_Y and Acc_Z arrays
+        parameters (dict): pipeline parameters (see DEFAULT_PARAMETERS)
+        profiler (StageProfiler, optional): records the timings and memory of each stage
+        fingerprint (str, optional): fingerprint of the recording the signals come from (see get_stage_fingerprint)
+
+    Returns:
+        dict[str, NDArray]: the input signals plus Acc_Z_kalman, jerk and snap
+    '''
+    dtype = np.float32 if parameters['compact'] else np.float64
+    time_unit: float = COMPACT_TIME_UNIT_NS * 1e-9 if parameters['compact'] else 1.0
+
+    cache: StageCache | None = None
+    if fingerprint is not None and parameters['stage_cache_dir'] is not None:
+        cache = StageCache(parameters['stage_cache_dir'], parameters['stage_cache_bytes'])
+        fingerprint = get_key('segment', fingerprint, {'first': int(signals['timeStamp'][0]), 'last': int(signals['timeStamp'][-1]), 'samples': len(signals['timeStamp'])})
+
+    kalman_parameters: dict = {key: parameters[key] for key in ('compact', 'process_variance', 'measurement_variance', 'estimated_measurement_variance', 'kalman_mode', 'kalman_tolerance')}
+
+    with profile_stage(profiler, 'kalman_filter', signals['Acc_Z']) as stage:
+        kalman_key, kalman = run_stage(cache, 'kalman_filter', fingerprint, kalman_parameters, lambda: {
+            'Acc_Z_kalman': kalman_filter(signals['Acc_Z'], parameters['process_variance'], parameters['measurement_variance'], parameters['estimated_measurement_variance'], dtype, parameters['filter_workers'], parameters['kalman_mode'], parameters['kalman_tolerance']),
+        })
+        signals['Acc_Z_kalman'] = kalman['Acc_Z_kalman']
+        stage.output(signals['Acc_Z_kalman'])
+
+    # Calculates first and second derivatives (jerk and snap) from the Kalman filtered Acc_Z
+    with profile_stage(profiler, 'calculate_derivatives', signals['Acc_Z_kalman'], signals['timeStamp']) as stage:
+        _, derivatives = run_stage(cache, 'calculate_derivatives', kalman_key, {'derivative_method': parameters['derivative_method']}, lambda: dict(zip(
+            ('jerk', 'snap'), calculate_derivatives_np(signals['Acc_Z_kalman'], signals['timeStamp'], time_unit, dtype, parameters['derivative_method']),
+        )))
+        signals['jerk'], signals['snap'] = derivatives['jerk'], derivatives['snap']
+        stage.output(signals['jerk'], signals['snap'])
+
+    # Region indices refer to jerk and snap: the signals start on the sample of their first value
+    offset: int = get_derivative_offset(parameters['derivative_method'])
+    if offset:
+        for column in ('timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z', 'Acc_Z_kalman'):
+            signals[column] = signals[column][offset:]
+
+    return signals
+
+def calculate_thresholds(signals: dict[str, NDArray], parameters: dict) -> dict:
+    '''Sets the Jerk and Snap thresholds and calculates mean Jerk to be able to re calibrate the threshold
+
+    Args:
+        signals (dict[str, NDArray]): output of preprocess_signals
+        parameters (dict): pipeline parameters (see DEFAULT_PARAMETERS)
+
+    Returns:
+        dict: mean_jerk, std_jerk, jerk_threshold_cal and snap_threshold_cal
+    '''
+    mean_jerk, std_jerk, jerk_threshold_cal = set_jerk_threshold(signals['jerk'], parameters['factor'], parameters['percentile'], parameters['threshold_mode'])
+    mean_snap, std_snap, snap_threshold_cal = set_snap_threshold(signals['snap'], parameters['factor'], parameters['percentile'], parameters['threshold_mode'])
+
+    return {
+        'mean_jerk': float(mean_jerk),
+        'std_jerk': float(std_jerk),
+        'jerk_threshold_cal': float(jerk_threshold_cal),
+        'snap_threshold_cal': float(snap_threshold_cal),
+    }
+
+def score_signals(signals: dict[str, NDArray], parameters: dict, thresholds: dict | None = None, profiler: StageProfiler | None = None, features: bool = False) -> dict:
+    '''Regions of interest, per-attempt max accelerations and recovery score
+
+    Args:
+        signals (dict[str, NDArray]): output of preprocess_signals
+        parameters (dict): pipeline parameters (see DEFAULT_PARAMETERS)
+        thresholds (dict, optional): output of calculate_thresholds (calculated if None)
+        profiler (StageProfiler, optional): records the timings and memory of each stage
+        features (bool): also extracts the per-attempt feature table (see feature_helper.extract_features)
+
+    Returns:
+        dict: the RESULT_KEYS values plus region_starts and region_ends (and features)
+    '''
+    if thresholds is None:
+        with profile_stage(profiler, 'calculate_thresholds', signals['jerk'], signals['snap']):
+            thresholds = calculate_thresholds(signals, parameters)
+
+    # Detect regions in the jerk and snap signals (within each segment of a split recording)
+    with profile_stage(profiler, 'detect_regions', signals['jerk'], signals['snap']) as stage:
+        if 'segment_starts' in signals:
+            region_starts, region_ends = detect_segment_intervals(signals['jerk'], signals['snap'], signals['segment_starts'], thresholds['jerk_threshold_cal'], thresholds['snap_threshold_cal'], parameters['sampling_rate'])
+        else:
+            region_starts, region_ends = detect_region_intervals(signals['jerk'], signals['snap'], thresholds['jerk_threshold_cal'], thresholds['snap_threshold_cal'], parameters['sampling_rate'])
+        stage.output(region_starts, region_ends)
+
+    # One region per attempt: the last one is the successful attempt
+    number_failed_attempts: int = get_attempts(region_starts)
+
+    # Extract the max acceleration of each attempt for each axis
+    with profile_stage(profiler, 'region_maxima', region_starts, region_ends) as stage:
+        roi_values: dict[str, NDArray[np.float64]] = {axis: get_region_maxima(signals[axis], region_starts, region_ends) for axis in ('Acc_Z', 'Acc_X', 'Acc_Y')}
+        stage.output(roi_values)
+
+    with profile_stage(profiler, 'recovery_score', roi_values):
+        amax_x_list: list[float] = get_max_accelerations_x(roi_values)
+        amax_y_list: list[float] = get_max_accelerations_y(roi_values)
+        amax_z_list: list[float] = get_max_accelerations_z(roi_values)
+
+        sa_2axes: float = get_sa_2axes(amax_x_list, amax_y_list)
+        sumua: float = get_sumua(amax_x_list, amax_y_list, amax_z_list)
+
+    results: dict = {
+        'jerk_threshold': parameters['jerk_threshold'],
+        **thresholds,
+        'number_failed_attempts': number_failed_attempts,
+        'sa_2axes': float(sa_2axes),
+        'sumua': float(sumua),
+        'rs_2axes_py': float(get_recovery_score(number_failed_attempts, sa_2axes, sumua)),
+        'region_starts': region_starts,
+        'region_ends': region_ends,
+    }
+
+    if features:
+        time_unit, derivative_unit = get_time_units(parameters['compact'])
+
+        with profile_stage(profiler, 'extract_features', region_starts, region_ends) as stage:
+            results['features'] = extract_features(signals, region_starts, region_ends, time_unit, derivative_unit)
+            stage.output(results['features'])
+
+    return results
+
+def _silent(*args, **kwargs) -> None:
+    '''Replaces print when the pipeline runs with verbose = False'''
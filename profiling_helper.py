@@ -0,0 +1,285 @@
+# Recovery Score Calculations: profiling_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource # not available on Windows
+
+except ImportError:
+    resource = None
+
+# Number of functions kept per stage from the cProfile statistics (sorted by cumulative time)
+TOP_FUNCTIONS: int = 15
+
+class StageProfiler:
+    '''Collects per-stage measurements of one pipeline run: wall time, CPU time, peak traced memory (tracemalloc),
+       peak resident set size of the process, input/output sizes and, optionally, the cProfile statistics of the
+       outermost stages. Stages may be nested; each one reports its own totals (the parent includes its children).
+
+       Usage:
+           profiler = StageProfiler('cases/3812')
+           with profiler.stage('kalman_filter', acc_z) as stage:
+               acc_z_kalman = kalman_filter(acc_z, ...)
+               stage.output(acc_z_kalman)
+           profiler.write_json('profiles/3812.json')
+    '''
+
+    def __init__(self, case: str, memory: bool = True, cprofile: bool = False) -> None:
+        '''
+        Args:
+            case (str): case number (file_name)
+            memory (bool): traces Python and NumPy allocations with tracemalloc (slows pure Python code down)
+            cprofile (bool): runs cProfile on the outermost stages
+        '''
+        self.case: str = case
+        self.memory: bool = memory
+        self.cprofile: bool = cprofile
+        self.started: str = datetime.now().isoformat(timespec = 'seconds')
+        self.stages: list[dict] = []
+        self._stack: list[dict] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, *inputs):
+        '''Measures the code run inside the with block
+
+        Args:
+            name (str): name of the stage
+            *inputs: objects processed by the stage (only their size is recorded)
+
+        Yields:
+            Stage: call stage.output(*objects) to record the size of the stage outputs
+        '''
+        record: dict = {'stage': name, 'depth': len(self._stack), 'input_bytes': get_size(*inputs), 'output_bytes': None}
+        current: Stage = Stage(record)
+
+        started_tracing: bool = self.memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        if self.memory:
+            start_memory: int = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            record['_child_peak'] = 0
+
+        profiler: cProfile.Profile | None = cProfile.Profile() if self.cprofile and not self._stack else None
+
+        self._stack.append(record)
+        self.stages.append(record)
+
+        start_wall: float = time.perf_counter()
+        start_cpu: float = time.process_time()
+
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield current
+
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+            record['wall_s'] = time.perf_counter() - start_wall
+            record['cpu_s'] = time.process_time() - start_cpu
+            self._stack.pop()
+
+            if self.memory:
+                # reset_peak in a nested stage hides its peak from the parent, so children report theirs back
+                peak: int = max(tracemalloc.get_traced_memory()[1], record.pop('_child_peak'))
+                record['peak_memory_bytes'] = peak - start_memory
+                if self._stack:
+                    self._stack[-1]['_child_peak'] = max(self._stack[-1]['_child_peak'], peak)
+
+            if started_tracing:
+                tracemalloc.stop()
+
+            record['max_rss_bytes'] = get_max_rss()
+
+            if profiler is not None:
+                record['functions'] = get_top_functions(profiler)
+
+    def total_wall(self) -> float:
+        '''Wall time of the outermost stages'''
+        return sum(record['wall_s'] for record in self.stages if record['depth'] == 0)
+
+    def to_dict(self) -> dict:
+        '''Returns the run as a JSON serializable dictionary'''
+        return {'case': self.case, 'started': self.started, 'total_wall_s': self.total_wall(), 'stages': self.stages}
+
+    def write_json(self, file_path: str) -> None:
+        '''Writes the run to a JSON file
+
+        Args:
+            file_path (str): path of the JSON file (parent directories are created)
+        '''
+        write_json(self.to_dict(), file_path)
+
+    def print_report(self) -> None:
+        '''Prints one line per stage'''
+        print_stages(self.stages)
+
+class Stage:
+    '''Handle of the stage being measured (see StageProfiler.stage)'''
+
+    def __init__(self, record: dict | None = None) -> None:
+        self.record: dict | None = record
+
+    def output(self, *outputs) -> None:
+        '''Records the size of the stage outputs
+
+        Args:
+            *outputs: objects produced by the stage
+        '''
+        if self.record is not None:
+            self.record['output_bytes'] = get_size(*outputs)
+
+def profile_stage(profiler: StageProfiler | None, name: str, *inputs):
+    '''Returns profiler.stage(name, *inputs), or a context manager that measures nothing if there is no profiler
+
+    Args:
+        profiler (StageProfiler or None): profiler of the run
+        name (str): name of the stage
+        *inputs: objects processed by the stage
+
+    Returns:
+        context manager yielding a Stage
+    '''
+    if profiler is None:
+        return contextlib.nullcontext(Stage())
+
+    return profiler.stage(name, *inputs)
+
+def get_size(*objects) -> int | None:
+    '''Size in bytes of arrays, DataFrames and dicts/lists/tuples of them (None if there is nothing to measure)
+
+    Args:
+        *objects: objects to measure
+
+    Returns:
+        int or None: total size in bytes
+    '''
+    total: int | None = None
+
+    for obj in objects:
+        if isinstance(obj, np.ndarray):
+            size: int | None = obj.nbytes
+
+        elif hasattr(obj, 'memory_usage'): # pandas DataFrame or Series
+            size = int(np.sum(obj.memory_usage(deep = True)))
+
+        elif isinstance(obj, dict):
+            size = get_size(*obj.values())
+
+        elif isinstance(obj, (list, tuple)):
+            size = get_size(*obj)
+
+        else:
+            size = None
+
+        if size is not None:
+            total = (total or 0) + size
+
+    return total
+
+def get_max_rss() -> int | None:
+    '''Peak resident set size of the process in bytes (None where the resource module is not available)'''
+    if resource is None:
+        return None
+
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on Linux, bytes on macOS
+    return max_rss if os.uname().sysname == 'Darwin' else max_rss * 1024
+
+def get_top_functions(profiler: cProfile.Profile, limit: int = TOP_FUNCTIONS) -> list[dict]:
+    '''Most expensive functions of a cProfile run
+
+    Args:
+        profiler (cProfile.Profile): finished profiler
+        limit (int): number of functions to keep
+
+    Returns:
+        list[dict]: function, calls, tottime_s and cumtime_s, sorted by cumulative time
+    '''
+    stats: pstats.Stats = pstats.Stats(profiler)
+    rows: list[dict] = []
+
+    for (file_name, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'function': f'{os.path.basename(file_name)}:{line}({function})', 'calls': calls, 'tottime_s': tottime, 'cumtime_s': cumtime})
+
+    rows.sort(key = lambda row: row['cumtime_s'], reverse = True)
+
+    return rows[:limit]
+
+def aggregate_profiles(profiles: list[dict]) -> dict:
+    '''Aggregates the runs of a batch per stage
+
+    Args:
+        profiles (list[dict]): outputs of StageProfiler.to_dict
+
+    Returns:
+        dict: number of runs, total wall time and, per stage, the count, total/mean/max wall time,
+              total CPU time, max peak memory and max input size
+    '''
+    stages: dict[str, dict] = {}
+
+    for profile in profiles:
+        for record in profile['stages']:
+            summary: dict = stages.setdefault(record['stage'], {'stage': record['stage'], 'depth': record['depth'], 'count': 0, 'wall_s': 0.0, 'max_wall_s': 0.0, 'cpu_s': 0.0, 'max_peak_memory_bytes': None, 'max_input_bytes': None})
+            summary['count'] += 1
+            summary['wall_s'] += record['wall_s']
+            summary['max_wall_s'] = max(summary['max_wall_s'], record['wall_s'])
+            summary['cpu_s'] += record['cpu_s']
+
+            for key, summary_key in (('peak_memory_bytes', 'max_peak_memory_bytes'), ('input_bytes', 'max_input_bytes')):
+                if record.get(key) is not None:
+                    summary[summary_key] = max(summary[summary_key] or 0, record[key])
+
+    for summary in stages.values():
+        summary['mean_wall_s'] = summary['wall_s'] / summary['count']
+
+    return {'runs': len(profiles), 'total_wall_s': sum(profile['total_wall_s'] for profile in profiles), 'stages': list(stages.values())}
+
+def print_stages(stages: list[dict]) -> None:
+    '''Prints one line per stage (per-run records or aggregated summaries)
+
+    Args:
+        stages (list[dict]): 'stages' of StageProfiler.to_dict or aggregate_profiles
+    '''
+    print(f'{"stage":<28}{"wall (s)":>10}{"cpu (s)":>10}{"peak (MB)":>11}{"in (MB)":>10}')
+
+    for record in stages:
+        peak: int | None = record.get('peak_memory_bytes', record.get('max_peak_memory_bytes'))
+        size: int | None = record.get('input_bytes', record.get('max_input_bytes'))
+        name: str = '  ' * record['depth'] + record['stage']
+
+        print(f'{name:<28}{record["wall_s"]:>10.3f}{record["cpu_s"]:>10.3f}{_megabytes(peak):>11}{_megabytes(size):>10}')
+
+def write_json(data: dict, file_path: str) -> None:
+    '''Writes a profile or an aggregated summary to a JSON file
+
+    Args:
+        data (dict): data to write
+        file_path (str): path of the JSON file (parent directories are created)
+    '''
+    directory: str = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok = True)
+
+    with open(file_path, 'w') as f:
+        json.dump(data, f, indent = 2)
+
+def _megabytes(size: int | None) -> str:
+    return '-' if size is None else f'{size / 1e6:.1f}'
@@ -1,8 +1,16 @@
 # Recovery Score Calculations: Calculation helper
 # Script created  3/25/2024
-# Last revision 4/9/2025
+# Last revision 10/18/2026
 
-import pandas as pd
+from __future__ import annotations
+
+import numpy as np
+
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 def extract_roi_values(df: pd.DataFrame, roi_indices: list) -> pd.DataFrame:
     '''Extracts the values within each region of interest (ROI) for each specified axis from the DataFrame.
@@ -12,17 +20,65 @@ def extract_roi_values(df: pd.DataFrame, roi_indices: list) -> pd.DataFrame:
         roi_indices (list): List containing the indices of regions of interest.
        
     Returns:
-        pd.DataFrame: DataFrame containing the values within each ROI for each axis.
+        pd.DataFrame: DataFrame containing the values within each ROI for each axis (copies the ROI rows only).
     '''
     
     axes: list[str] = ['Acc_Z', 'Acc_X', 'Acc_Y'] # List of axis names to extract values for
-    roi_values: dict = {axis: [] for axis in axes}
-    roi_values['ROI_Index'] = []
 
-    for index in roi_indices:
-        for axis in axes:
-            roi_values[axis].append(df[axis].iloc[index])
-        roi_values['ROI_Index'].append(index)
+    roi_values: pd.DataFrame = df[axes].iloc[list(roi_indices)].reset_index(drop = True)
+    roi_values['ROI_Index'] = list(roi_indices)
+
+    return roi_values
+
+def extract_region_maxima(df: pd.DataFrame, region_starts: NDArray[np.int64], region_ends: NDArray[np.int64]) -> pd.DataFrame:
+    '''Extracts the maximum absolute acceleration on each axis within each region of interest (one row per attempt).
+
+    Args:
+        df (pd.DataFrame): The input DataFrame containing the Acc_Z, Acc_X and Acc_Y columns.
+        region_starts (NDArray[np.int64]): start index (inclusive) of each region, sorted.
+        region_ends (NDArray[np.int64]): end index (exclusive) of each region.
+
+    Returns:
+        pd.DataFrame: DataFrame with the max |Acc_Z|, |Acc_X| and |Acc_Y| of each region and its start and end index.
+    '''
+    axes: list[str] = ['Acc_Z', 'Acc_X', 'Acc_Y']
+
+    maxima: NDArray[np.float64] = get_region_maxima(df[axes].to_numpy(dtype = np.float64), region_starts, region_ends)
+
+    import pandas as pd
+
+    region_values: pd.DataFrame = pd.DataFrame(maxima, columns = axes)
+    region_values['Region_Start'] = region_starts
+    region_values['Region_End'] = region_ends
+
+    return region_values
+
+def get_region_maxima(acc: NDArray[np.float64], region_starts: NDArray[np.int64], region_ends: NDArray[np.int64]) -> NDArray[np.float64]:
+    '''Calculates the maximum absolute value of each column within each region in a single vectorized reduction.
+       max |a| = max(max a, -min a), so no absolute copy of the whole signal is needed: acc is only read
+       (views and np.memmap arrays are fine) and only the per-region result is allocated.
+
+    Args:
+        acc (NDArray[np.float64]): signal, shape (n,) or (n, m) with one column per axis
+        region_starts (NDArray[np.int64]): start index (inclusive) of each region, sorted and non-overlapping
+        region_ends (NDArray[np.int64]): end index (exclusive) of each region
+
+    Returns:
+        NDArray[np.float64]: max absolute value per region (and column), shape (number of regions,) or (number of regions, m)
+    '''
+    if len(region_starts) == 0:
+        return np.empty((0,) + acc.shape[1:], dtype = np.float64)
+
+    # reduceat reduces acc[bounds[i]:bounds[i + 1]], so every other slice is a region
+    bounds: NDArray[np.int64] = np.empty(2 * len(region_starts), dtype = np.int64)
+    bounds[0::2] = region_starts
+    bounds[1::2] = region_ends
+
+    # The last end may be the length of the signal, which reduceat does not accept
+    if bounds[-1] >= len(acc):
+        bounds = bounds[:-1]
 
-    return pd.DataFrame(roi_values)
+    region_max: NDArray[np.float64] = np.maximum.reduceat(acc, bounds, axis = 0)[0::2]
+    region_min: NDArray[np.float64] = np.minimum.reduceat(acc, bounds, axis = 0)[0::2]
 
+    return np.maximum(region_max, -region_min)
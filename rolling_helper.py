@@ -0,0 +1,209 @@
+# Recovery Score Calculations: rolling_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+
+from numpy.typing import NDArray
+from parallel_helper import run_threads
+
+# Statistics computed by rolling
+STATISTICS: tuple[str, ...] = ('mean', 'std', 'min', 'max', 'energy')
+
+# Number of samples (roughly) processed at once: temporary memory is bounded by it
+CHUNK_SIZE: int = 1_000_000
+
+def rolling(values: NDArray[np.float64], window: int, statistics: str | tuple[str, ...] = 'mean', step: int = 1, partial: bool = True, workers: int | None = 1) -> NDArray[np.float64] | dict[str, NDArray[np.float64]]:
+    '''Rolling-window statistics in O(n) for any window length: mean and energy from running sums (restarted every
+       chunk and taken from the first value of the chunk, so rounding errors do not grow with the recording), std from
+       running sums restarted every block of the window length (see _block_variance), min and max with the
+       van Herk/Gil-Werman block method. Several statistics of the same windows share one pass.
+       Only the windows of the outputs are evaluated: with step > 1 the skipped windows are never computed.
+
+    Args:
+        values (NDArray[np.float64]): signal, shape (n,) or (n, m) with one column per axis (any float array or view, including np.memmap).
+                                      The columns are processed one after the other within each chunk
+        window (int): window size in samples
+        statistics (str | tuple[str, ...]): one or several of STATISTICS. 'std' is the population standard deviation
+                                            (same as np.std) and 'energy' the sum of the squared values
+        step (int): number of samples between consecutive outputs
+        partial (bool): True for trailing windows ending on samples 0, step, 2 * step, ... (shorter windows at the start,
+                        same as rolling(window, min_periods=1) in pandas); False for full windows starting on samples
+                        0, step, 2 * step, ... (output k covers values[k * step:k * step + window])
+        workers (int, optional): number of threads over the chunks (None for one per CPU). The result does not depend on it
+
+    Returns:
+        NDArray[np.float64] | dict[str, NDArray[np.float64]]: float64 array of shape (outputs,) or (outputs, m) for a
+        single statistic, or one such array per statistic
+    '''
+    names: tuple[str, ...] = (statistics,) if isinstance(statistics, str) else tuple(statistics)
+
+    unknown: set = set(names) - set(STATISTICS)
+    if unknown:
+        raise ValueError(f'Unknown statistics: {sorted(unknown)} (expected some of {STATISTICS})')
+
+    if window < 1 or step < 1:
+        raise ValueError(f'window and step must be 1 or more, not {window} and {step}')
+
+    outputs: int = count_windows(len(values), window, step, partial)
+    # Column-major results: every axis is computed and stored as a contiguous column
+    results: dict[str, NDArray[np.float64]] = {name: np.empty((outputs,) + values.shape[1:], dtype = np.float64, order = 'F') for name in names}
+
+    # Chunks of outputs spanning about CHUNK_SIZE samples
+    outputs_per_chunk: int = max(CHUNK_SIZE // step, 1)
+    run_threads(lambda first: _rolling_chunk(values, window, step, partial, first, min(first + outputs_per_chunk, outputs), results), range(0, outputs, outputs_per_chunk), workers)
+
+    return results[statistics] if isinstance(statistics, str) else results
+
+def count_windows(n: int, window: int, step: int = 1, partial: bool = True) -> int:
+    '''Returns the number of outputs of rolling
+
+    Args:
+        n (int): number of samples
+        window (int): window size in samples
+        step (int): number of samples between consecutive outputs
+        partial (bool): trailing windows with shorter windows at the start, or full windows only (see rolling)
+
+    Returns:
+        int: number of windows
+    '''
+    samples: int = n if partial else max(n - window + 1, 0)
+
+    return -(-samples // step)
+
+def get_window_bounds(window: int, step: int, partial: bool, first: int, last: int, low: int = 0) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    '''Returns the sample range of the output windows first to last - 1 of rolling
+
+    Args:
+        window (int): window size in samples
+        step (int): number of samples between consecutive outputs
+        partial (bool): trailing windows with shorter windows at the start, or full windows only (see rolling)
+        first (int): first output
+        last (int): last output (exclusive)
+        low (int): sample the bounds are relative to (at most the start of the first window)
+
+    Returns:
+        tuple[NDArray[np.int64], NDArray[np.int64]]: start (inclusive) and end (exclusive) sample of each window
+    '''
+    if partial:
+        ends: NDArray[np.int64] = np.arange(first * step + 1 - low, (last - 1) * step + 2 - low, step, dtype = np.int64)
+        return np.maximum(ends - window, -low), ends
+
+    starts: NDArray[np.int64] = np.arange(first * step - low, (last - 1) * step + 1 - low, step, dtype = np.int64)
+
+    return starts, starts + window
+
+def _rolling_chunk(values: NDArray[np.float64], window: int, step: int, partial: bool, first: int, last: int, results: dict[str, NDArray[np.float64]]) -> None:
+    '''Computes the outputs first to last - 1 of rolling from the samples they cover and writes them into results'''
+    if values.ndim > 1:
+        for column in range(values.shape[1]):
+            _rolling_chunk(values[:, column], window, step, partial, first, last, {name: result[:, column] for name, result in results.items()})
+        return
+
+    # Window bounds relative to the first sample read by the chunk
+    low: int = max(first * step + 1 - window, 0) if partial else first * step
+    chunk_starts, chunk_ends = get_window_bounds(window, step, partial, first, last, low)
+    high: int = low + int(chunk_ends[-1])
+
+    # Only the partial windows at the start are shorter than the window
+    counts: NDArray[np.int64] | int = window
+    if partial and first * step + 1 < window:
+        counts = chunk_ends - chunk_starts
+
+    if {'mean', 'energy'} & set(results):
+        # sums of the deviations from the first value stay small, which keeps the differences accurate
+        offset: float = float(values[low])
+        deviations: NDArray[np.float64] = np.subtract(values[low:high], offset, dtype = np.float64)
+
+        sums: NDArray[np.float64] = np.zeros(high - low + 1, dtype = np.float64)
+        np.cumsum(deviations, out = sums[1:])
+        window_sums: NDArray[np.float64] = sums[chunk_ends] - sums[chunk_starts]
+
+        if 'mean' in results:
+            results['mean'][first:last] = offset + window_sums / counts
+
+        if 'energy' in results:
+            # sum((d + offset) ** 2) = sum(d ** 2) + 2 * offset * sum(d) + count * offset ** 2
+            np.square(deviations, out = deviations)
+            np.cumsum(deviations, out = sums[1:])
+            window_squares: NDArray[np.float64] = sums[chunk_ends] - sums[chunk_starts]
+            results['energy'][first:last] = window_squares + 2 * offset * window_sums + counts * offset ** 2
+
+    if 'std' in results:
+        results['std'][first:last] = np.sqrt(np.maximum(_block_variance(values[low:high], window, chunk_starts, chunk_ends, counts), 0))
+
+    for name, reduce in (('min', np.minimum), ('max', np.maximum)):
+        if name in results:
+            results[name][first:last] = _block_extremes(values[low:high], window, chunk_ends, reduce)
+
+def _block_variance(values: NDArray[np.float64], window: int, starts: NDArray[np.int64], ends: NDArray[np.int64], counts: NDArray[np.int64] | int) -> NDArray[np.float64]:
+    '''Population variance of each window from running sums restarted every block of the window length.
+       The sums of a block run over the block and the next one (every window starting in the block ends there) and
+       are taken from the first value of the block, so they cover at most 2 * window samples close to the window:
+       the difference of the sums of squares and the squared sum does not lose the variance to rounding errors,
+       even for short windows of a signal that drifts far from the first value of the chunk.
+
+    Args:
+        values (NDArray[np.float64]): samples covered by the windows
+        window (int): window size in samples
+        starts (NDArray[np.int64]): start (inclusive) of each window in values
+        ends (NDArray[np.int64]): end (exclusive) of each window in values, at most 'window' samples after its start
+        counts (NDArray[np.int64] | int): number of samples of each window
+
+    Returns:
+        NDArray[np.float64]: variance of each window (may be slightly negative when it is 0)
+    '''
+    n_blocks: int = -(-len(values) // window)
+
+    # Each row holds a block and the next one (padded with the last value)
+    padded: NDArray[np.float64] = np.empty((n_blocks + 1) * window, dtype = np.float64)
+    padded[:len(values)] = values
+    padded[len(values):] = values[-1]
+    pairs: NDArray[np.float64] = np.lib.stride_tricks.sliding_window_view(padded, 2 * window)[::window]
+
+    deviations: NDArray[np.float64] = pairs - padded[:n_blocks * window:window, np.newaxis]
+    sums: NDArray[np.float64] = np.zeros((n_blocks, 2 * window + 1), dtype = np.float64)
+
+    # Block of each window and its bounds in the row of the block
+    blocks: NDArray[np.int64] = starts // window
+    row_starts: NDArray[np.int64] = starts - blocks * window
+    row_ends: NDArray[np.int64] = ends - blocks * window
+
+    np.cumsum(deviations, axis = 1, out = sums[:, 1:])
+    window_sums: NDArray[np.float64] = sums[blocks, row_ends] - sums[blocks, row_starts]
+
+    np.square(deviations, out = deviations)
+    np.cumsum(deviations, axis = 1, out = sums[:, 1:])
+    window_squares: NDArray[np.float64] = sums[blocks, row_ends] - sums[blocks, row_starts]
+
+    return window_squares / counts - (window_sums / counts) ** 2
+
+def _block_extremes(values: NDArray[np.float64], window: int, ends: NDArray[np.int64], reduce: np.ufunc) -> NDArray[np.float64]:
+    '''Min or max of each window with the van Herk/Gil-Werman method: the signal is split into blocks of the window length,
+       so every full window is covered by the suffix of one block and the prefix of the next one (O(n) for any window).
+       Shorter windows at the start are padded in front with the identity of the reduction.
+
+    Args:
+        values (NDArray[np.float64]): samples covered by the windows
+        window (int): window size in samples
+        ends (NDArray[np.int64]): end (exclusive) of each window in values. Windows are 'window' samples long,
+                                  or start on the first sample
+        reduce (np.ufunc): np.minimum or np.maximum
+
+    Returns:
+        NDArray[np.float64]: min or max of each window
+    '''
+    identity: float = np.inf if reduce is np.minimum else -np.inf
+
+    # Every window becomes [end - window, end) in the padded signal
+    front: int = window - 1
+    n_blocks: int = -(-(len(values) + front) // window)
+    padded: NDArray[np.float64] = np.full(n_blocks * window, identity, dtype = np.float64)
+    padded[front:front + len(values)] = values
+
+    blocks: NDArray[np.float64] = padded.reshape(n_blocks, window)
+    prefix: NDArray[np.float64] = reduce.accumulate(blocks, axis = 1).reshape(padded.shape)
+    suffix: NDArray[np.float64] = reduce.accumulate(blocks[:, ::-1], axis = 1)[:, ::-1].reshape(padded.shape)
+
+    # Padded window [end + front - window, end + front) = [end - 1, end + window - 1)
+    return reduce(suffix[ends - 1], prefix[ends + window - 2])
@@ -0,0 +1,151 @@
+# Recovery Score Calculations: segment_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+
+from attempt_detection_helper import detect_region_intervals
+from numpy.typing import NDArray
+from parallel_helper import run_threads
+from typing import Callable
+
+# Intervals longer than this many nominal sampling intervals split the recording (shorter dropouts are
+# handled by the derivatives with their actual interval, see derivative_helper.get_sampling_intervals)
+MAX_GAP_FACTOR: float = 5.0
+
+# Segments shorter than this cannot hold an attempt and are not processed
+MIN_SEGMENT_SECONDS: float = 1.0
+
+# Number of intervals checked at once by find_breaks
+CHUNK_SIZE: int = 65_536
+
+def get_nominal_interval(time_stamp: NDArray, chunk_size: int = CHUNK_SIZE) -> float:
+    '''Returns the nominal sampling interval: the median of the increasing intervals of the first chunk
+
+    Args:
+        time_stamp (NDArray): timeStamp values
+        chunk_size (int): number of intervals used
+
+    Returns:
+        float: nominal interval in timeStamp units
+    '''
+    intervals: NDArray = np.diff(time_stamp[:chunk_size + 1])
+    increasing: NDArray = intervals[intervals > 0]
+
+    if len(increasing) == 0:
+        raise ValueError('The timestamps never increase')
+
+    return float(np.median(increasing))
+
+def find_breaks(time_stamp: NDArray, max_gap_factor: float = MAX_GAP_FACTOR, chunk_size: int = CHUNK_SIZE) -> dict[str, NDArray[np.int64]]:
+    '''Finds the intervals that break the continuity of the recording. The intervals are checked chunk by chunk,
+       so no full-length temporary array is allocated.
+
+    Args:
+        time_stamp (NDArray): timeStamp values
+        max_gap_factor (float): intervals longer than this many nominal intervals are gaps
+        chunk_size (int): number of intervals checked at once
+
+    Returns:
+        dict[str, NDArray[np.int64]]: index k of each broken interval (between samples k and k + 1) by kind:
+        'gap' (dropout or clock jump forwards), 'duplicate' (repeated timestamp) and 'backward' (clock jump backwards)
+    '''
+    max_interval: float = max_gap_factor * get_nominal_interval(time_stamp, chunk_size)
+    breaks: dict[str, list[NDArray[np.int64]]] = {'gap': [], 'duplicate': [], 'backward': []}
+
+    for start in range(0, len(time_stamp) - 1, chunk_size):
+        intervals: NDArray = np.diff(time_stamp[start:start + chunk_size + 1])
+
+        breaks['gap'].append(np.flatnonzero(intervals > max_interval) + start)
+        breaks['duplicate'].append(np.flatnonzero(intervals == 0) + start)
+        breaks['backward'].append(np.flatnonzero(intervals < 0) + start)
+
+    return {kind: np.concatenate(indices) if indices else np.empty(0, dtype = np.int64) for kind, indices in breaks.items()}
+
+def find_segments(time_stamp: NDArray, max_gap_factor: float = MAX_GAP_FACTOR, min_samples: int = 2) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    '''Splits the recording into contiguous segments at every gap, duplicated timestamp and backwards jump.
+       Within a segment the timestamps are strictly increasing and no interval is longer than max_gap_factor
+       nominal intervals. Segments shorter than min_samples are left out.
+
+    Args:
+        time_stamp (NDArray): timeStamp values
+        max_gap_factor (float): intervals longer than this many nominal intervals split the recording
+        min_samples (int): minimum number of samples of a segment
+
+    Returns:
+        tuple[NDArray[np.int64], NDArray[np.int64]]: start (inclusive) and end (exclusive) index of each segment, sorted
+    '''
+    n: int = len(time_stamp)
+
+    if n < 2:
+        return np.zeros(int(n >= min_samples), dtype = np.int64), np.full(int(n >= min_samples), n, dtype = np.int64)
+
+    # A new segment starts after each broken interval
+    cuts: NDArray[np.int64] = np.unique(np.concatenate(list(find_breaks(time_stamp, max_gap_factor).values()))) + 1
+    segment_starts: NDArray[np.int64] = np.concatenate([[0], cuts]).astype(np.int64)
+    segment_ends: NDArray[np.int64] = np.concatenate([cuts, [n]]).astype(np.int64)
+
+    keep: NDArray[np.bool_] = segment_ends - segment_starts >= min_samples
+
+    return segment_starts[keep], segment_ends[keep]
+
+def process_segments(func: Callable, signals: dict[str, NDArray], segment_starts: NDArray[np.int64], segment_ends: NDArray[np.int64], workers: int = 1) -> list[dict[str, NDArray]]:
+    '''Applies func to each segment of the signals independently. With workers > 1 the segments are processed
+       in threads: the filters and derivatives run in NumPy, which releases the GIL on the long loops.
+
+    Args:
+        func (Callable): called with the signals of one segment (dict of views), returns a dict of arrays
+        signals (dict[str, NDArray]): arrays of the same length
+        segment_starts (NDArray[np.int64]): start index of each segment
+        segment_ends (NDArray[np.int64]): end index (exclusive) of each segment
+        workers (int): number of threads
+
+    Returns:
+        list[dict[str, NDArray]]: result of func for each segment, in order
+    '''
+    segments: list[dict[str, NDArray]] = [{column: values[start:end] for column, values in signals.items()} for start, end in zip(segment_starts, segment_ends)]
+
+    return run_threads(func, segments, workers)
+
+def merge_segments(segments: list[dict[str, NDArray]]) -> dict[str, NDArray]:
+    '''Concatenates the processed segments. Each segment is cut to the length of its shortest array first, so the arrays
+       of the merged signals stay aligned (the last jerk value of a segment is dropped with forward differences).
+
+    Args:
+        segments (list[dict[str, NDArray]]): processed segments with the same keys
+
+    Returns:
+        dict[str, NDArray]: concatenated arrays, plus segment_starts: the index where each segment starts in them
+    '''
+    lengths: list[int] = [min(len(values) for values in segment.values()) for segment in segments]
+
+    merged: dict[str, NDArray] = {column: np.concatenate([segment[column][:length] for segment, length in zip(segments, lengths)]) for column in segments[0]}
+    merged['segment_starts'] = np.cumsum([0] + lengths[:-1]).astype(np.int64)
+
+    return merged
+
+def detect_segment_intervals(jerk: NDArray[np.float64], snap: NDArray[np.float64], segment_starts: NDArray[np.int64], jerk_threshold: float, snap_threshold: float, sampling_rate: int) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    '''Runs attempt_detection_helper.detect_region_intervals on each segment of merged signals, so no region spans
+       two segments, and offsets the regions to the indices of the merged signals
+
+    Args:
+        jerk (NDArray[np.float64]): merged jerk values
+        snap (NDArray[np.float64]): merged snap values
+        segment_starts (NDArray[np.int64]): index where each segment starts (see merge_segments)
+        jerk_threshold (float): Threshold for jerk values
+        snap_threshold (float): Threshold for snap values
+        sampling_rate (float): Sampling rate of the signals in Hz
+
+    Returns:
+        tuple[NDArray[np.int64], NDArray[np.int64]]: start (inclusive) and end (exclusive) index of each region, sorted
+    '''
+    segment_ends: NDArray[np.int64] = np.append(segment_starts[1:], min(len(jerk), len(snap)))
+    region_starts: list[NDArray[np.int64]] = []
+    region_ends: list[NDArray[np.int64]] = []
+
+    for start, end in zip(segment_starts, segment_ends):
+        starts, ends = detect_region_intervals(jerk[start:end], snap[start:end], jerk_threshold, snap_threshold, sampling_rate)
+        region_starts.append(starts + start)
+        region_ends.append(ends + start)
+
+    return np.concatenate(region_starts), np.concatenate(region_ends)
@@ -0,0 +1,213 @@
+# Recovery Score Calculations: stage_cache_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from cache_helper import get_source_key
+from numpy.typing import NDArray
+from typing import Callable
+
+# Directory where the outputs of the cached stages are stored (one subdirectory per entry, named by its key)
+STAGE_CACHE_DIR: str = '.rs_stage_cache'
+
+# Size cap of the stage cache: the least recently used entries are removed beyond it
+MAX_CACHE_BYTES: int = 2 * 1024 ** 3
+
+# Changing how a cached stage computes its output must change this, so older entries are not used
+CACHE_VERSION: int = 1
+
+# Temporary directories older than this (left by interrupted runs) are removed by the eviction
+STALE_SECONDS: float = 3600.0
+
+def get_fingerprint(file_path: str, compact: bool = False) -> str:
+    '''Fingerprint of the recording of a case: its csv file (path, size and modification time, see
+       cache_helper.get_source_key) and format. Any change to the file gives a new fingerprint.
+
+    Args:
+        file_path (str): case number (file_name)
+        compact (bool): compact mode (see pipeline_helper.DEFAULT_PARAMETERS)
+
+    Returns:
+        str: hexadecimal sha256 digest
+    '''
+    return get_key('recording', json.dumps(get_source_key(file_path), sort_keys = True), {'compact': compact})
+
+def get_key(stage: str, fingerprint: str, parameters: dict) -> str:
+    '''Key of the output of a stage: sha256 of the stage name, the fingerprint of its input and its parameters.
+       The key of an output can be the fingerprint of the input of the next stage, so a key covers the whole chain.
+
+    Args:
+        stage (str): stage name
+        fingerprint (str): fingerprint of the input of the stage
+        parameters (dict): parameters the output depends on (JSON serializable)
+
+    Returns:
+        str: hexadecimal sha256 digest
+    '''
+    content: str = json.dumps({'stage': stage, 'input': fingerprint, 'parameters': parameters, 'version': CACHE_VERSION}, sort_keys = True)
+
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class StageCache:
+    '''Content-addressed cache of stage outputs. Each entry is a directory of .npy files (one per array) loaded as
+       read-only memory maps. Entries are written to a temporary directory and renamed into place, so concurrent
+       processes sharing the directory never read a partial entry, and the first process to store a key wins.
+       The directory modification time marks the last use of an entry (least recently used eviction).
+    '''
+    def __init__(self, cache_dir: str = STAGE_CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self.cache_dir: str = cache_dir
+        self.max_bytes: int = max_bytes
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def load(self, key: str) -> dict[str, NDArray] | None:
+        '''Returns the arrays stored under key (read-only memory maps), or None if there is no entry
+
+        Args:
+            key (str): entry key (see get_key)
+
+        Returns:
+            dict[str, NDArray] | None: arrays by name
+        '''
+        entry_dir: str = os.path.join(self.cache_dir, key)
+
+        try:
+            arrays: dict[str, NDArray] = {name[:-4]: np.load(os.path.join(entry_dir, name), mmap_mode = 'r') for name in os.listdir(entry_dir) if name.endswith('.npy')}
+            os.utime(entry_dir)
+
+        except (FileNotFoundError, ValueError):
+            # Missing, or removed by another process while being read
+            return None
+
+        return arrays or None
+
+    def store(self, key: str, arrays: dict[str, NDArray]) -> None:
+        '''Stores arrays under key, then removes the least recently used entries beyond the size cap
+
+        Args:
+            key (str): entry key (see get_key)
+            arrays (dict[str, NDArray]): arrays by name
+        '''
+        entry_dir: str = os.path.join(self.cache_dir, key)
+        tmp_dir: str = tempfile.mkdtemp(dir = self.cache_dir, prefix = '.tmp_')
+
+        try:
+            for name, values in arrays.items():
+                np.save(os.path.join(tmp_dir, name + '.npy'), values)
+            os.rename(tmp_dir, entry_dir)
+
+        except OSError:
+            # Another process stored the same key first (its entry is identical)
+            if not os.path.isdir(entry_dir):
+                raise
+
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors = True)
+
+        self.evict(keep = key)
+
+    def get_entries(self) -> list[tuple[float, int, str]]:
+        '''Lists the entries of the cache
+
+        Returns:
+            list[tuple[float, int, str]]: last use (modification time), size in bytes and key of each entry, least recently used first
+        '''
+        entries: list[tuple[float, int, str]] = []
+
+        for key in os.listdir(self.cache_dir):
+            entry_dir: str = os.path.join(self.cache_dir, key)
+
+            if key.startswith('.'):
+                continue
+
+            try:
+                size: int = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+                entries.append((os.path.getmtime(entry_dir), size, key))
+
+            except FileNotFoundError:
+                continue
+
+        return sorted(entries)
+
+    def evict(self, keep: str | None = None) -> int:
+        '''Removes the least recently used entries until the cache fits in max_bytes, and the temporary directories
+           of interrupted runs. An entry is renamed before it is deleted, so it disappears at once for the other processes.
+
+        Args:
+            keep (str, optional): key that is never removed (the entry just stored)
+
+        Returns:
+            int: number of entries removed
+        '''
+        entries: list[tuple[float, int, str]] = self.get_entries()
+        total: int = sum(size for _, size, _ in entries)
+        removed: int = 0
+
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+
+            if key == keep:
+                continue
+
+            try:
+                deleted_dir: str = os.path.join(self.cache_dir, f'.del_{uuid.uuid4().hex}')
+                os.rename(os.path.join(self.cache_dir, key), deleted_dir)
+                shutil.rmtree(deleted_dir, ignore_errors = True)
+                removed += 1
+
+            except FileNotFoundError:
+                pass # removed by another process
+
+            total -= size
+
+        now: float = time.time()
+        for name in os.listdir(self.cache_dir):
+            path: str = os.path.join(self.cache_dir, name)
+
+            try:
+                if name.startswith(('.tmp_', '.del_')) and now - os.path.getmtime(path) > STALE_SECONDS:
+                    shutil.rmtree(path, ignore_errors = True)
+
+            except FileNotFoundError:
+                continue
+
+        return removed
+
+    def clear(self) -> None:
+        '''Removes every entry of the cache'''
+        shutil.rmtree(self.cache_dir, ignore_errors = True)
+        os.makedirs(self.cache_dir, exist_ok = True)
+
+def run_stage(cache: StageCache | None, stage: str, fingerprint: str | None, parameters: dict, func: Callable[[], dict[str, NDArray]]) -> tuple[str | None, dict[str, NDArray]]:
+    '''Returns the output of a stage from the cache, or computes it with func and stores it
+
+    Args:
+        cache (StageCache, optional): stage cache (None computes the output)
+        stage (str): stage name
+        fingerprint (str, optional): fingerprint of the input of the stage (None computes the output)
+        parameters (dict): parameters the output depends on (JSON serializable)
+        func (Callable): computes the output of the stage, a dict of arrays
+
+    Returns:
+        tuple[str | None, dict[str, NDArray]]: key of the output (None without cache) and the output
+    '''
+    if cache is None or fingerprint is None:
+        return None, func()
+
+    key: str = get_key(stage, fingerprint, parameters)
+    arrays: dict[str, NDArray] | None = cache.load(key)
+
+    if arrays is None:
+        arrays = func()
+        cache.store(key, arrays)
+
+    return key, arrays
@@ -0,0 +1,368 @@
+# Recovery Score Calculations: streaming_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import math
+import socket
+import sys
+import time
+
+from collections import deque
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+
+from pipeline_helper import get_parameters
+from recovery_score_helper import get_rs_sa, get_rs_ua
+from threshold_helper import ThresholdStats
+
+class RecoveryMonitor:
+    '''Incremental version of the pipeline for a live accelerometer feed.
+       Each sample updates the moving average, the Kalman state and jerk/snap in O(1), and the jerk and snap
+       thresholds are running estimates of max(mean + factor * std, percentile) (threshold_helper.ThresholdStats).
+       Memory does not depend on the recording length.
+
+       Regions follow detect_region_intervals: a region covers 0.5 s before the first spike to 0.5 s after the
+       last one, and spikes closer than 1 s are merged into the same region. An 'attempt_start' event is emitted
+       on the sample that triggers a region and an 'attempt' event (with the max accelerations of the region)
+       once 1 s passed without a spike, i.e. when no later spike could still be merged into it.
+    '''
+
+    def __init__(self, parameters: dict | None = None, warmup_seconds: float = 10.0) -> None:
+        '''
+        Args:
+            parameters (dict, optional): parameters that override pipeline_helper.DEFAULT_PARAMETERS
+            warmup_seconds (float): seconds of jerk/snap used to settle the thresholds before detecting spikes
+        '''
+        self.p: dict = get_parameters(parameters)
+        self.window_size: int = int(0.5 * self.p['sampling_rate'])
+        self.warmup_samples: int = int(warmup_seconds * self.p['sampling_rate'])
+
+        # initial filter
+        self.started: bool = False
+        self.index: int = -1
+
+        # moving average of Acc_Z
+        self.avg_buffer: deque = deque(maxlen = self.p['target_moving_avg'])
+        self.avg_sum: float = 0.0
+        self.acc_z_avg: float = math.nan
+
+        # Kalman state of Acc_Z
+        self.xhat: float = math.nan
+        self.P: float = self.p['estimated_measurement_variance']
+
+        # derivatives
+        self.last_time: int | None = None
+        self.jerk: float = math.nan
+        self.snap: float = math.nan
+
+        # running statistics of jerk and snap. The thresholds are refreshed once per second of data
+        # (the percentile lookup is not O(1) and barely moves between two refreshes)
+        self.jerk_stats: ThresholdStats = ThresholdStats()
+        self.snap_stats: ThresholdStats = ThresholdStats()
+        self.thresholds: tuple[float, float] = (math.inf, math.inf)
+
+        # timeStamp and |acc| of the last window_size samples (to start a region 0.5 s before its first spike)
+        self.history: deque = deque(maxlen = self.window_size)
+
+        # open region
+        self.region_start: int | None = None
+        self.region_start_time: int = 0
+        self.last_spike: int = 0
+        self.region_max: list[float] = [0.0, 0.0, 0.0]
+        self.tail_max: list[float] = [0.0, 0.0, 0.0]
+
+        # closed regions: the last one is kept apart since it may be the successful attempt
+        self.attempts: int = 0
+        self.last_attempt: dict | None = None
+        self.sumua: float = 0.0
+
+    def update(self, time_stamp: int, acc_x: float, acc_y: float, acc_z: float) -> list[dict]:
+        '''Processes one sample
+
+        Args:
+            time_stamp (int): epoch nanoseconds
+            acc_x (float): Acc_X value
+            acc_y (float): Acc_Y value
+            acc_z (float): Acc_Z value
+
+        Returns:
+            list[dict]: events emitted by this sample (usually none)
+        '''
+        # Values are ignored until Acc_Z reaches 'target_value' signaling horse getting onto sternal recumbency
+        if not self.started:
+            if acc_z <= self.p['target_value']:
+                return []
+            self.started = True
+
+        if self.last_time is not None and time_stamp <= self.last_time:
+            # Timestamps must be strictly increasing: the sample is dropped
+            return []
+
+        self.index += 1
+        self._update_moving_average(acc_z)
+        self._update_kalman_and_derivatives(time_stamp, acc_z)
+
+        events: list[dict] = []
+        abs_acc: tuple = (abs(acc_x), abs(acc_y), abs(acc_z))
+
+        if self._is_spike():
+            if self.region_start is None:
+                self._open_region(time_stamp)
+                events.append({'event': 'attempt_start', 'timeStamp': self.region_start_time, 'detected_at': time_stamp})
+            else:
+                # samples since the end of the region become part of it
+                self.region_max = [max(a, b) for a, b in zip(self.region_max, self.tail_max)]
+                self.tail_max = [0.0, 0.0, 0.0]
+            self.last_spike = self.index
+
+        if self.region_start is not None:
+            if self.index <= self.last_spike + self.window_size:
+                self.region_max = [max(a, b) for a, b in zip(self.region_max, abs_acc)]
+            else:
+                self.tail_max = [max(a, b) for a, b in zip(self.tail_max, abs_acc)]
+
+            # no spike for 1 s: a later region could not touch this one any more
+            if self.index > self.last_spike + 2 * self.window_size:
+                events.append(self._close_region(time_stamp))
+
+        self.history.append((time_stamp, *abs_acc))
+
+        return events
+
+    def close(self) -> list[dict]:
+        '''Ends the recording: closes the open region and emits the summary of the recovery
+
+        Returns:
+            list[dict]: the last 'attempt' event (if a region was open) and a 'summary' event
+        '''
+        events: list[dict] = []
+
+        if self.region_start is not None:
+            events.append(self._close_region(self.last_time or 0))
+
+        events.append(self.summary())
+
+        return events
+
+    def summary(self) -> dict:
+        '''Recovery score from the attempts detected so far (the last attempt is taken as the successful one)
+
+        Returns:
+            dict: number of failed attempts, sa_2axes, sumua, rs_2axes_py and the current thresholds
+        '''
+        number_failed_attempts: int = self.attempts - 1
+        sa_2axes: float = math.nan
+        rs_2axes_py: float = math.nan
+
+        if self.last_attempt is not None:
+            sa_2axes = math.hypot(self.last_attempt['amax_x'], self.last_attempt['amax_y'])
+            rs_2axes_py = float(get_rs_ua(self.sumua) if number_failed_attempts >= 1 else get_rs_sa(sa_2axes))
+
+        jerk_threshold_cal, snap_threshold_cal = self.get_thresholds()
+
+        return {
+            'event': 'summary',
+            'samples': self.index + 1,
+            'jerk_threshold_cal': jerk_threshold_cal,
+            'snap_threshold_cal': snap_threshold_cal,
+            'number_failed_attempts': number_failed_attempts,
+            'sa_2axes': sa_2axes,
+            'sumua': self.sumua,
+            'rs_2axes_py': rs_2axes_py,
+        }
+
+    def get_thresholds(self) -> tuple[float, float]:
+        '''Current jerk and snap thresholds (max(mean + factor * std, percentile) of the values seen so far)
+
+        Returns:
+            tuple[float, float]: jerk and snap thresholds
+        '''
+        if self.snap_stats.count == 0:
+            return math.inf, math.inf
+
+        return self.jerk_stats.get_threshold(self.p['factor'], self.p['percentile'])[2], self.snap_stats.get_threshold(self.p['factor'], self.p['percentile'])[2]
+
+    def _update_moving_average(self, acc_z: float) -> None:
+        if len(self.avg_buffer) == self.avg_buffer.maxlen:
+            self.avg_sum -= self.avg_buffer[0]
+        self.avg_buffer.append(acc_z)
+        self.avg_sum += acc_z
+        self.acc_z_avg = self.avg_sum / len(self.avg_buffer)
+
+    def _update_kalman_and_derivatives(self, time_stamp: int, acc_z: float) -> None:
+        previous_xhat: float = self.xhat
+        previous_jerk: float = self.jerk
+
+        if self.index == 0:
+            # initial guess
+            self.xhat = acc_z
+        else:
+            Pminus: float = self.P + self.p['process_variance']
+            K: float = Pminus / (Pminus + self.p['measurement_variance'])
+            self.xhat = self.xhat + K * (acc_z - self.xhat)
+            self.P = (1 - K) * Pminus
+
+        if self.last_time is not None:
+            dt: float = float(time_stamp - self.last_time)
+            self.jerk = (self.xhat - previous_xhat) / dt
+            self.jerk_stats.add(self.jerk)
+
+            if not math.isnan(previous_jerk):
+                self.snap = (self.jerk - previous_jerk) / dt
+                self.snap_stats.add(self.snap)
+
+        self.last_time = time_stamp
+
+    def _is_spike(self) -> bool:
+        if self.index < self.warmup_samples or math.isnan(self.snap):
+            return False
+
+        if self.index % self.p['sampling_rate'] == 0:
+            self.thresholds = self.get_thresholds()
+
+        jerk_threshold_cal, snap_threshold_cal = self.thresholds
+
+        return abs(self.jerk) > jerk_threshold_cal or abs(self.snap) > snap_threshold_cal
+
+    def _open_region(self, time_stamp: int) -> None:
+        self.region_start = max(self.index - self.window_size, 0)
+        self.region_start_time = self.history[0][0] if self.history else time_stamp
+        self.region_max = [max((sample[axis] for sample in self.history), default = 0.0) for axis in (1, 2, 3)]
+        self.tail_max = [0.0, 0.0, 0.0]
+
+    def _close_region(self, time_stamp: int) -> dict:
+        attempt: dict = {
+            'event': 'attempt',
+            'attempt': self.attempts + 1,
+            'timeStamp': self.region_start_time,
+            'samples': min(self.index, self.last_spike + self.window_size) - self.region_start + 1,
+            'amax_x': self.region_max[0],
+            'amax_y': self.region_max[1],
+            'amax_z': self.region_max[2],
+            'detected_at': time_stamp,
+        }
+
+        # the previous last attempt turned out to be a failed one
+        if self.last_attempt is not None:
+            self.sumua += math.sqrt(self.last_attempt['amax_x'] ** 2 + self.last_attempt['amax_y'] ** 2 + self.last_attempt['amax_z'] ** 2)
+
+        self.attempts += 1
+        self.last_attempt = attempt
+        self.region_start = None
+
+        return attempt
+
+def parse_line(line: str, time_format: str | None = None) -> tuple | None:
+    '''Parses one 'timeStamp,Acc_X,Acc_Y,Acc_Z[,...]' line of the sensor export
+
+    Args:
+        line (str): line of text
+        time_format (str, optional): strftime format of the timeStamp. ISO 8601 is expected if None
+
+    Returns:
+        tuple | None: (epoch nanoseconds, Acc_X, Acc_Y, Acc_Z), or None for header or malformed lines
+    '''
+    fields: list[str] = line.strip().split(',')
+
+    if len(fields) < 4:
+        return None
+
+    try:
+        if time_format is None:
+            time_stamp: int = int(np.datetime64(fields[0].strip(), 'ns').astype(np.int64))
+        else:
+            parsed: datetime = datetime.strptime(fields[0].strip(), time_format)
+            time_stamp = int(np.datetime64(parsed, 'ns').astype(np.int64))
+
+        return time_stamp, float(fields[1]), float(fields[2]), float(fields[3])
+
+    except ValueError:
+        return None
+
+def follow_file(file_path: str, poll_interval: float = 0.01) -> Iterator[str]:
+    '''Yields the lines of a file, waiting for new lines as they are appended (like tail -f)
+
+    Args:
+        file_path (str): path to the file being written
+        poll_interval (float): seconds to wait before checking for new data
+    '''
+    with open(file_path, encoding = 'utf-8') as stream:
+        partial: str = ''
+
+        while True:
+            line: str = stream.readline()
+
+            if not line:
+                time.sleep(poll_interval)
+                continue
+
+            partial += line
+
+            # a line without newline is still being written
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+def socket_lines(host: str, port: int) -> Iterator[str]:
+    '''Yields the lines received on a TCP connection (stand-in for a live sensor stream)
+
+    Args:
+        host (str): host name
+        port (int): port number
+    '''
+    with socket.create_connection((host, port)) as connection:
+        with connection.makefile('r', encoding = 'utf-8') as stream:
+            yield from stream
+
+def open_source(source: str) -> Iterator[str]:
+    '''Opens a line source: '-' for stdin (pipe), 'tcp://host:port' for a socket, otherwise a file being appended to
+
+    Args:
+        source (str): source description
+
+    Returns:
+        Iterator[str]: lines of text
+    '''
+    if source == '-':
+        return iter(sys.stdin)
+
+    if source.startswith('tcp://'):
+        host, port = source[len('tcp://'):].rsplit(':', 1)
+        return socket_lines(host, int(port))
+
+    return follow_file(source)
+
+def run_monitor(source: str, parameters: dict | None = None, time_format: str | None = None) -> dict:
+    '''Monitors a live feed and prints the attempt events as they happen, until the feed ends or Ctrl+C
+
+    Args:
+        source (str): '-' (stdin), 'tcp://host:port' or the path to a csv file being appended to
+        parameters (dict, optional): parameters that override pipeline_helper.DEFAULT_PARAMETERS
+        time_format (str, optional): strftime format of the timeStamp. ISO 8601 is expected if None
+
+    Returns:
+        dict: the summary event when the feed ends
+    '''
+    monitor: RecoveryMonitor = RecoveryMonitor(parameters)
+
+    try:
+        for line in open_source(source):
+            sample: tuple | None = parse_line(line, time_format)
+
+            if sample is None:
+                continue
+
+            for event in monitor.update(*sample):
+                print(event, flush = True)
+
+    except KeyboardInterrupt:
+        print('Monitoring stopped')
+
+    events: list[dict] = monitor.close()
+
+    for event in events:
+        print(event, flush = True)
+
+    return events[-1]
@@ -0,0 +1,75 @@
+# Recovery Score Calculations: sweep_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import itertools
+
+import pandas as pd
+
+from numpy.typing import NDArray
+from pipeline_helper import RESULT_KEYS, get_parameters, get_stage_fingerprint, load_signals, preprocess_signals, calculate_thresholds, score_signals
+
+# Parameters that change the preprocessed signals (initial filter, Kalman filter and derivatives)
+PREPROCESS_KEYS: list[str] = ['compact', 'target_value', 'process_variance', 'measurement_variance', 'estimated_measurement_variance', 'kalman_mode', 'kalman_tolerance', 'derivative_method', 'max_gap_factor', 'min_segment_seconds']
+
+# Parameters that change the jerk and snap thresholds (on top of PREPROCESS_KEYS)
+THRESHOLD_KEYS: list[str] = ['factor', 'percentile', 'threshold_mode']
+
+def run_sweep(file_path: str, grid: dict[str, list], parameters: dict | None = None, verbose: bool = True) -> pd.DataFrame:
+    '''Scores one case for every combination of a parameter grid, reusing the work shared between combinations.
+       The case is read once (once per cache format when 'compact' is swept), each preprocessing stage runs once per unique combination of PREPROCESS_KEYS, and
+       the thresholds once per unique combination of PREPROCESS_KEYS and THRESHOLD_KEYS. Only region detection
+       and scoring run for every combination. Combinations are processed grouped by their preprocessing
+       parameters, so a single set of preprocessed signals is held in memory at a time. With a stage cache
+       (parameters['stage_cache_dir']) the preprocessed signals are also reused by later sweeps.
+
+       target_moving_avg only affects the plots, so sweeping it does not change the scores.
+
+    Args:
+        file_path (str): case number (file_name)
+        grid (dict[str, list]): values to try for each swept parameter, e.g. {'factor': [10, 20, 30], 'percentile': [95, 99]}
+        parameters (dict, optional): fixed parameters that override pipeline_helper.DEFAULT_PARAMETERS
+        verbose (bool): prints the progress of the sweep
+
+    Returns:
+        pd.DataFrame: one row per combination (in grid order) with the swept parameters and the RESULT_KEYS values
+    '''
+    base: dict = get_parameters(parameters)
+    get_parameters(dict.fromkeys(grid)) # rejects unknown parameter names
+
+    names: list[str] = list(grid)
+    combinations: list[dict] = [{**base, **dict(zip(names, values))} for values in itertools.product(*grid.values())]
+
+    # Memory-mapped recordings, one per cache format (compact or not)
+    recordings: dict[bool, dict[str, NDArray]] = {}
+
+    # Groups the combinations by their preprocessing parameters
+    groups: dict[tuple, list[int]] = {}
+    for position, combination in enumerate(combinations):
+        groups.setdefault(tuple(combination[key] for key in PREPROCESS_KEYS), []).append(position)
+
+    rows: list[dict | None] = [None] * len(combinations)
+
+    for group_number, positions in enumerate(groups.values(), start = 1):
+        compact: bool = combinations[positions[0]]['compact']
+
+        if compact not in recordings:
+            recordings[compact] = load_signals(file_path, compact)
+
+        signals: dict[str, NDArray] = preprocess_signals(recordings[compact], combinations[positions[0]], fingerprint = get_stage_fingerprint(file_path, combinations[positions[0]]))
+        thresholds_memo: dict[tuple, dict] = {}
+
+        for position in positions:
+            combination: dict = combinations[position]
+            threshold_key: tuple = tuple(combination[key] for key in THRESHOLD_KEYS)
+
+            if threshold_key not in thresholds_memo:
+                thresholds_memo[threshold_key] = calculate_thresholds(signals, combination)
+
+            results: dict = score_signals(signals, combination, thresholds_memo[threshold_key])
+            rows[position] = {**{name: combination[name] for name in names}, **{key: results[key] for key in RESULT_KEYS}}
+
+        if verbose:
+            print(f'Preprocessing group {group_number}/{len(groups)} scored ({len(positions)} combinations)')
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,132 @@
+# Recovery Score Calculations: synthetic_data_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+
+from numpy.typing import NDArray
+
+# Header rows of the case files (separator, headers, units), as skipped by file_helper.read_csv_chunks
+CSV_HEADER: str = 'sep=,\ntimeStamp,Acc_X,Acc_Y,Acc_Z\nms,m/s2,m/s2,m/s2\n'
+
+# Number of rows written at once by write_case_csv
+CHUNK_SIZE: int = 1_000_000
+
+# Acc_Z levels of the recovery phases (lateral recumbency, then sternal recumbency and standing, above target_value)
+LATERAL_ACC_Z: float = 2.0
+STERNAL_ACC_Z: float = 9.8
+ROLL_SECONDS: float = 3.0
+
+# Duration of an attempt (seconds) and amplitude range of its acceleration bursts
+ATTEMPT_SECONDS: float = 0.3
+FAILED_AMPLITUDE: tuple[float, float] = (5.0, 8.0)
+STANDING_AMPLITUDE: tuple[float, float] = (6.0, 9.0)
+
+def get_event_times(duration_s: float, failed_attempts: int) -> dict:
+    '''Times (seconds from the start) of the events of a synthetic recovery.
+       Lateral recumbency lasts the first 10% of the recording, the failed attempts are evenly spread
+       between 20% and 80%, and the horse stands up at 90%.
+
+    Args:
+        duration_s (float): length of the recording in seconds
+        failed_attempts (int): number of failed attempts before standing
+
+    Returns:
+        dict: sternal (float), failed (list[float]) and standing (float) times in seconds
+    '''
+    fractions: NDArray[np.float64] = np.array([0.5]) if failed_attempts == 1 else np.linspace(0.2, 0.8, failed_attempts)
+    failed: list[float] = (duration_s * fractions).tolist()
+
+    events: list[float] = failed + [duration_s * 0.9]
+
+    # detect_region_intervals merges spikes closer than 1 s, so attempts have to be further apart
+    if min(np.diff([duration_s * 0.1] + events), default = duration_s) < 2.0:
+        raise ValueError(f'{duration_s} s is too short for {failed_attempts} failed attempts')
+
+    return {'sternal': duration_s * 0.1, 'failed': failed, 'standing': duration_s * 0.9}
+
+def generate_recording(duration_s: float = 600.0, failed_attempts: int = 3, sampling_rate: int = 200, noise: float = 0.05, seed: int = 0, start_time: str = '2024-03-25 10:00:00') -> dict[str, NDArray]:
+    '''Generates a deterministic 3-axis recording that looks like a recovery: lateral recumbency,
+       sternal recumbency, 'failed_attempts' short acceleration bursts (jerk spikes) and a larger burst
+       when the horse stands up, plus Gaussian noise on every axis. With the default parameters
+       (factor 30) every burst is detected as one region in recordings of 5 minutes or more.
+
+    Args:
+        duration_s (float): length of the recording in seconds (minutes to 24 hours)
+        failed_attempts (int): number of failed attempts before standing
+        sampling_rate (int): samples per second
+        noise (float): standard deviation of the noise
+        seed (int): seed of the random generator (same seed, same recording)
+        start_time (str): time of the first sample
+
+    Returns:
+        dict[str, NDArray]: timeStamp (int64 epoch nanoseconds), Acc_X, Acc_Y and Acc_Z, as returned by cache_helper.load_recording
+    '''
+    rng: np.random.Generator = np.random.default_rng(seed)
+    events: dict = get_event_times(duration_s, failed_attempts)
+
+    n: int = int(duration_s * sampling_rate)
+    step_ns: int = int(round(1e9 / sampling_rate))
+    time_stamp: NDArray[np.int64] = np.datetime64(start_time, 'ns').astype(np.int64) + np.arange(n, dtype = np.int64) * step_ns
+
+    acc: NDArray[np.float64] = rng.normal(scale = noise, size = (3, n))
+
+    # The horse rolls onto sternal recumbency over ROLL_SECONDS (a smooth change, not detected as an attempt)
+    sternal: int = int(events['sternal'] * sampling_rate)
+    roll_length: int = int(ROLL_SECONDS * sampling_rate)
+    roll: NDArray[np.float64] = (1 - np.cos(np.pi * np.arange(roll_length) / roll_length)) / 2
+
+    acc[2] += LATERAL_ACC_Z
+    acc[2, sternal:] += STERNAL_ACC_Z - LATERAL_ACC_Z
+    acc[2, sternal:sternal + roll_length] -= (STERNAL_ACC_Z - LATERAL_ACC_Z) * (1 - roll[:n - sternal])
+
+    # Damped oscillation shared by all bursts
+    burst_length: int = int(ATTEMPT_SECONDS * sampling_rate)
+    t: NDArray[np.float64] = np.arange(burst_length) / sampling_rate
+    shape: NDArray[np.float64] = np.sin(2 * np.pi * 15 * t) * np.exp(-t / (ATTEMPT_SECONDS / 4))
+
+    for time_s, amplitude_range in [(time_s, FAILED_AMPLITUDE) for time_s in events['failed']] + [(events['standing'], STANDING_AMPLITUDE)]:
+        start: int = int(time_s * sampling_rate)
+        amplitudes: NDArray[np.float64] = rng.uniform(*amplitude_range, size = 3) * rng.choice([-1.0, 1.0], size = 3)
+        acc[:, start:start + burst_length] += amplitudes[:, None] * shape[:n - start]
+
+    return {'timeStamp': time_stamp, 'Acc_X': acc[0], 'Acc_Y': acc[1], 'Acc_Z': acc[2]}
+
+def write_case_csv(file_path: str, recording: dict[str, NDArray], chunk_size: int = CHUNK_SIZE) -> None:
+    '''Writes a recording in the layout of the case files (3 header rows, then timeStamp, Acc_X, Acc_Y, Acc_Z).
+       Times are written with millisecond precision and accelerations with 6 decimals.
+       Uses the pyarrow csv writer when pyarrow is installed (about 10 times faster) and pandas otherwise.
+
+    Args:
+        file_path (str): case number (file_name) without the .csv extension
+        recording (dict[str, NDArray]): output of generate_recording
+        chunk_size (int): number of rows formatted at once
+    '''
+    try:
+        import pyarrow  # noqa: F401
+        write_chunk = _write_chunk_pyarrow
+
+    except ImportError:
+        write_chunk = _write_chunk_pandas
+
+    with open(file_path + '.csv', 'wb') as f:
+        f.write(CSV_HEADER.encode())
+
+        for start in range(0, len(recording['timeStamp']), chunk_size):
+            chunk: dict[str, NDArray] = {column: recording[column][start:start + chunk_size] for column in ('timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z')}
+            chunk['timeStamp'] = chunk['timeStamp'].view('datetime64[ns]').astype('datetime64[ms]')
+            for axis in ('Acc_X', 'Acc_Y', 'Acc_Z'):
+                chunk[axis] = np.round(chunk[axis], 6)
+
+            write_chunk(f, chunk)
+
+def _write_chunk_pyarrow(f, chunk: dict[str, NDArray]) -> None:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    pa_csv.write_csv(pa.table(chunk), f, pa_csv.WriteOptions(include_header = False))
+
+def _write_chunk_pandas(f, chunk: dict[str, NDArray]) -> None:
+    import pandas as pd
+
+    f.write(pd.DataFrame(chunk).to_csv(header = False, index = False, float_format = '%.6f', lineterminator = '\n').encode())
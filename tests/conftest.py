@@ -0,0 +1,22 @@
+# Recovery Score Calculations: tests conftest Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import os
+import sys
+
+import pytest
+
+# The helpers are top-level modules of the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data_helper import generate_recording, write_case_csv
+
+@pytest.fixture
+def case_file(tmp_path, monkeypatch) -> str:
+    '''Short synthetic recording (5 min, 3 failed attempts) written as a case csv. The caches are created in tmp_path.'''
+    monkeypatch.chdir(tmp_path)
+    file_path: str = str(tmp_path / '1000')
+    write_case_csv(file_path, generate_recording(duration_s = 300.0))
+
+    return file_path
@@ -0,0 +1,112 @@
+# Recovery Score Calculations: test_attempt_detection_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pytest
+
+from attempt_detection_helper import detect_region_intervals, detect_regions, intervals_to_indices, sliding_window_argmax
+
+SAMPLING_RATE: int = 200
+HALF_WINDOW: int = SAMPLING_RATE // 2
+
+def reference_detect_regions(jerk, snap, jerk_threshold, snap_threshold, sampling_rate):
+    '''Per-spike loop of the original detect_regions'''
+    min_length = min(len(jerk), len(snap))
+    jerk = jerk[:min_length]
+    snap = snap[:min_length]
+
+    spike_indices = np.where((np.abs(jerk) > jerk_threshold) | (np.abs(snap) > snap_threshold))[0]
+    roi_indices = []
+    window_size = int(0.5 * sampling_rate)
+
+    for idx in spike_indices:
+        start_idx = max(0, idx - window_size)
+        end_idx = min(len(jerk), idx + window_size + 1)
+        max_idx = np.argmax(np.abs(jerk[start_idx:end_idx]) + np.abs(snap[start_idx:end_idx])) + start_idx
+        roi_indices.extend(range(max(0, max_idx - window_size), min(len(jerk), max_idx + window_size + 1)))
+
+    return sorted(set(roi_indices))
+
+def check_against_reference(jerk, snap, jerk_threshold = 1.0, snap_threshold = 1.0):
+    '''Checks the regions against the original detect_regions and returns them'''
+    region_starts, region_ends = detect_region_intervals(jerk, snap, jerk_threshold, snap_threshold, SAMPLING_RATE)
+    expected = reference_detect_regions(jerk, snap, jerk_threshold, snap_threshold, SAMPLING_RATE)
+
+    assert intervals_to_indices(region_starts, region_ends).tolist() == expected
+    assert detect_regions(jerk, snap, jerk_threshold, snap_threshold, SAMPLING_RATE) == expected
+
+    # Sorted, non-empty and neither overlapping nor touching
+    assert np.all(region_ends > region_starts)
+    assert np.all(region_starts[1:] > region_ends[:-1])
+
+    return region_starts, region_ends
+
+def spikes(n: int, positions: list[int], heights: list[float] | None = None, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    '''Noise below the thresholds plus a spike of jerk and snap at each position'''
+    rng = np.random.default_rng(seed)
+    jerk = rng.uniform(-0.5, 0.5, n)
+    snap = rng.uniform(-0.5, 0.5, n)
+
+    for position, height in zip(positions, heights or [2.0] * len(positions)):
+        jerk[position] = height
+        snap[position] = -height
+
+    return jerk, snap
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_spikes(seed):
+    rng = np.random.default_rng(seed)
+    jerk = rng.standard_t(3, 20_000) * 0.3
+    snap = rng.standard_t(3, 20_011) * 0.3
+
+    check_against_reference(jerk, snap)
+
+def test_regions_touching_first_and_last_sample():
+    n = 5_000
+    region_starts, region_ends = check_against_reference(*spikes(n, [0, 10, n - 10, n - 1], [3.0, 2.0, 2.0, 3.0]))
+
+    assert region_starts.tolist() == [0, n - 1 - HALF_WINDOW]
+    assert region_ends.tolist() == [HALF_WINDOW + 1, n]
+
+def test_spikes_one_window_apart_merge():
+    # The region of the first spike ends where the region of the second one starts
+    first = 1_000
+    second = first + 2 * HALF_WINDOW + 1
+    region_starts, region_ends = check_against_reference(*spikes(5_000, [first, second]))
+
+    assert region_starts.tolist() == [first - HALF_WINDOW]
+    assert region_ends.tolist() == [second + HALF_WINDOW + 1]
+
+def test_spikes_one_sample_more_than_a_window_apart():
+    first = 1_000
+    second = first + 2 * HALF_WINDOW + 2
+    region_starts, _ = check_against_reference(*spikes(5_000, [first, second]))
+
+    assert len(region_starts) == 2
+
+def test_plateau_ties():
+    # Equal maxima: the first one in each window wins, as with np.argmax
+    jerk, snap = spikes(3_000, [])
+    jerk[1_000:1_400] = 2.0
+    snap[1_000:1_400] = 0.0
+
+    check_against_reference(jerk, snap)
+
+def test_no_region():
+    jerk, snap = spikes(2_000, [])
+    region_starts, region_ends = check_against_reference(jerk, snap)
+    assert len(region_starts) == 0 and len(region_ends) == 0
+    assert intervals_to_indices(region_starts, region_ends).tolist() == []
+
+    region_starts, _ = check_against_reference(np.empty(0), np.empty(0))
+    assert len(region_starts) == 0
+
+@pytest.mark.parametrize('half_window', [0, 1, 3, 100])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_sliding_window_argmax(half_window, dtype):
+    # Few distinct values, so there are many ties
+    values = np.random.default_rng(half_window).integers(0, 5, 1_003).astype(dtype)
+    expected = [start + int(np.argmax(values[start:i + half_window + 1])) for i, start in enumerate(max(i - half_window, 0) for i in range(len(values)))]
+
+    assert sliding_window_argmax(values, half_window).tolist() == expected
@@ -0,0 +1,28 @@
+# Recovery Score Calculations: test_batch_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import csv
+
+from CSV_helper import CSV
+from batch_helper import run_batch
+from synthetic_data_helper import generate_recording, write_case_csv
+
+def test_rows_written_as_cases_complete(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'cases').mkdir()
+
+    for seed, case_number in enumerate(('1000', '1001')):
+        write_case_csv(str(tmp_path / 'cases' / case_number), generate_recording(duration_s = 300.0, seed = seed))
+
+    writes: list[int] = []
+    add_entries = CSV.add_entries.__func__
+    monkeypatch.setattr(CSV, 'add_entries', classmethod(lambda cls, entries: (writes.append(len(entries)), add_entries(cls, entries))))
+
+    results, failures = run_batch(str(tmp_path / 'cases'), workers = 1, sink = 'csv')
+
+    assert len(results) == 2 and failures == {}
+    assert writes == [1, 1]
+
+    with open(CSV.CSV_FILE, encoding = 'utf-8') as csv_file:
+        assert sorted(row['Case_Number'] for row in csv.DictReader(csv_file)) == ['1000', '1001']
@@ -0,0 +1,59 @@
+# Recovery Score Calculations: test_cache_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache_helper import build_cache, get_case_dir, is_cache_valid, load_recording
+from synthetic_data_helper import generate_recording, write_case_csv
+
+def write_case(directory, case_number: str = '1000', duration_s: float = 10.0, seed: int = 0) -> str:
+    os.makedirs(directory, exist_ok = True)
+    file_path: str = os.path.join(directory, case_number)
+    write_case_csv(file_path, generate_recording(duration_s = duration_s, failed_attempts = 1, seed = seed))
+
+    return file_path
+
+def test_same_case_number_in_two_directories(tmp_path):
+    first: str = write_case(tmp_path / 'a', seed = 0)
+    second: str = write_case(tmp_path / 'b', seed = 1)
+    cache_dir: str = str(tmp_path / 'cache')
+
+    assert get_case_dir(first, cache_dir) != get_case_dir(second, cache_dir)
+    assert not np.array_equal(load_recording(first, cache_dir)['Acc_Z'], load_recording(second, cache_dir)['Acc_Z'])
+
+def test_stale_cache_is_replaced(tmp_path):
+    file_path: str = write_case(tmp_path, duration_s = 10.0)
+    cache_dir: str = str(tmp_path / 'cache')
+    assert len(load_recording(file_path, cache_dir)['Acc_Z']) == 2000
+
+    write_case(tmp_path, duration_s = 20.0)
+    assert len(load_recording(file_path, cache_dir)['Acc_Z']) == 4000
+    assert sorted(os.listdir(cache_dir)) == [os.path.basename(get_case_dir(file_path, cache_dir))]
+
+def test_build_cache_onto_valid_entry(tmp_path):
+    file_path: str = write_case(tmp_path)
+    case_dir: str = get_case_dir(file_path, str(tmp_path / 'cache'))
+    build_cache(file_path, case_dir)
+
+    meta_inode: int = os.stat(os.path.join(case_dir, 'meta.json')).st_ino
+
+    # The replace fails on the existing entry, which is valid, so it is kept
+    build_cache(file_path, case_dir)
+
+    assert os.stat(os.path.join(case_dir, 'meta.json')).st_ino == meta_inode
+    assert is_cache_valid(file_path, case_dir)
+    assert [name for name in os.listdir(os.path.dirname(case_dir)) if name.startswith('.')] == []
+
+def test_concurrent_builds(tmp_path):
+    file_path: str = write_case(tmp_path, duration_s = 60.0)
+    case_dir: str = get_case_dir(file_path, str(tmp_path / 'cache'))
+
+    with ProcessPoolExecutor(max_workers = 4) as executor:
+        list(executor.map(build_cache, [file_path] * 8, [case_dir] * 8))
+
+    assert is_cache_valid(file_path, case_dir)
+    assert len(load_recording(file_path, str(tmp_path / 'cache'))['Acc_Z']) == 12000
@@ -0,0 +1,80 @@
+# Recovery Score Calculations: test_csv_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from CSV_helper import CSV, SQLite, make_entry
+
+def test_make_entry_case_number():
+    # Batch runs pass the case path, interactive runs the case number: both log the same Case_Number
+    for file_path in ('382913', '382913.csv', os.path.join('cases', '382913'), os.path.join('data', 'cases', '382913.csv')):
+        assert make_entry(file_path, 0.0, 0.0, 0.0, 0.0, 0.0, 0, 1.0, None, 2.0)['Case_Number'] == '382913'
+
+def initialize_csv(_) -> None:
+    '''Process pool task'''
+    CSV.initialize_csv()
+
+def test_initialize_csv_writes_one_header(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with ProcessPoolExecutor(max_workers = 4) as executor:
+        list(executor.map(initialize_csv, range(16)))
+
+    with open(CSV.CSV_FILE, encoding = 'utf-8') as csv_file:
+        assert csv_file.read() == ','.join(CSV.COLUMNS) + '\n'
+
+def sqlite_writer(worker: int) -> None:
+    '''Process pool task: 20 single-entry transactions for cases 1000 to 1004, the score is the worker and the write'''
+    for k in range(20):
+        SQLite.add_entries([make_entry(str(1000 + k % 5), 0.0, 0.0, 0.0, 0.0, 0.0, k, 1.0, None, worker * 100 + k)])
+
+def test_sqlite_concurrent_writers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SQLite.initialize()
+
+    with ProcessPoolExecutor(max_workers = 4) as executor:
+        list(executor.map(sqlite_writer, range(4)))
+
+    connection = sqlite3.connect(SQLite.DB_FILE)
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert connection.execute(f'SELECT COUNT(*) FROM {SQLite.TABLE}').fetchone()[0] == 80
+    connection.close()
+
+    # Each case has 16 entries in write order; its latest entry is the last one written
+    for case_number in ('1000', '1001', '1002', '1003', '1004'):
+        history = SQLite.case_history(case_number)
+        assert len(history) == 16
+        assert all(entry['Case_Number'] == case_number for entry in history)
+
+        for worker in range(4):
+            scores = [entry['rs_2axes_py'] for entry in history if entry['rs_2axes_py'] // 100 == worker]
+            assert scores == sorted(scores) and len(scores) == 4
+
+    latest = SQLite.latest_scores()
+    assert [entry['Case_Number'] for entry in latest] == ['1000', '1001', '1002', '1003', '1004']
+    assert all(entry == SQLite.case_history(entry['Case_Number'])[-1] for entry in latest)
+
+def test_sqlite_writer_waits_for_lock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    # A second connection holds the write lock while add_entries runs: it waits (busy timeout) instead of failing
+    holder = SQLite.connect()
+    holder.execute('BEGIN IMMEDIATE')
+    holder.execute(f'INSERT INTO {SQLite.TABLE} VALUES ({", ".join("?" for _ in CSV.COLUMNS)})', [make_entry('1000', 0.0, 0.0, 0.0, 0.0, 0.0, 0, 1.0, None, 1.0)[column] for column in CSV.COLUMNS])
+
+    writer = threading.Thread(target = SQLite.add_entries, args = ([make_entry('1000', 0.0, 0.0, 0.0, 0.0, 0.0, 1, 1.0, 2.0, 2.0)],))
+    writer.start()
+    time.sleep(0.5)
+    assert writer.is_alive()
+
+    holder.commit()
+    holder.close()
+    writer.join(timeout = SQLite.TIMEOUT)
+
+    assert [entry['rs_2axes_py'] for entry in SQLite.case_history('1000')] == [1.0, 2.0]
+    assert SQLite.latest_scores()[0]['sumua_py'] == 2.0
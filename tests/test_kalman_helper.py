@@ -0,0 +1,74 @@
+# Recovery Score Calculations: test_kalman_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pytest
+
+from kalman_helper import STEADY_STATE_TOLERANCE, get_kalman_gains, get_settled_index, get_steady_state_bound, get_transient_gains, kalman_filter
+
+# (Q, R, P): the pipeline defaults, a faster and a slower converging filter
+VARIANCES: list[tuple[float, float, float]] = [(1e-4, 1e-2, 0.5), (1e-2, 1.0, 1.0), (1e-6, 1e-1, 0.1)]
+
+def reference_kalman_filter(data, process_variance, measurement_variance, estimated_measurement_variance):
+    '''Per-sample loop of the original file_helper.apply_kalman_filter (one axis)'''
+    n = len(data)
+    xhat = np.zeros(n)
+    P = np.zeros(n)
+    xhatminus = np.zeros(n)
+    Pminus = np.zeros(n)
+    K = np.zeros(n)
+
+    xhat[0] = data[0]
+    P[0] = estimated_measurement_variance
+
+    for k in range(1, n):
+        xhatminus[k] = xhat[k-1]
+        Pminus[k] = P[k-1] + process_variance
+
+        K[k] = Pminus[k] / (Pminus[k] + measurement_variance)
+        xhat[k] = xhatminus[k] + K[k] * (data[k] - xhatminus[k])
+        P[k] = (1 - K[k]) * Pminus[k]
+
+    return xhat, K
+
+def random_recording(n: int, seed: int = 0) -> np.ndarray:
+    '''Random walk plus noise on 3 axes'''
+    rng = np.random.default_rng(seed)
+
+    return np.cumsum(rng.normal(scale = 0.01, size = (n, 3)), axis = 0) + rng.normal(size = (n, 3))
+
+@pytest.mark.parametrize('variances', VARIANCES)
+def test_matches_reference_loop(variances):
+    data = random_recording(20_011)
+    xhat = kalman_filter(data, *variances)
+
+    for axis in range(3):
+        expected, gains = reference_kalman_filter(data[:, axis], *variances)
+        assert np.allclose(xhat[:, axis], expected, rtol = 1e-12, atol = 1e-12)
+        assert np.allclose(get_kalman_gains(len(data), *variances), gains, rtol = 1e-12, atol = 0)
+
+def test_one_axis_and_short_inputs():
+    data = random_recording(10)[:, 0]
+
+    for n in (1, 2, 10):
+        assert np.allclose(kalman_filter(data[:n], *VARIANCES[0]), reference_kalman_filter(data[:n], *VARIANCES[0])[0], rtol = 1e-12, atol = 1e-12)
+
+@pytest.mark.parametrize('variances', VARIANCES + [(0.0, 1e-2, 0.5)])
+@pytest.mark.parametrize('tolerance', [STEADY_STATE_TOLERANCE, 1e-8])
+def test_steady_mode_within_bound(variances, tolerance):
+    # Q = 0: the gain decreases as 1/k and never settles, so the steady mode follows the exact gains almost to the end
+    data = random_recording(50_003)
+    exact = kalman_filter(data, *variances)
+    steady = kalman_filter(data, *variances, mode = 'steady', tolerance = tolerance)
+    data_range = float(np.max(data.max(axis = 0) - data.min(axis = 0)))
+
+    assert np.max(np.abs(steady - exact)) <= get_steady_state_bound(data, *variances, tolerance) + 1e-12 * data_range
+
+def test_steady_mode_without_settled_gain():
+    transient = get_transient_gains(50_003, 0.0, 1e-2, 0.5)
+    assert len(transient) == 50_003 and get_settled_index(transient) > 40_000
+
+def test_steady_mode_float32():
+    data = random_recording(10_007)
+    assert np.allclose(kalman_filter(data, *VARIANCES[0], dtype = np.float32, mode = 'steady'), kalman_filter(data, *VARIANCES[0]), atol = 1e-4)
@@ -0,0 +1,66 @@
+# Recovery Score Calculations: test_parallel_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pytest
+
+import rolling_helper
+
+from file_helper import moving_average
+from kalman_helper import BLOCK_SIZE, kalman_filter, linear_recursive_filter
+from parallel_helper import split_range
+from rolling_helper import STATISTICS, rolling
+
+# Not a multiple of BLOCK_SIZE nor of the rolling chunk size used below
+N: int = 37 * BLOCK_SIZE * 41 + 13
+WORKERS: list[int | None] = [2, 3, 7, None]
+
+def random_recording(n: int = N, seed: int = 0) -> np.ndarray:
+    '''Random walk plus noise on 3 axes'''
+    rng = np.random.default_rng(seed)
+
+    return np.cumsum(rng.normal(scale = 0.01, size = (n, 3)), axis = 0) + rng.normal(size = (n, 3))
+
+def test_split_range():
+    for n, parts in ((0, 4), (5, 8), (N, 7), (N, 1)):
+        ranges = split_range(n, parts)
+        assert [i for start, end in ranges for i in range(start, end)] == list(range(n))
+        assert len(ranges) <= max(parts, 1)
+
+@pytest.mark.parametrize('workers', WORKERS)
+def test_linear_recursive_filter(workers):
+    rng = np.random.default_rng(1)
+    a = rng.uniform(0.5, 1.0, N)
+    b = rng.normal(size = (N, 3))
+    x0 = rng.normal(size = 3)
+
+    assert np.array_equal(linear_recursive_filter(a, b, x0, workers), linear_recursive_filter(a, b, x0, 1))
+
+@pytest.mark.parametrize('workers', WORKERS)
+@pytest.mark.parametrize('mode', ['exact', 'steady'])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_kalman_filter(workers, mode, dtype):
+    data = random_recording()
+
+    assert np.array_equal(kalman_filter(data, 1e-4, 1e-2, 0.5, dtype, workers, mode), kalman_filter(data, 1e-4, 1e-2, 0.5, dtype, 1, mode))
+
+@pytest.mark.parametrize('workers', WORKERS)
+@pytest.mark.parametrize('step, partial', [(1, True), (1, False), (7, True), (7, False)])
+def test_rolling(monkeypatch, workers, step, partial):
+    # Several chunks, the last one shorter than the others
+    monkeypatch.setattr(rolling_helper, 'CHUNK_SIZE', 10_007)
+    data = random_recording()
+
+    parallel = rolling(data, 201, STATISTICS, step, partial, workers)
+    sequential = rolling(data, 201, STATISTICS, step, partial, 1)
+
+    for name in STATISTICS:
+        assert np.array_equal(parallel[name], sequential[name])
+
+@pytest.mark.parametrize('workers', WORKERS)
+def test_moving_average(monkeypatch, workers):
+    monkeypatch.setattr(rolling_helper, 'CHUNK_SIZE', 10_007)
+    data = random_recording()
+
+    assert np.array_equal(moving_average(data, 201, workers), moving_average(data, 201, 1))
@@ -0,0 +1,53 @@
+# Recovery Score Calculations: test_plots Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from derivative_helper import calculate_derivatives_np, get_derivative_offset
+from graph_helper import get_plot_jerk_snap, get_plot_jerk_snap_with_roi
+from pipeline_helper import run_pipeline
+from synthetic_data_helper import generate_recording, write_case_csv
+
+@pytest.mark.parametrize('method', ['forward', 'central', 'savgol'])
+def test_pipeline_plot(case_file, tmp_path, method):
+    plot_file = tmp_path / f'{method}.png'
+    run_pipeline(case_file, {'derivative_method': method}, verbose = False, plot_file = str(plot_file))
+
+    assert plot_file.stat().st_size > 0
+
+@pytest.mark.parametrize('method', ['forward', 'central', 'savgol'])
+def test_plot_jerk_snap_lengths(tmp_path, method):
+    n = 2000
+    time_stamp = np.arange(n, dtype = np.int64) * 5_000_000
+    acc_z = np.sin(np.arange(n) / 50.0)
+    jerk, snap = calculate_derivatives_np(acc_z, time_stamp, method = method)
+
+    # Timestamps aligned on the first jerk and snap sample, as in pipeline_helper.filter_and_differentiate
+    offset = get_derivative_offset(method)
+    df_avg = pd.DataFrame({'timeStamp': time_stamp[offset:].view('datetime64[ns]'), 'Acc_Z': acc_z[offset:]})
+
+    get_plot_jerk_snap(jerk, snap, np.arange(100, 200), df_avg, str(tmp_path / 'jerk_snap.png'))
+    get_plot_jerk_snap_with_roi(jerk, snap, np.arange(100, 200), df_avg, str(tmp_path / 'roi.png'))
+
+    assert (tmp_path / 'jerk_snap.png').exists() and (tmp_path / 'roi.png').exists()
+
+def test_segmented_pipeline_plot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    recording = generate_recording(duration_s = 300.0)
+
+    # 10 s gap and a duplicated timestamp: the recording is split into three segments
+    keep = np.ones(len(recording['timeStamp']), dtype = bool)
+    keep[20_000:22_000] = False
+    recording = {column: values[keep] for column, values in recording.items()}
+    recording['timeStamp'][40_000] = recording['timeStamp'][39_999]
+
+    case_file = str(tmp_path / '1001')
+    write_case_csv(case_file, recording)
+
+    plot_file = tmp_path / 'segmented.png'
+    run_pipeline(case_file, plot_file = str(plot_file))
+
+    assert plot_file.stat().st_size > 0
@@ -0,0 +1,95 @@
+# Recovery Score Calculations: test_rolling_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rolling_helper
+
+from attempt_detection_helper import get_roi_sd, get_sd
+from rolling_helper import STATISTICS, count_windows, rolling
+
+def random_recording(n: int = 10_007, seed: int = 0) -> np.ndarray:
+    '''Noisy Acc_X, Acc_Y and Acc_Z around 0, 0 and 9.8 with a few bursts'''
+    rng = np.random.default_rng(seed)
+    data = rng.normal(scale = 0.05, size = (n, 3)) + np.array([0.0, 0.0, 9.8])
+    data[n // 3:n // 3 + 200] += rng.normal(scale = 5.0, size = (200, 3))
+
+    return data
+
+def pandas_rolling(data: np.ndarray, window: int, statistic: str, step: int, partial: bool) -> np.ndarray:
+    '''rolling(window).<statistic>() in pandas, at the outputs of rolling_helper.rolling'''
+    frame = pd.DataFrame(data ** 2 if statistic == 'energy' else data)
+    windows = frame.rolling(window, min_periods = 1 if partial else window)
+
+    if statistic == 'std':
+        result = windows.std(ddof = 0)
+    elif statistic == 'energy':
+        result = windows.sum()
+    else:
+        result = getattr(windows, statistic)()
+
+    return result.to_numpy()[(0 if partial else window - 1)::step]
+
+@pytest.mark.parametrize('statistic', STATISTICS)
+@pytest.mark.parametrize('window', [1, 2, 5, 200, 1_000])
+@pytest.mark.parametrize('step', [1, 3, 50])
+@pytest.mark.parametrize('partial', [True, False])
+def test_matches_pandas(monkeypatch, statistic, window, step, partial):
+    # Several chunks, the last one shorter than the others
+    monkeypatch.setattr(rolling_helper, 'CHUNK_SIZE', 3_001)
+    data = random_recording()
+
+    result = rolling(data, window, statistic, step, partial)
+    expected = pandas_rolling(data, window, statistic, step, partial)
+
+    assert result.shape == expected.shape == (count_windows(len(data), window, step, partial), 3)
+
+    if statistic in ('min', 'max'):
+        assert np.array_equal(result, expected)
+    else:
+        assert np.allclose(result, expected, rtol = 1e-9, atol = 1e-9)
+
+def test_one_column_and_several_statistics():
+    data = random_recording()
+    results = rolling(data[:, 2], 200, STATISTICS, 50, False)
+
+    for statistic in STATISTICS:
+        assert results[statistic].shape == (count_windows(len(data), 200, 50, False),)
+        assert np.allclose(results[statistic], rolling(data, 200, statistic, 50, False)[:, 2], rtol = 1e-12, atol = 1e-12)
+
+def test_window_longer_than_signal():
+    data = random_recording(1_000)
+
+    assert rolling(data, 2_000, 'mean', 1, False).shape == (0, 3)
+    assert np.allclose(rolling(data, 2_000, 'mean'), pandas_rolling(data, 2_000, 'mean', 1, True))
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        rolling(random_recording(1_000), 10, 'median')
+
+    with pytest.raises(ValueError):
+        rolling(random_recording(1_000), 10, 'mean', step = 0)
+
+def test_roi_sd():
+    acc_z = random_recording()[:, 2]
+    sd = get_sd(acc_z, 200, 50)
+
+    # Window k covers samples k * 50 to k * 50 + 199
+    expected = np.array([np.std(acc_z[k * 50:k * 50 + 200]) for k in range((len(acc_z) - 200) // 50 + 1)])
+    assert np.allclose(sd, expected, rtol = 1e-9, atol = 1e-12)
+
+    roi_sd = get_roi_sd(acc_z, 1.0, 200, 50)
+    above = np.flatnonzero(expected >= 1.0)
+    assert len(roi_sd) == 1
+    assert roi_sd[0][0] == above[np.argmax(expected[above])]
+
+@pytest.mark.parametrize('window', [1, 2, 5, 50])
+def test_std_of_a_drifting_signal(window):
+    # Short windows far from the first value of the chunk: the variance is not lost to rounding errors
+    data = np.cumsum(np.random.default_rng(0).normal(scale = 0.05, size = 200_000)) + 9.8
+    expected = np.lib.stride_tricks.sliding_window_view(data, window).std(axis = 1)
+
+    assert np.allclose(rolling(data, window, 'std', partial = False), expected, rtol = 1e-9, atol = 1e-11)
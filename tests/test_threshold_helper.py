@@ -0,0 +1,119 @@
+# Recovery Score Calculations: test_threshold_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import numpy as np
+import pytest
+
+from threshold_helper import RELATIVE_ACCURACY, ThresholdStats, get_threshold_stats
+
+# Room for the rounding of log(x) / log(gamma) at the bucket boundaries
+SLACK: float = 1e-9
+
+def jerk_like(n: int = 200_003, seed: int = 0) -> np.ndarray:
+    '''Heavy-tailed values of both signs with a few exact zeros, like a jerk or snap signal'''
+    rng = np.random.default_rng(seed)
+    values = rng.standard_t(3, n) * 1e-9
+    values[::1_000] = 0.0
+
+    return values
+
+def check_quantile(stats: ThresholdStats, values: np.ndarray, q: float, relative_accuracy: float = RELATIVE_ACCURACY) -> None:
+    '''The quantile is within the relative accuracy of the value of rank q * (count - 1) (np.percentile, method 'lower')'''
+    expected = np.percentile(values, 100 * q, method = 'lower')
+
+    assert abs(stats.quantile(q) - expected) <= (relative_accuracy + SLACK) * abs(expected)
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('relative_accuracy', [RELATIVE_ACCURACY, 0.05])
+def test_quantile_relative_accuracy(seed, relative_accuracy):
+    values = jerk_like(seed = seed)
+    stats = ThresholdStats(relative_accuracy)
+    stats.update(values)
+
+    for q in (0.0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999, 1.0):
+        check_quantile(stats, values, q, relative_accuracy)
+
+    # Between the two values np.percentile interpolates, widened by the relative accuracy
+    for percentile in (90, 95, 99):
+        low, high = np.percentile(values, percentile, method = 'lower'), np.percentile(values, percentile, method = 'higher')
+        assert low * (1 - relative_accuracy) - SLACK * abs(low) <= stats.quantile(percentile / 100) <= high * (1 + relative_accuracy) + SLACK * abs(high)
+
+def test_mean_and_std():
+    values = jerk_like() + 3e-9
+    stats = ThresholdStats()
+    stats.update(values)
+
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, np.mean(values), rtol = 1e-12, atol = 0)
+    assert np.isclose(stats.std, np.std(values), rtol = 1e-12, atol = 0)
+
+def test_merge_halves_matches_one_pass():
+    values = jerk_like()
+    half = len(values) // 2
+
+    one_pass = ThresholdStats()
+    one_pass.update(values)
+
+    first, second = ThresholdStats(), ThresholdStats()
+    first.update(values[:half])
+    second.update(values[half:])
+    first.merge(second)
+
+    assert first.count == one_pass.count
+    assert np.isclose(first.mean, one_pass.mean, rtol = 1e-12, atol = 0)
+    assert np.isclose(first.std, one_pass.std, rtol = 1e-12, atol = 0)
+    assert (first.positive, first.negative, first.zeros) == (one_pass.positive, one_pass.negative, one_pass.zeros)
+
+    for q in (0.01, 0.5, 0.95, 0.99):
+        assert first.quantile(q) == one_pass.quantile(q)
+
+def test_merge_empty_and_mismatched_accuracy():
+    stats = ThresholdStats()
+    stats.update(jerk_like(1_000))
+    mean, std = stats.mean, stats.std
+
+    stats.merge(ThresholdStats())
+    assert (stats.mean, stats.std) == (mean, std)
+
+    with pytest.raises(ValueError):
+        stats.merge(ThresholdStats(0.05))
+
+def test_add_matches_update():
+    values = jerk_like(5_000)
+    added, updated = ThresholdStats(), ThresholdStats()
+    updated.update(values)
+
+    for value in values:
+        added.add(float(value))
+
+    assert np.isclose(added.mean, updated.mean, rtol = 1e-9, atol = 0)
+    assert np.isclose(added.std, updated.std, rtol = 1e-9, atol = 0)
+
+    for q in (0.05, 0.5, 0.95):
+        check_quantile(added, values, q)
+
+def test_collapsed_buckets_keep_high_percentiles():
+    # Values over many orders of magnitude: the buckets closest to zero are merged
+    values = np.exp(np.random.default_rng(0).uniform(-40, 0, 100_000))
+    stats = ThresholdStats(max_buckets = 256)
+    stats.update(values)
+
+    assert len(stats.positive) <= 256
+
+    for q in (0.9, 0.95, 0.99, 1.0):
+        check_quantile(stats, values, q)
+
+@pytest.mark.parametrize('chunk_size', [1_000, 65_536, 1_000_000])
+def test_streaming_threshold(chunk_size):
+    values = jerk_like()
+    mean, std, threshold = get_threshold_stats(values, 3.0, 99, 'exact')
+    streaming_mean, streaming_std, streaming_threshold = get_threshold_stats(values, 3.0, 99, 'streaming', chunk_size)
+
+    assert np.isclose(streaming_mean, mean, rtol = 1e-9, atol = 1e-24)
+    assert np.isclose(streaming_std, std, rtol = 1e-9, atol = 0)
+    assert abs(streaming_threshold - threshold) <= (RELATIVE_ACCURACY + SLACK) * abs(threshold)
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        get_threshold_stats(jerk_like(100), 3.0, 99, 'approximate')
@@ -0,0 +1,221 @@
+# Recovery Score Calculations: threshold_helper Script
+# Script created 10/18/2026
+# Last revision 10/18/2026
+
+import math
+
+import numpy as np
+
+from numpy.typing import NDArray
+
+# Number of values processed at once in streaming mode
+CHUNK_SIZE: int = 1_000_000
+
+# Relative accuracy of the percentile in streaming mode and maximum number of buckets per sign
+RELATIVE_ACCURACY: float = 0.01
+MAX_BUCKETS: int = 2048
+
+def get_threshold_stats(values: NDArray[np.float64], factor: float, percentile: float, mode: str = 'exact', chunk_size: int = CHUNK_SIZE) -> tuple:
+    '''Calculates the mean, the standard deviation and the threshold max(mean + factor * std, percentile) of a signal
+
+    Args:
+        values (NDArray[np.float64]): Array of jerk or snap values
+        factor (float): Multiplication factor for the standard deviation
+        percentile (float): Percentile value to use for setting the threshold (0 to 100)
+        mode (str): 'exact' (np.mean, np.std and np.percentile on the whole array) or
+                    'streaming' (ThresholdStats over chunks of 'chunk_size' values: bounded memory,
+                    the percentile is within RELATIVE_ACCURACY of the exact one)
+        chunk_size (int): number of values per chunk in streaming mode
+
+    Returns:
+        tuple: mean, standard deviation and threshold
+    '''
+    if mode == 'exact':
+        mean: float = np.mean(values)
+        std: float = np.std(values)
+        threshold: float = max(mean + factor * std, np.percentile(values, percentile))
+
+        return mean, std, threshold
+
+    if mode == 'streaming':
+        stats: ThresholdStats = ThresholdStats()
+
+        for start in range(0, len(values), chunk_size):
+            stats.update(values[start:start + chunk_size])
+
+        return stats.get_threshold(factor, percentile)
+
+    raise ValueError(f'Unknown threshold mode: {mode}')
+
+class ThresholdStats:
+    '''Running mean, standard deviation and percentile of a stream of values, with bounded memory and mergeable state.
+
+       Mean and variance use Welford's algorithm (Chan et al. to merge chunks or partial states), so they match
+       np.mean and np.std up to rounding. Percentiles come from a logarithmic bucket sketch (DDSketch): a value x
+       is counted in bucket ceil(log(|x|) / log(gamma)) with gamma = (1 + a) / (1 - a), one set of buckets per sign.
+       The returned percentile is within a relative error a (RELATIVE_ACCURACY) of the value of that rank in the data.
+       When a sign uses more than MAX_BUCKETS buckets, the buckets closest to zero are merged: the guarantee then
+       only holds for percentiles outside the merged range (in practice, the low percentiles).
+    '''
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY, max_buckets: int = MAX_BUCKETS) -> None:
+        '''
+        Args:
+            relative_accuracy (float): relative error bound of the percentiles
+            max_buckets (int): maximum number of buckets for each sign
+        '''
+        self.relative_accuracy: float = relative_accuracy
+        self.max_buckets: int = max_buckets
+        self.gamma: float = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma: float = math.log(self.gamma)
+
+        # Welford state
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+
+        # buckets for positive values, negative values (by magnitude) and zeros
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zeros: int = 0
+
+    @property
+    def std(self) -> float:
+        '''Population standard deviation (same as np.std)'''
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+    def add(self, value: float) -> None:
+        '''Adds a single value (for live streams)
+
+        Args:
+            value (float): new value
+        '''
+        self.count += 1
+        delta: float = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if value > 0:
+            key: int = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[key] = self.positive.get(key, 0) + 1
+            if len(self.positive) > self.max_buckets:
+                _collapse(self.positive, self.max_buckets)
+
+        elif value < 0:
+            key = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[key] = self.negative.get(key, 0) + 1
+            if len(self.negative) > self.max_buckets:
+                _collapse(self.negative, self.max_buckets)
+
+        else:
+            self.zeros += 1
+
+    def update(self, values: NDArray[np.float64]) -> None:
+        '''Adds a chunk of values
+
+        Args:
+            values (NDArray[np.float64]): new values
+        '''
+        values = np.asarray(values, dtype = np.float64)
+
+        if len(values) == 0:
+            return
+
+        chunk: ThresholdStats = ThresholdStats(self.relative_accuracy, self.max_buckets)
+        chunk.count = len(values)
+        chunk.mean = float(np.mean(values))
+        chunk.m2 = float(np.sum(np.square(values - chunk.mean)))
+
+        chunk.positive = self._count_buckets(values[values > 0])
+        chunk.negative = self._count_buckets(-values[values < 0])
+        chunk.zeros = int(np.count_nonzero(values == 0))
+
+        self.merge(chunk)
+
+    def merge(self, other: 'ThresholdStats') -> None:
+        '''Merges the state of another ThresholdStats (e.g. computed on another chunk or by another process)
+
+        Args:
+            other (ThresholdStats): state to merge, built with the same relative accuracy
+        '''
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge ThresholdStats with different relative accuracies')
+
+        if other.count == 0:
+            return
+
+        count: int = self.count + other.count
+        delta: float = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, bucket_count in other_store.items():
+                store[key] = store.get(key, 0) + bucket_count
+            if len(store) > self.max_buckets:
+                _collapse(store, self.max_buckets)
+
+        self.zeros += other.zeros
+
+    def quantile(self, q: float) -> float:
+        '''Approximate quantile
+
+        Args:
+            q (float): quantile between 0 and 1
+
+        Returns:
+            float: value within the relative accuracy of the value of rank q * (count - 1)
+        '''
+        if self.count == 0:
+            return math.nan
+
+        rank: float = q * (self.count - 1)
+        seen: int = 0
+
+        # most negative values first (largest magnitude), then zeros, then positive values
+        for key in sorted(self.negative, reverse = True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def get_threshold(self, factor: float, percentile: float) -> tuple:
+        '''Mean, standard deviation and threshold max(mean + factor * std, percentile)
+
+        Args:
+            factor (float): Multiplication factor for the standard deviation
+            percentile (float): Percentile value to use for setting the threshold (0 to 100)
+
+        Returns:
+            tuple: mean, standard deviation and threshold
+        '''
+        std: float = self.std
+
+        return self.mean, std, max(self.mean + factor * std, self.quantile(percentile / 100))
+
+    def _count_buckets(self, magnitudes: NDArray[np.float64]) -> dict[int, int]:
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64), return_counts = True)
+
+        return dict(zip(keys.tolist(), counts.tolist()))
+
+    def _bucket_value(self, key: int) -> float:
+        # midpoint (in relative terms) of the bucket (gamma^(key - 1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+def _collapse(store: dict[int, int], max_buckets: int) -> None:
+    '''Merges the lowest buckets (closest to zero) of a store so it keeps at most max_buckets buckets'''
+    keys: list[int] = sorted(store)
+    merged: list[int] = keys[:len(keys) - max_buckets + 1]
+
+    store[merged[-1]] = sum(store.pop(key) for key in merged)